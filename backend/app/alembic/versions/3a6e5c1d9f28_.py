@@ -0,0 +1,34 @@
+"""version answer tally shards
+
+Revision ID: 3a6e5c1d9f28
+Revises: d84e6f2b1c37
+Create Date: 2026-10-18 18:02:41.318207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3a6e5c1d9f28'
+down_revision = 'd84e6f2b1c37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute(sa.schema.CreateSequence(sa.Sequence('answertally_version_seq')))
+    op.add_column(
+        'answertally',
+        sa.Column(
+            'version',
+            sa.BigInteger(),
+            server_default=sa.text("nextval('answertally_version_seq')"),
+            nullable=False,
+        ),
+    )
+
+
+def downgrade():
+    op.drop_column('answertally', 'version')
+    op.execute(sa.schema.DropSequence(sa.Sequence('answertally_version_seq')))
@@ -0,0 +1,36 @@
+"""unique answer per poll and owner
+
+Revision ID: 5b0c1f3e9a21
+Revises: db965cbde460
+Create Date: 2026-10-18 10:12:41.503127
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '5b0c1f3e9a21'
+down_revision = 'db965cbde460'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Double votes could be stored before the constraint existed, keep the
+    # earliest answer of every user in every poll
+    op.execute(
+        """
+        DELETE FROM answer a
+        USING answer b
+        WHERE a.poll_id = b.poll_id
+          AND a.owner_id = b.owner_id
+          AND a.id > b.id
+        """
+    )
+    op.create_unique_constraint(
+        'answer_poll_id_owner_id_key', 'answer', ['poll_id', 'owner_id']
+    )
+
+
+def downgrade():
+    op.drop_constraint('answer_poll_id_owner_id_key', 'answer', type_='unique')
@@ -0,0 +1,47 @@
+"""answer tallies
+
+Revision ID: 9e4f27c5d8b3
+Revises: 5b0c1f3e9a21
+Create Date: 2026-10-18 11:02:17.218846
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9e4f27c5d8b3'
+down_revision = '5b0c1f3e9a21'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'answertally',
+        sa.Column('answer_option_id', sa.Integer(), nullable=False),
+        sa.Column('poll_id', sa.Integer(), nullable=False),
+        sa.Column('count', sa.Integer(), server_default='0', nullable=False),
+        sa.ForeignKeyConstraint(
+            ['answer_option_id'], ['answeroption.id'], ondelete='CASCADE'
+        ),
+        sa.ForeignKeyConstraint(['poll_id'], ['poll.id']),
+        sa.PrimaryKeyConstraint('answer_option_id'),
+    )
+    op.create_index(
+        op.f('ix_answertally_poll_id'), 'answertally', ['poll_id'], unique=False
+    )
+    op.execute(
+        """
+        INSERT INTO answertally (answer_option_id, poll_id, count)
+        SELECT answer.answer_option_id, answeroption.poll_id, count(*)
+        FROM answer
+        JOIN answeroption ON answeroption.id = answer.answer_option_id
+        GROUP BY answer.answer_option_id, answeroption.poll_id
+        """
+    )
+
+
+def downgrade():
+    op.drop_index(op.f('ix_answertally_poll_id'), table_name='answertally')
+    op.drop_table('answertally')
@@ -0,0 +1,91 @@
+"""indexes for the query shapes of the crud layer
+
+Revision ID: b7d31e0c5a92
+Revises: f2a9c7e41b05
+Create Date: 2026-10-18 16:02:48.531207
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d31e0c5a92'
+down_revision = 'f2a9c7e41b05'
+branch_labels = None
+depends_on = None
+
+# (name, table, columns) of the indexes the crud layer filters and pages by
+INDEXES = [
+    ('ix_accesslog_event_id_id', 'accesslog', ['event_id', 'id']),
+    (
+        'ix_accesslog_event_id_given_by_id_id',
+        'accesslog',
+        ['event_id', 'given_by_id', 'id'],
+    ),
+    (
+        'ix_accesslog_event_id_received_id_id',
+        'accesslog',
+        ['event_id', 'received_id', 'id'],
+    ),
+    ('ix_answer_answer_option_id', 'answer', ['answer_option_id']),
+    ('ix_answeroption_poll_id_id', 'answeroption', ['poll_id', 'id']),
+    ('ix_event_owner_id_id', 'event', ['owner_id', 'id']),
+    ('ix_poll_event_id_id', 'poll', ['event_id', 'id']),
+    ('ix_poll_owner_id_id', 'poll', ['owner_id', 'id']),
+    (
+        'ix_user_events_association_event_id_user_id',
+        'user_events_association',
+        ['event_id', 'user_id'],
+    ),
+    (
+        'ix_acess_moderator_events_association_event_id_user_id',
+        'acess_moderator_events_association',
+        ['event_id', 'user_id'],
+    ),
+    (
+        'ix_voting_moderator_events_association_event_id_user_id',
+        'voting_moderator_events_association',
+        ['event_id', 'user_id'],
+    ),
+]
+
+# Text columns nothing filters by and copies of the primary key indexes, they
+# only slow down writes
+DROPPED_INDEXES = [
+    ('ix_accesslog_id', 'accesslog', ['id']),
+    ('ix_answer_id', 'answer', ['id']),
+    ('ix_answeroption_id', 'answeroption', ['id']),
+    ('ix_answeroption_text', 'answeroption', ['text']),
+    ('ix_event_description', 'event', ['description']),
+    ('ix_event_id', 'event', ['id']),
+    ('ix_event_name', 'event', ['name']),
+    ('ix_item_description', 'item', ['description']),
+    ('ix_item_id', 'item', ['id']),
+    ('ix_item_title', 'item', ['title']),
+    ('ix_poll_id', 'poll', ['id']),
+    ('ix_poll_question', 'poll', ['question']),
+    ('ix_user_full_name', 'user', ['full_name']),
+    ('ix_user_id', 'user', ['id']),
+]
+
+
+def upgrade():
+    # Built concurrently, outside of a transaction, so that voting and access
+    # logging go on while the large tables are indexed
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name, table, columns, unique=False, postgresql_concurrently=True
+            )
+        for name, table, _ in DROPPED_INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in DROPPED_INDEXES:
+            op.create_index(
+                name, table, columns, unique=False, postgresql_concurrently=True
+            )
+        for name, table, _ in INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
@@ -0,0 +1,44 @@
+"""shard answer tallies
+
+Revision ID: c31a8d0f6e47
+Revises: 9e4f27c5d8b3
+Create Date: 2026-10-18 12:20:53.710921
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c31a8d0f6e47'
+down_revision = '9e4f27c5d8b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        'answertally',
+        sa.Column('shard', sa.Integer(), server_default='0', nullable=False),
+    )
+    op.drop_constraint('answertally_pkey', 'answertally', type_='primary')
+    op.create_primary_key(
+        'answertally_pkey', 'answertally', ['answer_option_id', 'shard']
+    )
+
+
+def downgrade():
+    # Collapse the shards of every option into one row (marked with shard -1
+    # until the others are gone)
+    op.execute(
+        """
+        INSERT INTO answertally (answer_option_id, shard, poll_id, count)
+        SELECT answer_option_id, -1, poll_id, sum(count)
+        FROM answertally
+        GROUP BY answer_option_id, poll_id
+        """
+    )
+    op.execute("DELETE FROM answertally WHERE shard <> -1")
+    op.drop_constraint('answertally_pkey', 'answertally', type_='primary')
+    op.create_primary_key('answertally_pkey', 'answertally', ['answer_option_id'])
+    op.drop_column('answertally', 'shard')
@@ -0,0 +1,36 @@
+"""brin index of access log times
+
+Revision ID: d84e6f2b1c37
+Revises: b7d31e0c5a92
+Create Date: 2026-10-18 16:48:05.902614
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'd84e6f2b1c37'
+down_revision = 'b7d31e0c5a92'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_accesslog_received_at',
+            'accesslog',
+            ['received_at'],
+            unique=False,
+            postgresql_using='brin',
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_accesslog_received_at',
+            table_name='accesslog',
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,27 @@
+"""event roles version
+
+Revision ID: f2a9c7e41b05
+Revises: c31a8d0f6e47
+Create Date: 2026-10-18 15:10:42.318604
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2a9c7e41b05'
+down_revision = 'c31a8d0f6e47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        'event',
+        sa.Column('roles_version', sa.Integer(), server_default='0', nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_column('event', 'roles_version')
@@ -7,6 +7,7 @@ from app.api.api_v1.endpoints import (
     events,
     items,
     login,
+    moderation,
     polls,
     users,
     utils,
@@ -18,6 +19,7 @@ api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(utils.router, prefix="/utils", tags=["utils"])
 api_router.include_router(items.router, prefix="/items", tags=["items"])
 api_router.include_router(events.router, prefix="/events", tags=["events"])
+api_router.include_router(moderation.router, prefix="/events", tags=["events"])
 api_router.include_router(
     access_logs.router, prefix="/access-logs", tags=["access-logs"]
 )
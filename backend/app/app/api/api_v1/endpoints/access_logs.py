@@ -1,10 +1,13 @@
-from typing import Any, List
+from datetime import datetime
+from typing import Any, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 
 from app import crud, models, schemas
 from app.api import deps
+from app.api.pagination import add_next_cursor, get_after
+from app.crud.base import Range
 
 router = APIRouter()
 
@@ -12,15 +15,20 @@ router = APIRouter()
 @router.get("/{event_id}", response_model=List[schemas.AccessLog])
 def read_access_logs(
     event_id: int,
+    response: Response,
     db: Session = Depends(deps.get_db),
     skip: int = 0,
     limit: int = 100,
+    after: Optional[int] = Depends(get_after),
     given_by_id: int = None,
     received_id: int = None,
+    received_from: Optional[datetime] = None,
+    received_to: Optional[datetime] = None,
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
-    Retrieve logs.
+    Retrieve logs, optionally of one giver or receiver and of the time from
+    `received_from` up to `received_to`.
     """
     event = crud.event.get(db=db, id=event_id)
     if not event:
@@ -54,7 +62,9 @@ def read_access_logs(
         event_id=event_id,
         skip=skip,
         limit=limit,
+        after=after,
         given_by_id=given_by_id,
         received_id=received_id,
+        received_at=Range(received_from, received_to),
     )
-    return logs
+    return add_next_cursor(logs, response, items=logs, limit=limit)
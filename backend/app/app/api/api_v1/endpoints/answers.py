@@ -1,72 +1,168 @@
-from typing import Any, List
+from datetime import datetime
+from typing import Any, Dict, List, NoReturn, Optional, Union
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app import crud, models, schemas
 from app.api import deps
-from app.core.security import can_user_send_answer, can_user_view_poll_info
+from app.api.fields import FieldSelector, select_fields
+from app.api.pagination import add_next_cursor, get_after
+from app.core.config import settings
+from app.core.security import EventRole, can_user_send_answer, can_user_view_poll_info
+from app.core.vote_buffer import VoteBufferFull, vote_buffer
+from app.crud.base import Range
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[schemas.Answer])
 def read_answers(
+    response: Response,
     db: Session = Depends(deps.get_db),
     skip: int = 0,
     limit: int = 100,
+    after: Optional[int] = Depends(get_after),
+    fields: Optional[List[str]] = Depends(FieldSelector(schemas.Answer)),
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Retrieve answers.
     """
     if crud.user.is_superuser(current_user):
-        items = crud.answer_option.get_multi(db, skip=skip, limit=limit)
+        items = crud.answer.get_multi(
+            db,
+            skip=skip,
+            limit=limit,
+            after=after,
+            plan=crud.answer.load_plan(schemas.Answer, fields),
+        )
     else:
         raise HTTPException(status_code=400, detail="Not enough permissions")
-    return items
+    return add_next_cursor(
+        select_fields(items, schemas.Answer, fields),
+        response,
+        items=items,
+        limit=limit,
+    )
 
 
-@router.get("/{poll_id}", response_model=List[schemas.Answer])
-def read_answers_by_poll(
+def read_answers_by_poll_sync(
+    db: Session,
+    *,
     poll_id: int,
-    db: Session = Depends(deps.get_db),
-    current_user: models.User = Depends(deps.get_current_active_user),
+    response: Response,
+    answer_option_id: Optional[List[int]],
+    created_at: Range,
+    limit: int,
+    after: Optional[int],
+    current_user: models.User,
 ) -> Any:
-    """
-    Retrieve answers with specific poll.
-    """
     poll = crud.poll.get(db, id=poll_id)
     if not poll:
         raise HTTPException(status_code=404, detail="Poll not found")
 
-    event = crud.event.get(db, id=poll.event_id)
-    can_view_options = can_user_view_poll_info(current_user.id, event)
+    roles = crud.event.get_roles(db, event_id=poll.event_id, user_id=current_user.id)
+    can_view_options = can_user_view_poll_info(roles)
     if can_view_options is False:
         if not crud.user.is_superuser(current_user):
             raise HTTPException(status_code=400, detail="Not enough permissions")
 
-    answers = crud.answer.get_multi_by_poll(db=db, poll_id=poll_id)
-    return answers
+    answers = crud.answer.get_multi_by_poll(
+        db=db,
+        poll_id=poll_id,
+        answer_option_id=answer_option_id,
+        created_at=created_at,
+        limit=limit,
+        after=after,
+        plan=crud.answer.load_plan(schemas.Answer),
+    )
+    return add_next_cursor(answers, response, items=answers, limit=limit)
 
 
-@router.post("/", response_model=schemas.Answer)
-def send_answer(
+async def read_answers_by_poll_async(
+    db: AsyncSession,
     *,
-    db: Session = Depends(deps.get_db),
-    answer_in: schemas.AnswerCreate,
-    current_user: models.User = Depends(deps.get_current_active_user),
+    poll_id: int,
+    response: Response,
+    answer_option_id: Optional[List[int]],
+    created_at: Range,
+    limit: int,
+    after: Optional[int],
+    current_user: models.User,
+) -> Any:
+    poll = await crud.async_poll.get(db, id=poll_id)
+    if not poll:
+        raise HTTPException(status_code=404, detail="Poll not found")
+
+    roles = await crud.async_event.get_roles(
+        db, event_id=poll.event_id, user_id=current_user.id
+    )
+    can_view_options = can_user_view_poll_info(roles)
+    if can_view_options is False:
+        if not crud.async_user.is_superuser(current_user):
+            raise HTTPException(status_code=400, detail="Not enough permissions")
+
+    answers = await crud.async_answer.get_multi_by_poll(
+        db=db,
+        poll_id=poll_id,
+        answer_option_id=answer_option_id,
+        created_at=created_at,
+        limit=limit,
+        after=after,
+    )
+    return add_next_cursor(answers, response, items=answers, limit=limit)
+
+
+@router.get("/{poll_id}", response_model=List[schemas.Answer])
+async def read_answers_by_poll(
+    poll_id: int,
+    response: Response,
+    db: Union[Session, AsyncSession] = Depends(deps.get_endpoint_db),
+    answer_option_id: Optional[List[int]] = Query(None),
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    limit: int = 100,
+    after: Optional[int] = Depends(get_after),
+    current_user: models.User = Depends(deps.get_endpoint_current_active_user),
 ) -> Any:
     """
-    Send new answer.
+    Retrieve answers with specific poll, optionally of some answer options and of
+    the time from `created_from` up to `created_to`.
     """
-    poll = crud.poll.get(db, id=answer_in.poll_id)
+    params: Dict[str, Any] = dict(
+        poll_id=poll_id,
+        response=response,
+        answer_option_id=answer_option_id,
+        created_at=Range(created_from, created_to),
+        limit=limit,
+        after=after,
+        current_user=current_user,
+    )
+    if isinstance(db, AsyncSession):
+        return await read_answers_by_poll_async(db, **params)
+    return await run_in_threadpool(read_answers_by_poll_sync, db, **params)
+
+
+def raise_rejected_vote(
+    *,
+    poll: Optional[models.Poll],
+    answer_option: Optional[models.AnswerOption],
+    roles: Optional[EventRole],
+    user: models.User,
+) -> NoReturn:
+    # The vote was not accepted, tell why. Accepted votes never get here.
     if not poll:
         raise HTTPException(status_code=404, detail="Poll not found")
 
-    event = crud.event.get(db, id=poll.event_id)
-    if can_user_send_answer(current_user.id, event) is False:
-        if not crud.user.is_superuser(current_user):
+    if not answer_option or answer_option.poll_id != poll.id:
+        raise HTTPException(status_code=404, detail="Answer option not found")
+
+    if not can_user_send_answer(roles):
+        if not crud.user.is_superuser(user):
             raise HTTPException(status_code=400, detail="Not enough permissions")
 
     if not poll.is_running:
@@ -74,19 +170,212 @@ def send_answer(
             status_code=400, detail="You can only vote in an active poll",
         )
 
-    other_user_answers = crud.answer.get_multi_by_owner(
-        db, owner_id=current_user.id, poll_id=answer_in.poll_id
+    raise HTTPException(
+        status_code=400,
+        detail="You have already submitted your answer to this poll",
     )
-    if len(other_user_answers) > 0:
-        raise HTTPException(
-            status_code=400,
-            detail="You have already submitted your answer to this poll",
+
+
+def reject_vote(
+    db: Session, *, answer_in: schemas.AnswerCreate, user: models.User
+) -> NoReturn:
+    poll = crud.poll.get(db, id=answer_in.poll_id)
+    raise_rejected_vote(
+        poll=poll,
+        answer_option=crud.answer_option.get(db, id=answer_in.answer_option_id),
+        roles=(
+            crud.event.get_roles(db, event_id=poll.event_id, user_id=user.id)
+            if poll
+            else None
+        ),
+        user=user,
+    )
+
+
+async def reject_vote_async(
+    db: AsyncSession, *, answer_in: schemas.AnswerCreate, user: models.User
+) -> NoReturn:
+    poll = await crud.async_poll.get(db, id=answer_in.poll_id)
+    raise_rejected_vote(
+        poll=poll,
+        answer_option=await crud.async_answer_option.get(
+            db, id=answer_in.answer_option_id
+        ),
+        roles=(
+            await crud.async_event.get_roles(
+                db, event_id=poll.event_id, user_id=user.id
+            )
+            if poll
+            else None
+        ),
+        user=user,
+    )
+
+
+def check_membership_in_query(
+    db: Session,
+    *,
+    answer_in: schemas.AnswerCreate,
+    user: models.User,
+    token_data: schemas.TokenPayload,
+) -> bool:
+    # Whether the vote statement has to check that the user is a participant.
+    # With the role cache or an event token the check is done here instead.
+    if crud.user.is_superuser(user):
+        return False
+    if not settings.ROLE_CACHE_ENABLED and token_data.event is None:
+        return True
+    event_id = crud.poll.get_event_id(db, poll_id=answer_in.poll_id)
+    roles = (
+        deps.get_event_roles(
+            db, token_data=token_data, event_id=event_id, user_id=user.id
         )
+        if event_id
+        else None
+    )
+    if not can_user_send_answer(roles):
+        reject_vote(db, answer_in=answer_in, user=user)
+    return False
 
-    answer = crud.answer.create_with_owner(
-        db=db, obj_in=answer_in, owner_id=current_user.id
+
+async def check_membership_in_query_async(
+    db: AsyncSession,
+    *,
+    answer_in: schemas.AnswerCreate,
+    user: models.User,
+    token_data: schemas.TokenPayload,
+) -> bool:
+    if crud.async_user.is_superuser(user):
+        return False
+    if not settings.ROLE_CACHE_ENABLED and token_data.event is None:
+        return True
+    event_id = await crud.async_poll.get_event_id(db, poll_id=answer_in.poll_id)
+    roles = (
+        await deps.get_async_event_roles(
+            db, token_data=token_data, event_id=event_id, user_id=user.id
+        )
+        if event_id
+        else None
     )
-    return answer
+    if not can_user_send_answer(roles):
+        await reject_vote_async(db, answer_in=answer_in, user=user)
+    return False
+
+
+def queue_vote(
+    *, answer_in: schemas.AnswerCreate, user: models.User
+) -> Optional[Response]:
+    try:
+        accepted = vote_buffer.put(
+            {
+                "poll_id": answer_in.poll_id,
+                "answer_option_id": answer_in.answer_option_id,
+                "owner_id": user.id,
+            }
+        )
+    except VoteBufferFull:
+        raise HTTPException(status_code=503, detail="Too many votes, try again later")
+    if accepted:
+        return JSONResponse(status_code=202, content={"msg": "Vote accepted"})
+    return None
+
+
+def send_answer_sync(
+    db: Session,
+    *,
+    answer_in: schemas.AnswerCreate,
+    current_user: models.User,
+    token_data: schemas.TokenPayload,
+) -> Any:
+    check_membership = check_membership_in_query(
+        db, answer_in=answer_in, user=current_user, token_data=token_data
+    )
+    if settings.VOTE_INGESTION_MODE == "buffered":
+        eligible = crud.answer.is_eligible(
+            db=db,
+            obj_in=answer_in,
+            owner_id=current_user.id,
+            check_membership=check_membership,
+        )
+        if eligible:
+            response = queue_vote(answer_in=answer_in, user=current_user)
+            if response:
+                return response
+    else:
+        answer = crud.answer.create_with_owner(
+            db=db,
+            obj_in=answer_in,
+            owner_id=current_user.id,
+            check_membership=check_membership,
+        )
+        if answer:
+            return answer
+    reject_vote(db, answer_in=answer_in, user=current_user)
+
+
+async def send_answer_async(
+    db: AsyncSession,
+    *,
+    answer_in: schemas.AnswerCreate,
+    current_user: models.User,
+    token_data: schemas.TokenPayload,
+) -> Any:
+    check_membership = await check_membership_in_query_async(
+        db, answer_in=answer_in, user=current_user, token_data=token_data
+    )
+    if settings.VOTE_INGESTION_MODE == "buffered":
+        eligible = await crud.async_answer.is_eligible(
+            db=db,
+            obj_in=answer_in,
+            owner_id=current_user.id,
+            check_membership=check_membership,
+        )
+        if eligible:
+            if vote_buffer.journal is None:
+                response = queue_vote(answer_in=answer_in, user=current_user)
+            else:
+                # Waits for the journal fsync
+                response = await run_in_threadpool(
+                    queue_vote, answer_in=answer_in, user=current_user
+                )
+            if response:
+                return response
+    else:
+        answer = await crud.async_answer.create_with_owner(
+            db=db,
+            obj_in=answer_in,
+            owner_id=current_user.id,
+            check_membership=check_membership,
+        )
+        if answer:
+            return answer
+    await reject_vote_async(db, answer_in=answer_in, user=current_user)
+
+
+@router.post(
+    "/",
+    response_model=schemas.AnswerReceipt,
+    responses={202: {"model": schemas.Msg}},
+)
+async def send_answer(
+    *,
+    db: Union[Session, AsyncSession] = Depends(deps.get_endpoint_db),
+    answer_in: schemas.AnswerCreate,
+    current_user: models.User = Depends(deps.get_endpoint_current_active_user),
+    token_data: schemas.TokenPayload = Depends(deps.get_token_data),
+) -> Any:
+    """
+    Send new answer.
+
+    With `VOTE_INGESTION_MODE` set to "buffered" an eligible vote is answered
+    with 202 and stored a few milliseconds later in a batch with other votes.
+    """
+    params: Dict[str, Any] = dict(
+        answer_in=answer_in, current_user=current_user, token_data=token_data
+    )
+    if isinstance(db, AsyncSession):
+        return await send_answer_async(db, **params)
+    return await run_in_threadpool(send_answer_sync, db, **params)
 
 
 @router.put("/{poll_id}", response_model=schemas.Answer)
@@ -104,16 +393,20 @@ def update_answer(
     poll = crud.poll.get(db, id=poll_id)
     if not poll:
         raise HTTPException(status_code=404, detail="Poll not found")
-    answers = crud.answer.get_multi_by_poll(
-        db=db, poll_id=poll_id, owner_id=current_user.id
-    )
-    if len(answers) == 0:
-        raise HTTPException(status_code=404, detail="Answer not found")
 
     if not poll.is_running:
         raise HTTPException(
             status_code=400, detail="You can only change the answer in an active poll",
         )
 
-    answer = crud.answer.update(db=db, db_obj=answers[-1], obj_in=answer_in)
+    answer_option = crud.answer_option.get(db, id=answer_in.answer_option_id)
+    if not answer_option or answer_option.poll_id != poll.id:
+        raise HTTPException(status_code=404, detail="Answer option not found")
+
+    answer_in.poll_id = poll_id
+    answer = crud.answer.update_with_owner(
+        db=db, obj_in=answer_in, owner_id=current_user.id
+    )
+    if not answer:
+        raise HTTPException(status_code=404, detail="Answer not found")
     return answer
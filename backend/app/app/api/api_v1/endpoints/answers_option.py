@@ -1,10 +1,11 @@
-from typing import Any, List
+from typing import Any, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 
 from app import crud, models, schemas
 from app.api import deps
+from app.api.pagination import add_next_cursor, get_after
 from app.core.security import can_user_manage_voting, can_user_view_poll_info
 
 router = APIRouter()
@@ -12,42 +13,59 @@ router = APIRouter()
 
 @router.get("/", response_model=List[schemas.AnswerOption])
 def read_answers_options(
+    response: Response,
     db: Session = Depends(deps.get_db),
     skip: int = 0,
     limit: int = 100,
+    after: Optional[int] = Depends(get_after),
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Retrieve answer options.
     """
     if crud.user.is_superuser(current_user):
-        items = crud.answer_option.get_multi(db, skip=skip, limit=limit)
+        items = crud.answer_option.get_multi(
+            db,
+            skip=skip,
+            limit=limit,
+            after=after,
+            plan=crud.answer_option.load_plan(schemas.AnswerOption),
+        )
     else:
         raise HTTPException(status_code=400, detail="Not enough permissions")
-    return items
+    return add_next_cursor(items, response, items=items, limit=limit)
 
 
 @router.get("/{event_id}", response_model=List[schemas.AnswerOption])
 def read_answers_options_by_event(
     event_id: int,
+    response: Response,
     db: Session = Depends(deps.get_db),
+    limit: int = 100,
+    after: Optional[int] = Depends(get_after),
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Retrieve answer options. A regular user can only get the options of events in which he is a
     participant or moderator of the voting.
     """
-    event = crud.event.get(db, id=event_id)
-    if not event:
+    roles = crud.event.get_roles(db, event_id=event_id, user_id=current_user.id)
+    if roles is None:
         raise HTTPException(status_code=404, detail="Event not found")
 
-    can_view_options = can_user_view_poll_info(current_user.id, event)
+    can_view_options = can_user_view_poll_info(roles)
     if can_view_options is False:
         if not crud.user.is_superuser(current_user):
             raise HTTPException(status_code=400, detail="Not enough permissions")
 
-    answer_options = crud.answer_option.get_multi_by_event(db=db, event_id=event_id)
-    return answer_options
+    answer_options = crud.answer_option.get_multi_by_event(
+        db=db,
+        event_id=event_id,
+        limit=limit,
+        after=after,
+        plan=crud.answer_option.load_plan(schemas.AnswerOption),
+    )
+    return add_next_cursor(answer_options, response, items=answer_options, limit=limit)
 
 
 @router.post("/", response_model=schemas.AnswerOption)
@@ -64,8 +82,8 @@ def create_option(
     if not poll:
         raise HTTPException(status_code=404, detail="Poll not found")
 
-    event = crud.event.get(db, id=poll.event_id)
-    if can_user_manage_voting(current_user.id, event) is False:
+    roles = crud.event.get_roles(db, event_id=poll.event_id, user_id=current_user.id)
+    if can_user_manage_voting(roles) is False:
         if not crud.user.is_superuser(current_user):
             raise HTTPException(status_code=400, detail="Not enough permissions")
 
@@ -96,8 +114,8 @@ def update_option(
         raise HTTPException(status_code=404, detail="Answer option not found")
 
     poll = crud.poll.get(db, id=option_in.poll_id)
-    event = crud.event.get(db, id=poll.event_id)
-    if can_user_manage_voting(current_user.id, event) is False:
+    roles = crud.event.get_roles(db, event_id=poll.event_id, user_id=current_user.id)
+    if can_user_manage_voting(roles) is False:
         if not crud.user.is_superuser(current_user):
             raise HTTPException(status_code=400, detail="Not enough permissions")
 
@@ -121,8 +139,8 @@ def delete_answer_option(
     if not answer_option:
         raise HTTPException(status_code=404, detail="Answer option not found")
     poll = crud.poll.get(db, id=answer_option.poll_id)
-    event = crud.event.get(db, id=poll.event_id)
-    if can_user_manage_voting(current_user.id, event) is False:
+    roles = crud.event.get_roles(db, event_id=poll.event_id, user_id=current_user.id)
+    if can_user_manage_voting(roles) is False:
         if not crud.user.is_superuser(current_user):
             raise HTTPException(status_code=400, detail="Not enough permissions")
 
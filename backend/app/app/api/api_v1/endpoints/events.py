@@ -1,35 +1,58 @@
-from typing import Any, List
+from typing import Any, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Path
+from fastapi import APIRouter, Depends, HTTPException, Path, Response
 from sqlalchemy.orm import Session
 
 from app import crud, models, schemas
 from app.api import deps
+from app.api.fields import FieldSelector, select_fields
+from app.api.pagination import add_next_cursor, get_after
+from app.core.broadcast import event_topic, publish
+from app.core.security import (
+    can_user_manage_access,
+    can_user_view_members,
+    can_user_view_poll_info,
+)
 from app.utils import ModeratorType
 
 router = APIRouter()
 
 
-@router.get("/", response_model=List[schemas.Event])
+@router.get("/", response_model=List[schemas.EventSummary])
 def read_events(
+    response: Response,
     db: Session = Depends(deps.get_db),
     skip: int = 0,
     limit: int = 100,
+    after: Optional[int] = Depends(get_after),
+    fields: Optional[List[str]] = Depends(FieldSelector(schemas.EventSummary)),
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Retrieve events.
     """
     if crud.user.is_superuser(current_user):
-        events = crud.event.get_multi(db, skip=skip, limit=limit)
+        events = crud.event.get_multi_summaries(
+            db, skip=skip, limit=limit, after=after, fields=fields
+        )
     else:
-        events = crud.event.get_multi_by_owner(
-            db=db, owner_id=current_user.id, skip=skip, limit=limit
+        events = crud.event.get_multi_summaries(
+            db=db,
+            owner_id=current_user.id,
+            skip=skip,
+            limit=limit,
+            after=after,
+            fields=fields,
         )
-    return events
+    return add_next_cursor(
+        select_fields(events, schemas.EventSummary, fields),
+        response,
+        items=events,
+        limit=limit,
+    )
 
 
-@router.post("/", response_model=schemas.Event)
+@router.post("/", response_model=schemas.EventSummary)
 def create_event(
     *,
     db: Session = Depends(deps.get_db),
@@ -42,10 +65,10 @@ def create_event(
     event = crud.event.create_with_owner(
         db=db, obj_in=event_in, owner_id=current_user.id
     )
-    return event
+    return crud.event.get_summary(db=db, id=event.id)
 
 
-@router.put("/{event_id}/{user_id}", response_model=schemas.Event)
+@router.put("/{event_id}/{user_id}", response_model=schemas.EventSummary)
 def add_participant_to_event(
     *,
     db: Session = Depends(deps.get_db),
@@ -69,15 +92,59 @@ def add_participant_to_event(
         else:
             raise HTTPException(status_code=400, detail="Not enough permissions")
 
-    event = crud.event.add_participant_to_event(db=db, event_id=event_id, user=user)
+    crud.event.add_participant_to_event(db=db, event_id=event_id, user=user)
     access_log = schemas.AccessLogCreate(
         event_id=event_id, given_by_id=current_user.id, received_id=user_id
     )
     crud.access_log.create(db, obj_in=access_log)
-    return event
+    participants = crud.event.count_participants(db=db, event_id=event_id)
+    publish(event_topic(event_id), state={"participants": participants})
+    return crud.event.get_summary(db=db, id=event_id)
+
+
+@router.post("/{event_id}/participants", response_model=schemas.EventParticipantsAdded)
+def add_participants_to_event(
+    *,
+    db: Session = Depends(deps.get_db),
+    event_id: int,
+    participants_in: schemas.EventParticipantsAdd,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Add participants to an event at once: the users with the given ids or every
+    user of an academic group. Users that are participants already are skipped.
+    """
+    roles = crud.event.get_roles(db, event_id=event_id, user_id=current_user.id)
+    if roles is None:
+        raise HTTPException(status_code=404, detail="event not found")
+    if not crud.user.is_superuser(current_user) and not can_user_manage_access(roles):
+        raise HTTPException(status_code=400, detail="Not enough permissions")
+
+    found, added = crud.event.add_participants(
+        db,
+        event_id=event_id,
+        given_by_id=current_user.id,
+        user_ids=participants_in.user_ids,
+        academic_group=participants_in.academic_group,
+    )
+    participants = crud.event.count_participants(db=db, event_id=event_id)
+    if added:
+        publish(event_topic(event_id), state={"participants": participants})
+    return schemas.EventParticipantsAdded(
+        added=added,
+        already_participants=found - added,
+        not_found=(
+            len(set(participants_in.user_ids)) - found
+            if participants_in.user_ids is not None
+            else 0
+        ),
+        participants=participants,
+    )
 
 
-@router.put("/mod/{moderator_type}/{event_id}/{user_id}", response_model=schemas.Event)
+@router.put(
+    "/mod/{moderator_type}/{event_id}/{user_id}", response_model=schemas.EventSummary
+)
 def add_moderator_to_event(
     *,
     db: Session = Depends(deps.get_db),
@@ -105,15 +172,15 @@ def add_moderator_to_event(
 
     if moderator_type == ModeratorType.ACCESS:
         mod_type = ModeratorType(ModeratorType.ACCESS)
-        for user in event.access_moderators:
-            if user.id == user_id:
+        for moderator in event.access_moderators:
+            if moderator.id == user_id:
                 raise HTTPException(
                     status_code=400, detail="user is already a moderator"
                 )
     elif moderator_type == ModeratorType.VOTING:
         mod_type = ModeratorType(ModeratorType.VOTING)
-        for user in event.voting_moderators:
-            if user.id == user_id:
+        for moderator in event.voting_moderators:
+            if moderator.id == user_id:
                 raise HTTPException(
                     status_code=400, detail="user is already a moderator"
                 )
@@ -122,13 +189,13 @@ def add_moderator_to_event(
             status_code=400, detail="moderator type is specified incorrectly"
         )
 
-    event = crud.event.add_moderator_to_event(
+    crud.event.add_moderator_to_event(
         db=db, event_id=event_id, user=user, moderator_type=mod_type
     )
-    return event
+    return crud.event.get_summary(db=db, id=event_id)
 
 
-@router.put("/{id}", response_model=schemas.Event)
+@router.put("/{id}", response_model=schemas.EventSummary)
 def update_event(
     *,
     db: Session = Depends(deps.get_db),
@@ -144,26 +211,113 @@ def update_event(
         raise HTTPException(status_code=404, detail="event not found")
     if not crud.user.is_superuser(current_user) and (event.owner_id != current_user.id):
         raise HTTPException(status_code=400, detail="Not enough permissions")
-    event = crud.event.update(db=db, db_obj=event, obj_in=event_in)
-    return event
+    crud.event.update(db=db, db_obj=event, obj_in=event_in)
+    return crud.event.get_summary(db=db, id=id)
 
 
-@router.get("/{id}", response_model=schemas.Event)
+@router.get("/{id}", response_model=schemas.EventSummary)
 def read_event(
     *,
     db: Session = Depends(deps.get_db),
     id: int,
+    fields: Optional[List[str]] = Depends(FieldSelector(schemas.EventSummary)),
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
-    Get event by ID.
+    Get event by ID, with the number of participants, moderators and polls.
     """
-    event = crud.event.get(db=db, id=id)
+    event = crud.event.get_summary(db=db, id=id, fields=fields)
     if not event:
         raise HTTPException(status_code=404, detail="event not found")
     if not crud.user.is_superuser(current_user) and (event.owner_id != current_user.id):
         raise HTTPException(status_code=400, detail="Not enough permissions")
-    return event
+    return select_fields(event, schemas.EventSummary, fields)
+
+
+@router.get("/{event_id}/participants", response_model=List[schemas.User])
+def read_event_participants(
+    *,
+    db: Session = Depends(deps.get_db),
+    response: Response,
+    event_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[int] = Depends(get_after),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Retrieve the participants of an event.
+    """
+    roles = crud.event.get_roles(db=db, event_id=event_id, user_id=current_user.id)
+    if roles is None:
+        raise HTTPException(status_code=404, detail="event not found")
+    if can_user_view_members(roles) is False:
+        if not crud.user.is_superuser(current_user):
+            raise HTTPException(status_code=400, detail="Not enough permissions")
+    participants = crud.event.get_participants(
+        db, event_id=event_id, skip=skip, limit=limit, after=after
+    )
+    return add_next_cursor(participants, response, items=participants, limit=limit)
+
+
+@router.get(
+    "/{event_id}/moderators/{moderator_type}", response_model=List[schemas.User]
+)
+def read_event_moderators(
+    *,
+    db: Session = Depends(deps.get_db),
+    event_id: int,
+    moderator_type: ModeratorType,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[int] = Depends(get_after),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Retrieve the access or voting moderators of an event.
+    """
+    roles = crud.event.get_roles(db=db, event_id=event_id, user_id=current_user.id)
+    if roles is None:
+        raise HTTPException(status_code=404, detail="event not found")
+    if can_user_view_members(roles) is False:
+        if not crud.user.is_superuser(current_user):
+            raise HTTPException(status_code=400, detail="Not enough permissions")
+    moderators = crud.event.get_moderators(
+        db,
+        event_id=event_id,
+        moderator_type=moderator_type,
+        skip=skip,
+        limit=limit,
+        after=after,
+    )
+    return add_next_cursor(moderators, response, items=moderators, limit=limit)
+
+
+@router.get("/{event_id}/polls", response_model=List[schemas.PollSummary])
+def read_event_polls(
+    *,
+    db: Session = Depends(deps.get_db),
+    response: Response,
+    event_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[int] = Depends(get_after),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Retrieve the polls of an event, without their owners.
+    """
+    roles = crud.event.get_roles(db=db, event_id=event_id, user_id=current_user.id)
+    if roles is None:
+        raise HTTPException(status_code=404, detail="event not found")
+    if can_user_view_poll_info(roles) is False:
+        if not crud.user.is_superuser(current_user):
+            raise HTTPException(status_code=400, detail="Not enough permissions")
+    polls = crud.poll.get_multi_by_event(
+        db, event_id=event_id, skip=skip, limit=limit, after=after
+    )
+    return add_next_cursor(polls, response, items=polls, limit=limit)
 
 
 # @router.delete("/{id}", response_model=schemas.Event)
@@ -1,31 +1,34 @@
-from typing import Any, List
+from typing import Any, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 
 from app import crud, models, schemas
 from app.api import deps
+from app.api.pagination import add_next_cursor, get_after
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[schemas.Item])
 def read_items(
+    response: Response,
     db: Session = Depends(deps.get_db),
     skip: int = 0,
     limit: int = 100,
+    after: Optional[int] = Depends(get_after),
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Retrieve items.
     """
     if crud.user.is_superuser(current_user):
-        items = crud.item.get_multi(db, skip=skip, limit=limit)
+        items = crud.item.get_multi(db, skip=skip, limit=limit, after=after)
     else:
         items = crud.item.get_multi_by_owner(
-            db=db, owner_id=current_user.id, skip=skip, limit=limit
+            db=db, owner_id=current_user.id, skip=skip, limit=limit, after=after
         )
-    return items
+    return add_next_cursor(items, response, items=items, limit=limit)
 
 
 @router.post("/", response_model=schemas.Item)
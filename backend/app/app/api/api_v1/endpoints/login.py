@@ -1,15 +1,17 @@
 from datetime import timedelta
-from typing import Any
+from typing import Any, Union
 
 from fastapi import APIRouter, Body, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app import crud, models, schemas
 from app.api import deps
 from app.core import security
 from app.core.config import settings
-from app.core.security import get_password_hash
+from app.core.password_hasher import password_hasher
 from app.utils import (
     generate_password_reset_token,
     send_reset_password_email,
@@ -19,13 +21,7 @@ from app.utils import (
 router = APIRouter()
 
 
-@router.post("/login/access-token", response_model=schemas.Token)
-def login_access_token(
-    db: Session = Depends(deps.get_db), form_data: OAuth2PasswordRequestForm = Depends()
-) -> Any:
-    """
-    OAuth2 compatible token login, get an access token for future requests
-    """
+def login_access_token_sync(db: Session, form_data: OAuth2PasswordRequestForm) -> Any:
     user = crud.user.authenticate(
         db, email=form_data.username, password=form_data.password
     )
@@ -42,6 +38,68 @@ def login_access_token(
     }
 
 
+async def login_access_token_async(
+    db: AsyncSession, form_data: OAuth2PasswordRequestForm
+) -> Any:
+    user = await crud.async_user.authenticate(
+        db, email=form_data.username, password=form_data.password
+    )
+    if not user:
+        raise HTTPException(status_code=400, detail="Incorrect email or password")
+    elif not crud.async_user.is_active(user):
+        raise HTTPException(status_code=400, detail="Inactive user")
+    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    return {
+        "access_token": security.create_access_token(
+            user.id, expires_delta=access_token_expires
+        ),
+        "token_type": "bearer",
+    }
+
+
+@router.post("/login/access-token", response_model=schemas.Token)
+async def login_access_token(
+    db: Union[Session, AsyncSession] = Depends(deps.get_endpoint_db),
+    form_data: OAuth2PasswordRequestForm = Depends(),
+) -> Any:
+    """
+    OAuth2 compatible token login, get an access token for future requests
+    """
+    if isinstance(db, AsyncSession):
+        return await login_access_token_async(db, form_data)
+    return await run_in_threadpool(login_access_token_sync, db, form_data)
+
+
+@router.post("/login/event-token/{event_id}", response_model=schemas.Token)
+def login_event_token(
+    event_id: int,
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Get an access token that carries your roles in the event. Voting and
+    result reads of the event are authorized from it without a database
+    lookup until the members of the event change, get a new one then.
+    """
+    # Read first: a change in between gives new roles with the old version,
+    # which is rejected, instead of old roles with the new version
+    version = crud.event.get_roles_version(db, event_id=event_id)
+    roles = crud.event.get_roles(db, event_id=event_id, user_id=current_user.id)
+    if version is None or roles is None:
+        raise HTTPException(status_code=404, detail="Event not found")
+    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    return {
+        "access_token": security.create_event_token(
+            current_user.id,
+            event_id=event_id,
+            roles=roles,
+            version=version,
+            expires_delta=access_token_expires,
+        ),
+        "token_type": "bearer",
+    }
+
+
 @router.post("/login/test-token", response_model=schemas.User)
 def test_token(current_user: models.User = Depends(deps.get_current_user)) -> Any:
     """
@@ -89,7 +147,7 @@ def reset_password(
         )
     elif not crud.user.is_active(user):
         raise HTTPException(status_code=400, detail="Inactive user")
-    hashed_password = get_password_hash(new_password)
+    hashed_password = password_hasher.hash(new_password)
     user.hashed_password = hashed_password
     db.add(user)
     db.commit()
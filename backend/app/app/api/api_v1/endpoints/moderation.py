@@ -0,0 +1,259 @@
+import asyncio
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+from starlette.websockets import WebSocketState
+
+from app import crud, models, schemas
+from app.api import deps
+from app.api.api_v1.endpoints.polls import update_poll_state
+from app.core.broadcast import (
+    ShardCounts,
+    Subscription,
+    broadcaster,
+    event_topic,
+    poll_topic,
+)
+from app.core.security import can_user_manage_voting
+from app.db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+def with_session(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    # A WebSocket lives for the whole event, every database call gets its own
+    # short session instead of holding a pooled connection
+    db = SessionLocal()
+    try:
+        return func(db, *args, **kwargs)
+    finally:
+        db.close()
+
+
+def get_moderator(db: Session, *, token: str, event_id: int) -> deps.CurrentUser:
+    user = deps.get_user_by_token(db, token)
+    if not crud.user.is_active(user):
+        raise HTTPException(status_code=400, detail="Inactive user")
+
+    roles = crud.event.get_roles(db=db, event_id=event_id, user_id=user.id)
+    if roles is None:
+        raise HTTPException(status_code=404, detail="Event not found")
+
+    if can_user_manage_voting(roles) is False:
+        if not crud.user.is_superuser(user):
+            raise HTTPException(status_code=400, detail="Not enough permissions")
+    return user
+
+
+def get_event_snapshot(
+    db: Session, *, event_id: int
+) -> Tuple[Dict[str, Any], ShardCounts]:
+    polls = crud.poll.get_multi_by_event(db=db, event_id=event_id, limit=None)
+    # The tallies of every poll in one statement, consistent with each other
+    shards = crud.answer_tally.get_shards(db=db, poll_ids=[poll.id for poll in polls])
+    results: Dict[int, Dict[int, int]] = {poll.id: {} for poll in polls}
+    for option in crud.answer_tally.sum_shards(shards):
+        results[option["poll_id"]][option["answer_option_id"]] = option["votes"]
+    snapshot = {
+        "type": "snapshot",
+        "event_id": event_id,
+        "participants": crud.event.count_participants(db=db, event_id=event_id),
+        "polls": [
+            {
+                "id": poll.id,
+                "question": poll.question,
+                "is_running": poll.is_running,
+                "stop_at": poll.stop_at,
+                "results": results[poll.id],
+                # Every voter has exactly one answer per poll
+                "voters": sum(results[poll.id].values()),
+            }
+            for poll in polls
+        ],
+    }
+    return snapshot, ShardCounts(shards)
+
+
+def change_poll_state(
+    db: Session, *, event_id: int, poll_id: int, poll_in: schemas.PollUpdate
+) -> models.Poll:
+    poll = crud.poll.get(db=db, id=poll_id)
+    if not poll or poll.event_id != event_id:
+        raise HTTPException(status_code=404, detail="Poll not found")
+    return update_poll_state(db, poll=poll, poll_in=poll_in)
+
+
+def get_token(websocket: WebSocket) -> Optional[str]:
+    token = websocket.query_params.get("token")
+    if token:
+        return token
+    scheme, _, credentials = websocket.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and credentials:
+        return credentials
+    return None
+
+
+async def send_snapshot(
+    websocket: WebSocket, subscription: Subscription, event_id: int
+) -> Tuple[Dict[int, int], ShardCounts]:
+    snapshot, shards = await run_in_threadpool(
+        with_session, get_event_snapshot, event_id=event_id
+    )
+    for poll in snapshot["polls"]:
+        subscription.add_topic(poll_topic(poll["id"]))
+    await websocket.send_json(jsonable_encoder(snapshot))
+    return {poll["id"]: poll["voters"] for poll in snapshot["polls"]}, shards
+
+
+async def forward_updates(
+    websocket: WebSocket,
+    subscription: Subscription,
+    event_id: int,
+    voters: Dict[int, int],
+    shards: ShardCounts,
+) -> None:
+    event_key = event_topic(event_id)
+    while True:
+        topic, frame = await subscription.get()
+        if frame.resync:
+            voters, shards = await send_snapshot(websocket, subscription, event_id)
+            continue
+        if topic == event_key:
+            if frame.state.get("polls_changed"):
+                voters, shards = await send_snapshot(websocket, subscription, event_id)
+            elif "participants" in frame.state:
+                await websocket.send_json(
+                    {"type": "turnout", "participants": frame.state["participants"]}
+                )
+            continue
+
+        poll_id = int(topic.split(":", 1)[1])
+        if frame.state:
+            await websocket.send_json(
+                {"type": "poll_state", "poll_id": poll_id, **frame.state}
+            )
+        deltas = shards.apply(frame)
+        if deltas:
+            voters[poll_id] = voters.get(poll_id, 0) + sum(deltas.values())
+            await websocket.send_json(
+                {
+                    "type": "tally",
+                    "poll_id": poll_id,
+                    "deltas": deltas,
+                    "voters": voters[poll_id],
+                }
+            )
+
+
+def log_forwarder_failure(task: "asyncio.Task[None]") -> None:
+    if task.cancelled():
+        return
+    exc = task.exception()
+    if exc is not None:
+        logger.error("Forwarding live updates failed", exc_info=exc)
+
+
+async def receive_commands(websocket: WebSocket, event_id: int) -> None:
+    while True:
+        message = await websocket.receive_json()
+        if not isinstance(message, dict):
+            await websocket.send_json({"type": "error", "detail": "Invalid command"})
+            continue
+        await handle_command(websocket, event_id, message)
+
+
+async def handle_command(
+    websocket: WebSocket, event_id: int, message: Dict[str, Any]
+) -> None:
+    action = message.get("action")
+    if action not in ("start_poll", "stop_poll"):
+        await websocket.send_json({"type": "error", "detail": "Unknown action"})
+        return
+    try:
+        poll_in = schemas.PollUpdate(
+            is_running=action == "start_poll", stop_at=message.get("stop_at")
+        )
+        poll = await run_in_threadpool(
+            with_session,
+            change_poll_state,
+            event_id=event_id,
+            poll_id=int(message.get("poll_id")),
+            poll_in=poll_in,
+        )
+    except (ValidationError, TypeError, ValueError):
+        await websocket.send_json({"type": "error", "detail": "Invalid command"})
+        return
+    except HTTPException as exc:
+        await websocket.send_json({"type": "error", "detail": exc.detail})
+        return
+    await websocket.send_json(
+        jsonable_encoder(
+            {
+                "type": "ack",
+                "action": action,
+                "poll_id": poll.id,
+                "is_running": poll.is_running,
+                "stop_at": poll.stop_at,
+            }
+        )
+    )
+
+
+@router.websocket("/{event_id}/ws")
+async def moderate_event(websocket: WebSocket, event_id: int) -> None:
+    """
+    Live dashboard of an event for its voting moderators. Pass the access token
+    as the `token` query parameter or in the `Authorization` header.
+
+    The server sends a `snapshot` with the vote counts of every poll of the
+    event, followed by `tally` (vote count changes of a poll), `poll_state` and
+    `turnout` messages, coalesced to one per topic in `LIVE_RESULTS_INTERVAL_MS`.
+    A new `snapshot` is sent when polls are added or updates were lost.
+
+    The client may send `{"action": "start_poll", "poll_id": ..., "stop_at": ...}`
+    and `{"action": "stop_poll", "poll_id": ...}`, answered with `ack` or `error`.
+    """
+    token = get_token(websocket)
+    if not token:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    try:
+        await run_in_threadpool(
+            with_session, get_moderator, token=token, event_id=event_id
+        )
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    # Subscribe before reading the snapshot so that no committed vote is missed
+    subscription = broadcaster.subscribe(event_topic(event_id))
+    tasks: List["asyncio.Task[None]"] = []
+    try:
+        await websocket.accept()
+        # Votes the snapshot already counted are left out of the tallies
+        voters, shards = await send_snapshot(websocket, subscription, event_id)
+        forwarder = asyncio.create_task(
+            forward_updates(websocket, subscription, event_id, voters, shards)
+        )
+        forwarder.add_done_callback(log_forwarder_failure)
+        commands = asyncio.create_task(receive_commands(websocket, event_id))
+        tasks = [forwarder, commands]
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        if commands.done():
+            await commands
+        elif websocket.client_state == WebSocketState.CONNECTED:
+            # Without updates the dashboard would go stale, let it reconnect
+            await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
+    except (WebSocketDisconnect, ValueError):
+        pass
+    finally:
+        for task in tasks:
+            task.cancel()
+        subscription.close()
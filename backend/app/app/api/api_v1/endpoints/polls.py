@@ -1,56 +1,105 @@
-from typing import Any, List
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app import crud, models, schemas
 from app.api import deps
+from app.api.fields import FieldSelector, select_fields
+from app.api.pagination import add_next_cursor, get_after
+from app.core.broadcast import (
+    ShardCounts,
+    Subscription,
+    broadcaster,
+    event_topic,
+    poll_topic,
+    publish,
+)
 from app.core.security import can_user_manage_voting, can_user_view_poll_info
+from app.db.session import SessionLocal
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[schemas.Poll])
 def read_polls(
+    response: Response,
     db: Session = Depends(deps.get_db),
+    is_running: Optional[bool] = None,
     skip: int = 0,
     limit: int = 100,
+    after: Optional[int] = Depends(get_after),
+    fields: Optional[List[str]] = Depends(FieldSelector(schemas.Poll)),
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Retrieve polls.
     """
+    plan = crud.poll.load_plan(schemas.Poll, fields)
     if crud.user.is_superuser(current_user):
-        polls = crud.poll.get_multi(db, skip=skip, limit=limit)
+        polls = crud.poll.get_multi(
+            db,
+            skip=skip,
+            limit=limit,
+            after=after,
+            filters={"is_running": is_running},
+            plan=plan,
+        )
     else:
         polls = crud.poll.get_multi_by_owner(
-            db=db, owner_id=current_user.id, skip=skip, limit=limit
+            db=db,
+            owner_id=current_user.id,
+            is_running=is_running,
+            skip=skip,
+            limit=limit,
+            after=after,
+            plan=plan,
         )
 
-    return polls
+    return add_next_cursor(
+        select_fields(polls, schemas.Poll, fields), response, items=polls, limit=limit
+    )
 
 
 @router.get("/{event_id}", response_model=List[schemas.Poll])
 def read_polls_by_event(
     event_id: int,
+    response: Response,
     db: Session = Depends(deps.get_db),
+    is_running: Optional[bool] = None,
+    limit: int = 100,
+    after: Optional[int] = Depends(get_after),
+    fields: Optional[List[str]] = Depends(FieldSelector(schemas.Poll)),
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Retrieve polls by event id.
     """
-    event = crud.event.get(db=db, id=event_id)
-    if not event:
+    roles = crud.event.get_roles(db=db, event_id=event_id, user_id=current_user.id)
+    if roles is None:
         raise HTTPException(status_code=404, detail="Event not found")
 
-    if can_user_view_poll_info(current_user.id) is False:
+    if can_user_view_poll_info(roles) is False:
         if not crud.user.is_superuser(current_user):
             raise HTTPException(status_code=400, detail="Not enough permissions")
 
     polls = crud.poll.get_multi_by_event(
-        db=db, owner_id=current_user.id, event_id=event_id
+        db=db,
+        event_id=event_id,
+        is_running=is_running,
+        limit=limit,
+        after=after,
+        plan=crud.poll.load_plan(schemas.Poll, fields),
+    )
+    return add_next_cursor(
+        select_fields(polls, schemas.Poll, fields), response, items=polls, limit=limit
     )
-    return polls
 
 
 @router.post("/", response_model=schemas.Poll)
@@ -63,15 +112,18 @@ def create_poll(
     """
     Create new poll.
     """
-    event = crud.event.get(db=db, id=poll_in.event_id)
-    if not event:
+    roles = crud.event.get_roles(
+        db=db, event_id=poll_in.event_id, user_id=current_user.id
+    )
+    if roles is None:
         raise HTTPException(status_code=404, detail="Event not found")
 
-    if can_user_manage_voting(current_user.id, event) is False:
+    if can_user_manage_voting(roles) is False:
         if not crud.user.is_superuser(current_user):
             raise HTTPException(status_code=400, detail="Not enough permissions")
 
     poll = crud.poll.create_with_owner(db=db, obj_in=poll_in, owner_id=current_user.id)
+    publish(event_topic(poll.event_id), state={"polls_changed": True})
     return poll
 
 
@@ -90,8 +142,8 @@ def change_poll_question(
     if not poll:
         raise HTTPException(status_code=404, detail="Poll not found")
 
-    event = crud.event.get(db=db, id=poll.event_id)
-    if can_user_manage_voting(current_user.id, event):
+    roles = crud.event.get_roles(db=db, event_id=poll.event_id, user_id=current_user.id)
+    if can_user_manage_voting(roles) is False:
         if not crud.user.is_superuser(current_user):
             raise HTTPException(status_code=400, detail="Not enough permissions")
 
@@ -99,6 +151,16 @@ def change_poll_question(
     return poll
 
 
+def update_poll_state(
+    db: Session, *, poll: models.Poll, poll_in: schemas.PollUpdate
+) -> models.Poll:
+    was_running = poll.is_running
+    poll = crud.poll.update(db=db, db_obj=poll, obj_in=poll_in)
+    if poll.is_running != was_running:
+        publish(poll_topic(poll.id), state={"is_running": poll.is_running})
+    return poll
+
+
 @router.put("/{id}", response_model=schemas.Poll)
 def update_poll(
     *,
@@ -114,32 +176,212 @@ def update_poll(
     if not poll:
         raise HTTPException(status_code=404, detail="Poll not found")
 
-    event = crud.event.get(db=db, id=poll.event_id)
-    if can_user_manage_voting(current_user.id, event) is False:
+    roles = crud.event.get_roles(db=db, event_id=poll.event_id, user_id=current_user.id)
+    if can_user_manage_voting(roles) is False:
+        if not crud.user.is_superuser(current_user):
+            raise HTTPException(status_code=400, detail="Not enough permissions")
+
+    return update_poll_state(db, poll=poll, poll_in=poll_in)
+
+
+def read_poll_sync(db: Session, *, id: int, current_user: models.User) -> Any:
+    poll = crud.poll.get(db=db, id=id)
+    if not poll:
+        raise HTTPException(status_code=404, detail="Poll not found")
+
+    roles = crud.event.get_roles(db=db, event_id=poll.event_id, user_id=current_user.id)
+    if can_user_view_poll_info(roles) is False:
         if not crud.user.is_superuser(current_user):
             raise HTTPException(status_code=400, detail="Not enough permissions")
 
-    poll = crud.poll.update(db=db, db_obj=poll, obj_in=poll_in)
+    return poll
+
+
+async def read_poll_async(
+    db: AsyncSession, *, id: int, current_user: models.User
+) -> Any:
+    poll = await crud.async_poll.get(db=db, id=id)
+    if not poll:
+        raise HTTPException(status_code=404, detail="Poll not found")
+
+    roles = await crud.async_event.get_roles(
+        db=db, event_id=poll.event_id, user_id=current_user.id
+    )
+    if can_user_view_poll_info(roles) is False:
+        if not crud.async_user.is_superuser(current_user):
+            raise HTTPException(status_code=400, detail="Not enough permissions")
+
     return poll
 
 
 @router.get("/{id}", response_model=schemas.Poll)
-def read_poll(
+async def read_poll(
     *,
-    db: Session = Depends(deps.get_db),
+    db: Union[Session, AsyncSession] = Depends(deps.get_endpoint_db),
     id: int,
-    current_user: models.User = Depends(deps.get_current_active_user),
+    current_user: models.User = Depends(deps.get_endpoint_current_active_user),
 ) -> Any:
     """
     Get poll by ID.
     """
+    if isinstance(db, AsyncSession):
+        return await read_poll_async(db, id=id, current_user=current_user)
+    return await run_in_threadpool(read_poll_sync, db, id=id, current_user=current_user)
+
+
+def check_poll_results_access(
+    db: Session, *, id: int, user: models.User, token_data: schemas.TokenPayload
+) -> models.Poll:
     poll = crud.poll.get(db=db, id=id)
     if not poll:
         raise HTTPException(status_code=404, detail="Poll not found")
 
-    event = crud.event.get(db=db, id=poll.event_id)
-    if can_user_view_poll_info(current_user.id, event) is False:
-        if not crud.user.is_superuser(current_user):
+    roles = deps.get_event_roles(
+        db, token_data=token_data, event_id=poll.event_id, user_id=user.id
+    )
+    if can_user_view_poll_info(roles) is False:
+        if not crud.user.is_superuser(user):
             raise HTTPException(status_code=400, detail="Not enough permissions")
-
     return poll
+
+
+def get_poll_results(
+    db: Session, *, id: int, user: models.User, token_data: schemas.TokenPayload
+) -> Dict[str, Any]:
+    poll = check_poll_results_access(db, id=id, user=user, token_data=token_data)
+    options = crud.answer_tally.get_multi_by_poll(db=db, poll_id=id)
+    return {
+        "poll_id": poll.id,
+        "is_running": poll.is_running,
+        "total": sum(option.votes for option in options),
+        "options": options,
+    }
+
+
+def get_live_poll_results(
+    db: Session, *, id: int
+) -> Tuple[schemas.PollResults, ShardCounts]:
+    """
+    Results of a poll summed from its tally shards, and the shards to apply the
+    frames of the live results to.
+    """
+    poll = crud.poll.get(db=db, id=id)
+    if not poll:
+        raise HTTPException(status_code=404, detail="Poll not found")
+    shards = crud.answer_tally.get_shards(db=db, poll_ids=[id])
+    options = crud.answer_tally.sum_shards(shards)
+    results = schemas.PollResults(
+        poll_id=poll.id,
+        is_running=poll.is_running,
+        total=sum(option["votes"] for option in options),
+        options=options,
+    )
+    return results, ShardCounts(shards)
+
+
+def open_live_poll_results(
+    db: Session, *, id: int, user: models.User, token_data: schemas.TokenPayload
+) -> Tuple[schemas.PollResults, ShardCounts]:
+    check_poll_results_access(db, id=id, user=user, token_data=token_data)
+    return get_live_poll_results(db, id=id)
+
+
+def reload_live_poll_results(id: int) -> Tuple[schemas.PollResults, ShardCounts]:
+    # The stream does not hold a session between events
+    db = SessionLocal()
+    try:
+        return get_live_poll_results(db, id=id)
+    finally:
+        db.close()
+
+
+@router.get("/{id}/results", response_model=schemas.PollResults)
+def read_poll_results(
+    *,
+    db: Session = Depends(deps.get_db),
+    id: int,
+    current_user: models.User = Depends(deps.get_current_active_user),
+    token_data: schemas.TokenPayload = Depends(deps.get_token_data),
+) -> Any:
+    """
+    Get the number of votes for every answer option of the poll.
+    """
+    return get_poll_results(db, id=id, user=current_user, token_data=token_data)
+
+
+def server_sent_event(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+
+async def poll_results_events(
+    request: Request,
+    subscription: Subscription,
+    results: schemas.PollResults,
+    shards: ShardCounts,
+) -> AsyncIterator[str]:
+    try:
+        yield server_sent_event("snapshot", results)
+        while not await request.is_disconnected():
+            try:
+                _, frame = await asyncio.wait_for(subscription.get(), timeout=15)
+            except asyncio.TimeoutError:
+                # Keeps proxies from closing an idle connection
+                yield ": keep-alive\n\n"
+                continue
+            if frame.resync:
+                try:
+                    results, shards = await run_in_threadpool(
+                        reload_live_poll_results, results.poll_id
+                    )
+                except HTTPException:
+                    return
+                yield server_sent_event("snapshot", results)
+                continue
+            if frame.state:
+                yield server_sent_event("state", frame.state)
+            deltas = shards.apply(frame)
+            if deltas:
+                yield server_sent_event("delta", deltas)
+    finally:
+        subscription.close()
+
+
+@router.get("/{id}/results/stream")
+async def stream_poll_results(
+    *,
+    request: Request,
+    db: Session = Depends(deps.get_db),
+    id: int,
+    current_user: models.User = Depends(deps.get_current_active_user),
+    token_data: schemas.TokenPayload = Depends(deps.get_token_data),
+) -> Any:
+    """
+    Stream live poll results as Server-Sent Events. The first `snapshot` event
+    holds the current results, `delta` events map answer option ids to the change
+    of their vote counts and `state` events are sent when the poll is started or
+    stopped. Updates are coalesced to one frame per poll in
+    `LIVE_RESULTS_INTERVAL_MS`. When updates were lost a new `snapshot` event
+    replaces the results.
+    """
+    # Subscribe before reading the snapshot so that no committed vote is
+    # missed; votes the snapshot already counted are left out of the deltas
+    subscription = broadcaster.subscribe(poll_topic(id))
+    try:
+        results, shards = await run_in_threadpool(
+            open_live_poll_results,
+            db,
+            id=id,
+            user=current_user,
+            token_data=token_data,
+        )
+    except Exception:
+        subscription.close()
+        raise
+    finally:
+        # Do not hold a pooled connection for the lifetime of the stream
+        await run_in_threadpool(db.close)
+    return StreamingResponse(
+        poll_results_events(request, subscription, results, shards),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
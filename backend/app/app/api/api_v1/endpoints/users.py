@@ -1,14 +1,18 @@
-from typing import Any, List
+from typing import Any, List, Optional
 
-import requests
-from fastapi import APIRouter, Body, Depends, HTTPException
+from fastapi import APIRouter, Body, Depends, File, HTTPException, Response, UploadFile
+from fastapi.concurrency import run_in_threadpool
 from fastapi.encoders import jsonable_encoder
 from pydantic.networks import EmailStr
 from sqlalchemy.orm import Session
 
 from app import crud, models, schemas
 from app.api import deps
+from app.api.fields import FieldSelector, select_fields
+from app.api.pagination import add_next_cursor, get_after
 from app.core.config import settings
+from app.core.student_profiles import StudentVerificationError, student_profiles
+from app.core.user_import import UserImportError, guess_format, import_users
 from app.utils import send_new_account_email
 
 router = APIRouter()
@@ -16,16 +20,27 @@ router = APIRouter()
 
 @router.get("/", response_model=List[schemas.User])
 def read_users(
+    response: Response,
     db: Session = Depends(deps.get_db),
     skip: int = 0,
     limit: int = 100,
+    after: Optional[int] = Depends(get_after),
+    fields: Optional[List[str]] = Depends(FieldSelector(schemas.User)),
     current_user: models.User = Depends(deps.get_current_active_superuser),
 ) -> Any:
     """
     Retrieve users.
     """
-    users = crud.user.get_multi(db, skip=skip, limit=limit)
-    return users
+    users = crud.user.get_multi(
+        db,
+        skip=skip,
+        limit=limit,
+        after=after,
+        plan=crud.user.load_plan(schemas.User, fields),
+    )
+    return add_next_cursor(
+        select_fields(users, schemas.User, fields), response, items=users, limit=limit
+    )
 
 
 @router.post("/", response_model=schemas.User)
@@ -52,6 +67,27 @@ def create_user(
     return user
 
 
+@router.post("/import", response_model=schemas.UserImportReport)
+def import_users_from_file(
+    *,
+    db: Session = Depends(deps.get_db),
+    file: UploadFile = File(...),
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Create users from a CSV file with a header row or a JSONL file. The columns
+    are email, password, full_name, academic_group and is_student.
+    """
+    try:
+        file_format = guess_format(file.filename)
+        content = file.file.read().decode("utf-8-sig")
+    except UserImportError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="The file is not UTF-8 encoded")
+    return import_users(db, content, file_format=file_format)
+
+
 @router.put("/me", response_model=schemas.User)
 def update_user_me(
     *,
@@ -72,23 +108,26 @@ def update_user_me(
         user_in.full_name = full_name
     if email is not None:
         user_in.email = email
-    user = crud.user.update(db, db_obj=current_user, obj_in=user_in)
+    # The current user may be a cached snapshot
+    db_user = crud.user.get(db, id=current_user.id)
+    user = crud.user.update(db, db_obj=db_user, obj_in=user_in)
     return user
 
 
 @router.get("/me", response_model=schemas.User)
 def read_user_me(
     db: Session = Depends(deps.get_db),
+    fields: Optional[List[str]] = Depends(FieldSelector(schemas.User)),
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Get current user.
     """
-    return current_user
+    return select_fields(current_user, schemas.User, fields)
 
 
 @router.post("/register", response_model=schemas.User)
-def register_user(
+async def register_user(
     *,
     db: Session = Depends(deps.get_db),
     is_student: bool = Body(False),
@@ -104,7 +143,7 @@ def register_user(
     #         status_code=403,
     #         detail="Open user registration is forbidden on this server",
     #     )
-    user = crud.user.get_by_email(db, email=email)
+    user = await run_in_threadpool(crud.user.get_by_email, db, email=email)
     if user:
         raise HTTPException(
             status_code=400,
@@ -112,47 +151,15 @@ def register_user(
         )
 
     if is_student:
-        api_url = "https://lk.mirea.ru/local/ajax/mrest.php"
-        payload = {"action": "login", "login": email, "password": password}
-        response = requests.get(api_url, params=payload)
-        if response.status_code != 200:
-            raise HTTPException(
-                status_code=response.status_code, detail="error when trying to log in"
-            )
-        response_data = response.json()
-        if "errors" in response_data:
-            raise HTTPException(
-                status_code=400, detail=response_data["errors"][0],
-            )
-
-        token = response_data["token"]
-        profile_api_url = api_url + "?action=getData&url=https://lk.mirea.ru/profile/"
-        profile_response = requests.get(
-            profile_api_url, headers={"Authorization": token}
-        )
-        if profile_response.status_code != 200:
-            raise HTTPException(
-                status_code=response.status_code,
-                detail="error when trying to get profile data",
-            )
-        profile_response_data = profile_response.json()
-        if "errors" in profile_response_data:
-            raise HTTPException(
-                status_code=400, detail=profile_response_data["errors"][0],
-            )
-        name = profile_response_data["arUser"]["NAME"]
-        last_name = profile_response_data["arUser"]["LAST_NAME"]
-        second_name = profile_response_data["arUser"]["SECOND_NAME"]
-        student = list(profile_response_data["STUDENTS"].values())[0]
-        academic_group = student["PROPERTIES"]["ACADEMIC_GROUP"][
-            "VALUE_TEXT"
-        ]
-        full_name = f"{name} {second_name} {last_name}"
+        try:
+            profile = await student_profiles.get_profile(email=email, password=password)
+        except StudentVerificationError as exc:
+            raise HTTPException(status_code=exc.status_code, detail=exc.detail)
         user_in = schemas.UserCreate(
             password=password,
             email=email,
-            full_name=full_name,
-            academic_group=academic_group,
+            full_name=profile.full_name,
+            academic_group=profile.academic_group,
             is_student=True,
         )
     else:
@@ -160,7 +167,7 @@ def register_user(
             password=password, email=email, full_name=full_name, is_student=False
         )
 
-    user = crud.user.create(db, obj_in=user_in)
+    user = await run_in_threadpool(crud.user.create, db, obj_in=user_in)
     return user
 
 
@@ -169,18 +176,19 @@ def read_user_by_id(
     user_id: int,
     current_user: models.User = Depends(deps.get_current_active_user),
     db: Session = Depends(deps.get_db),
+    fields: Optional[List[str]] = Depends(FieldSelector(schemas.User)),
 ) -> Any:
     """
     Get a specific user by id.
     """
-    user = crud.user.get(db, id=user_id)
-    if user == current_user:
-        return user
+    user = crud.user.get(db, id=user_id, plan=crud.user.load_plan(schemas.User, fields))
+    if user and user.id == current_user.id:
+        return select_fields(user, schemas.User, fields)
     if not crud.user.is_superuser(current_user):
         raise HTTPException(
             status_code=400, detail="The user doesn't have enough privileges"
         )
-    return user
+    return select_fields(user, schemas.User, fields)
 
 
 @router.put("/{user_id}", response_model=schemas.User)
@@ -1,4 +1,4 @@
-from typing import Any
+from typing import Any, Dict
 
 from fastapi import APIRouter, Depends
 from pydantic.networks import EmailStr
@@ -6,6 +6,9 @@ from pydantic.networks import EmailStr
 from app import models, schemas
 from app.api import deps
 from app.core.celery_app import celery_app
+from app.core.password_hasher import password_hasher
+from app.core.role_cache import role_cache
+from app.crud.crud_user import user_cache
 from app.utils import send_test_email
 
 router = APIRouter()
@@ -23,6 +26,38 @@ def test_celery(
     return {"msg": "Word received"}
 
 
+@router.post("/reconcile-tallies/", response_model=schemas.Msg, status_code=201)
+def reconcile_tallies(
+    poll_id: int = None,
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Recount the votes of a poll (or of all polls) and fix drifted answer tallies.
+    """
+    celery_app.send_task("app.worker.reconcile_answer_tallies", args=[poll_id])
+    return {"msg": "Reconciliation scheduled"}
+
+
+@router.get("/caches/", response_model=Dict[str, schemas.CacheStats])
+def read_cache_stats(
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Hit rate and staleness of the caches of the worker serving this request.
+    """
+    return {"event_roles": role_cache.stats(), "users": user_cache.stats()}
+
+
+@router.get("/password-hashing/", response_model=schemas.PasswordHashingStats)
+def read_password_hashing_stats(
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Load of the password hashing processes of the worker serving this request.
+    """
+    return password_hasher.stats()
+
+
 @router.post("/test-email/", response_model=schemas.Msg, status_code=201)
 def test_email(
     email_to: EmailStr,
@@ -1,20 +1,25 @@
-from typing import Generator
+from typing import AsyncGenerator, Generator, Optional, Union
 
 from fastapi import Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt
 from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app import crud, models, schemas
 from app.core import security
 from app.core.config import settings
-from app.db.session import SessionLocal
+from app.db.session import AsyncSessionLocal, SessionLocal
 
 reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/login/access-token"
 )
 
+# A snapshot from the user cache, or the row itself when it is disabled
+CurrentUser = Union[models.User, schemas.UserSnapshot]
+
 
 def get_db() -> Generator:
     try:
@@ -24,38 +29,148 @@ def get_db() -> Generator:
         db.close()
 
 
-def get_current_user(
-    db: Session = Depends(get_db), token: str = Depends(reusable_oauth2)
-) -> models.User:
+async def get_async_db() -> AsyncGenerator:
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_endpoint_db() -> AsyncGenerator:
+    """
+    An `AsyncSession` with `ASYNC_ENDPOINTS`, a `Session` otherwise, for the
+    endpoints that are served from the event loop or from the threadpool
+    depending on the setting.
+    """
+    if settings.ASYNC_ENDPOINTS:
+        async with AsyncSessionLocal() as db:
+            yield db
+        return
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        await run_in_threadpool(db.close)
+
+
+def decode_token(token: str) -> schemas.TokenPayload:
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
         )
-        token_data = schemas.TokenPayload(**payload)
+        return schemas.TokenPayload(**payload)
     except (jwt.JWTError, ValidationError):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
-    user = crud.user.get(db, id=token_data.sub)
+
+
+def get_token_data(token: str = Depends(reusable_oauth2)) -> schemas.TokenPayload:
+    return decode_token(token)
+
+
+def get_user_by_token_data(
+    db: Session, token_data: schemas.TokenPayload
+) -> CurrentUser:
+    user: Optional[CurrentUser]
+    if settings.USER_CACHE_ENABLED:
+        user = crud.user.get_snapshot(db, id=token_data.sub)
+    else:
+        user = crud.user.get(db, id=token_data.sub)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
 
 
+def get_user_by_token(db: Session, token: str) -> CurrentUser:
+    return get_user_by_token_data(db, decode_token(token))
+
+
+def get_current_user(
+    db: Session = Depends(get_db),
+    token_data: schemas.TokenPayload = Depends(get_token_data),
+) -> CurrentUser:
+    """
+    The user of the bearer token. With `USER_CACHE_ENABLED` this is an immutable
+    `schemas.UserSnapshot`, load the row to change it.
+    """
+    return get_user_by_token_data(db, token_data)
+
+
 def get_current_active_user(
-    current_user: models.User = Depends(get_current_user),
-) -> models.User:
+    current_user: CurrentUser = Depends(get_current_user),
+) -> CurrentUser:
     if not crud.user.is_active(current_user):
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
 
+async def get_async_current_user(
+    db: AsyncSession = Depends(get_async_db),
+    token_data: schemas.TokenPayload = Depends(get_token_data),
+) -> CurrentUser:
+    user: Optional[CurrentUser]
+    if settings.USER_CACHE_ENABLED:
+        user = await crud.async_user.get_snapshot(db, id=token_data.sub)
+    else:
+        user = await crud.async_user.get(db, id=token_data.sub)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
+
+
+async def get_async_current_active_user(
+    current_user: CurrentUser = Depends(get_async_current_user),
+) -> CurrentUser:
+    if not crud.async_user.is_active(current_user):
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return current_user
+
+
+async def get_endpoint_current_active_user(
+    db: Union[Session, AsyncSession] = Depends(get_endpoint_db),
+    token_data: schemas.TokenPayload = Depends(get_token_data),
+) -> CurrentUser:
+    if isinstance(db, AsyncSession):
+        user = await get_async_current_user(db, token_data)
+        return await get_async_current_active_user(user)
+    user = await run_in_threadpool(get_user_by_token_data, db, token_data)
+    return get_current_active_user(user)
+
+
 def get_current_active_superuser(
-    current_user: models.User = Depends(get_current_user),
-) -> models.User:
+    current_user: CurrentUser = Depends(get_current_user),
+) -> CurrentUser:
     if not crud.user.is_superuser(current_user):
         raise HTTPException(
             status_code=400, detail="The user doesn't have enough privileges"
         )
     return current_user
+
+
+def get_event_roles(
+    db: Session, *, token_data: schemas.TokenPayload, event_id: int, user_id: int
+) -> Optional[security.EventRole]:
+    """
+    Roles of the user in the event. Taken from the token when it is an event
+    token for this event and no member changed since it was issued, otherwise
+    from `crud.event.get_roles`.
+    """
+    if token_data.event == event_id and token_data.roles is not None:
+        version = crud.event.get_roles_version(db, event_id=event_id)
+        if version is not None and token_data.ver == version:
+            return security.EventRole(token_data.roles)
+    return crud.event.get_roles(db, event_id=event_id, user_id=user_id)
+
+
+async def get_async_event_roles(
+    db: AsyncSession,
+    *,
+    token_data: schemas.TokenPayload,
+    event_id: int,
+    user_id: int,
+) -> Optional[security.EventRole]:
+    if token_data.event == event_id and token_data.roles is not None:
+        version = await crud.async_event.get_roles_version(db, event_id=event_id)
+        if version is not None and token_data.ver == version:
+            return security.EventRole(token_data.roles)
+    return await crud.async_event.get_roles(db, event_id=event_id, user_id=user_id)
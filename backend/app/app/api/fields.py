@@ -0,0 +1,64 @@
+from typing import Any, Dict, List, Optional, Sequence, Type
+
+from fastapi import HTTPException, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+class FieldSelector:
+    def __init__(self, schema: Type[BaseModel]):
+        """
+        Dependency reading the `fields` query parameter of a read endpoint: the
+        comma separated fields of `schema` to return, `None` for all of them.
+        """
+        self.schema = schema
+
+    def __call__(
+        self,
+        fields: Optional[str] = Query(
+            None, description="Comma separated fields to return, e.g. id,question"
+        ),
+    ) -> Optional[List[str]]:
+        if fields is None:
+            return None
+        names = list(dict.fromkeys(name.strip() for name in fields.split(",")))
+        names = [name for name in names if name]
+        if not names:
+            raise HTTPException(status_code=400, detail="No fields given")
+        unknown = [name for name in names if name not in self.schema.__fields__]
+        if unknown:
+            raise HTTPException(
+                status_code=400, detail=f"Unknown fields: {', '.join(unknown)}"
+            )
+        return names
+
+
+def _pick(obj: Any, schema: Type[BaseModel], fields: Sequence[str]) -> Dict[str, Any]:
+    data = {}
+    for name in fields:
+        # Validated like the field of the full response, nested objects included
+        value, errors = schema.__fields__[name].validate(
+            getattr(obj, name), {}, loc=name
+        )
+        if errors:
+            raise ValueError(f"Invalid value of {schema.__name__}.{name}")
+        data[name] = value
+    return data
+
+
+def select_fields(
+    content: Any, schema: Type[BaseModel], fields: Optional[Sequence[str]]
+) -> Any:
+    """
+    `content` as it is when all fields are wanted, otherwise a response with
+    just `fields` of the object or of every object in the list. Return it from
+    the endpoint instead of `content`.
+    """
+    if fields is None:
+        return content
+    if isinstance(content, list):
+        data: Any = [_pick(obj, schema, fields) for obj in content]
+    else:
+        data = _pick(content, schema, fields)
+    return JSONResponse(jsonable_encoder(data))
@@ -0,0 +1,47 @@
+import base64
+import json
+from typing import Any, Optional, Sequence
+
+from fastapi import HTTPException, Query, Response
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(id: int) -> str:
+    cursor = base64.urlsafe_b64encode(json.dumps({"id": id}).encode())
+    return cursor.decode().rstrip("=")
+
+
+def get_after(
+    after: Optional[str] = Query(
+        None, description=f"The {NEXT_CURSOR_HEADER} header of the previous page"
+    ),
+) -> Optional[int]:
+    """
+    Dependency decoding the `after` cursor of a list endpoint into the id of the
+    last row of the previous page.
+    """
+    if after is None:
+        return None
+    try:
+        data = json.loads(base64.urlsafe_b64decode(after + "=" * (-len(after) % 4)))
+        id = data["id"]
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if type(id) is not int:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return id
+
+
+def add_next_cursor(
+    content: Any, response: Response, *, items: Sequence[Any], limit: Optional[int]
+) -> Any:
+    """
+    Set the cursor of the next page in the `X-Next-Cursor` header when the page
+    is full, on `content` itself when the endpoint returns a response of its
+    own. Returns `content`.
+    """
+    if limit is not None and items and len(items) >= limit:
+        headers = content.headers if isinstance(content, Response) else response.headers
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(items[-1].id)
+    return content
@@ -0,0 +1,140 @@
+"""
+Latency of the first and a deep page of access logs, by offset and by cursor.
+
+Inserts `--rows` access log entries for a new event, then reads page 1 and page
+`--page` of `--limit` entries `--reads` times each, once skipping the rows
+before the page (`skip=`) and once starting after the last id of the previous
+page (`after=`, what the `X-Next-Cursor` header encodes). Run it against a
+scratch database, filling it takes a few minutes at the default size:
+
+    python -m app.benchmarks.access_log_pages --rows 10000000 --page 1000
+"""
+import argparse
+import logging
+import time
+from typing import List, Optional
+
+from sqlalchemy import func, insert, literal, select, text
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.benchmarks.utils import create_voting_fixture, report
+from app.db.session import SessionLocal
+from app.models.access_log import AccessLog
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def create_access_logs(
+    db: Session, *, event_id: int, given_by_id: int, received_id: int, rows: int
+) -> None:
+    chunk_size = 1_000_000
+    for start in range(0, rows, chunk_size):
+        count = min(chunk_size, rows - start)
+        series = func.generate_series(1, count).table_valued("n")
+        db.execute(
+            insert(AccessLog).from_select(
+                ["event_id", "given_by_id", "received_id"],
+                select(
+                    literal(event_id), literal(given_by_id), literal(received_id)
+                ).select_from(series),
+            )
+        )
+        db.commit()
+        logger.info("Inserted %s access logs", start + count)
+    db.execute(text("ANALYZE accesslog"))
+    db.commit()
+
+
+def last_id_before(
+    db: Session, *, event_id: int, page: int, limit: int
+) -> Optional[int]:
+    if page == 1:
+        return None
+    return db.execute(
+        select(AccessLog.id)
+        .where(AccessLog.event_id == event_id)
+        .order_by(AccessLog.id)
+        .offset((page - 1) * limit - 1)
+        .limit(1)
+    ).scalar_one()
+
+
+def measure(
+    name: str,
+    *,
+    event_id: int,
+    skip: int,
+    after: Optional[int],
+    limit: int,
+    reads: int,
+) -> None:
+    latencies: List[float] = []
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        for _ in range(reads):
+            read_started = time.perf_counter()
+            logs = crud.access_log.get_multi(
+                db, event_id=event_id, skip=skip, limit=limit, after=after
+            )
+            latencies.append(time.perf_counter() - read_started)
+            assert len(logs) == limit
+            db.expunge_all()
+        elapsed = time.perf_counter() - started
+    finally:
+        db.close()
+    logger.info(report(name, latencies, elapsed))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--page", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--reads", type=int, default=50)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        fixture = create_voting_fixture(db, voters=1)
+        event = crud.event.get(db, id=fixture.event_id)
+        create_access_logs(
+            db,
+            event_id=fixture.event_id,
+            given_by_id=event.owner_id,
+            received_id=fixture.voter_ids[0],
+            rows=args.rows,
+        )
+        cursors = {
+            page: last_id_before(
+                db, event_id=fixture.event_id, page=page, limit=args.limit
+            )
+            for page in (1, args.page)
+        }
+    finally:
+        db.close()
+
+    for page, after in cursors.items():
+        skip = (page - 1) * args.limit
+        measure(
+            f"page {page} offset",
+            event_id=fixture.event_id,
+            skip=skip,
+            after=None,
+            limit=args.limit,
+            reads=args.reads,
+        )
+        measure(
+            f"page {page} cursor",
+            event_id=fixture.event_id,
+            skip=0,
+            after=after,
+            limit=args.limit,
+            reads=args.reads,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Throughput and latency of the hot endpoints with sync and async database access.
+
+Starts a single uvicorn worker, first with `ASYNC_ENDPOINTS=false`, then with
+`ASYNC_ENDPOINTS=true`, and lets an increasing number of concurrent clients
+vote (`POST /answers/`) and read the poll (`GET /polls/{id}`) as distinct
+participants of a fresh event. Sync endpoints stop scaling at the 40 threads of
+the threadpool, async ones at the database pool. Run it against a scratch
+database:
+
+    python -m app.benchmarks.api_concurrency --clients 25 50 100 200 400
+"""
+import argparse
+import logging
+import os
+import subprocess
+import sys
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.benchmarks.utils import create_voting_fixture, report, run_concurrently
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.db.session import SessionLocal
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def start_server(*, port: int, async_endpoints: bool) -> subprocess.Popen:
+    env = dict(os.environ, ASYNC_ENDPOINTS=str(async_endpoints).lower())
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "app.main:app",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+        ],
+        env=env,
+    )
+    for _ in range(100):
+        try:
+            requests.get(f"http://127.0.0.1:{port}/docs", timeout=1)
+            return server
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("The server did not start")
+
+
+def storm(*, base_url: str, clients: int, rounds: int) -> None:
+    db = SessionLocal()
+    try:
+        fixture = create_voting_fixture(db, voters=clients * rounds)
+    finally:
+        db.close()
+    # Minting tokens directly keeps bcrypt out of the measurement
+    tokens = {voter_id: create_access_token(voter_id) for voter_id in fixture.voter_ids}
+    session = requests.Session()
+    session.mount("http://", HTTPAdapter(pool_maxsize=clients))
+
+    def vote_and_read(_: object, voter_id: int) -> None:
+        headers = {"Authorization": f"Bearer {tokens[voter_id]}"}
+        option_id = fixture.answer_option_ids[voter_id % 2]
+        response = session.post(
+            f"{base_url}/answers/",
+            json={"poll_id": fixture.poll_id, "answer_option_id": option_id},
+            headers=headers,
+        )
+        response.raise_for_status()
+        response = session.get(f"{base_url}/polls/{fixture.poll_id}", headers=headers)
+        response.raise_for_status()
+
+    started = time.perf_counter()
+    latencies = run_concurrently(vote_and_read, fixture.voter_ids, workers=clients)
+    elapsed = time.perf_counter() - started
+    logger.info(report(f"{clients} clients", latencies, elapsed))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clients", type=int, nargs="+", default=[25, 50, 100, 200])
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--port", type=int, default=8123)
+    args = parser.parse_args()
+
+    base_url = f"http://127.0.0.1:{args.port}{settings.API_V1_STR}"
+    for async_endpoints in (False, True):
+        logger.info("ASYNC_ENDPOINTS=%s", async_endpoints)
+        server = start_server(port=args.port, async_endpoints=async_endpoints)
+        try:
+            for clients in args.clients:
+                storm(base_url=base_url, clients=clients, rounds=args.rounds)
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
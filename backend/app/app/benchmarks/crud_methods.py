@@ -0,0 +1,170 @@
+"""
+Latency and statements per call of the CRUD methods.
+
+Runs every method `--calls` times in one session, in an order where the reads,
+updates and deletes find the rows the creates wrote, and reports the calls per
+second, the latency percentiles and the statements each call sent. The batch
+cases write `--batch` rows per call with `commit=False` and one commit. Run it
+against a scratch database:
+
+    python -m app.benchmarks.crud_methods --calls 1000
+"""
+import argparse
+import logging
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Tuple
+
+from sqlalchemy.orm import Session
+
+from app import crud, schemas
+from app.benchmarks.utils import create_users, report
+from app.db.session import SessionLocal
+from app.tests.utils.queries import count_queries
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def cases(
+    db: Session, *, owner_id: int, batch: int
+) -> List[Tuple[str, Callable[[int], Any]]]:
+    """
+    The benchmarked calls, each taking the number of the call.
+    """
+    created: Dict[str, List[Any]] = {"events": [], "polls": [], "options": []}
+
+    def create_event(n: int) -> Any:
+        event_in = schemas.EventCreate(
+            name=f"benchmark {n}", start_at=datetime.utcnow()
+        )
+        event = crud.event.create_with_owner(db, obj_in=event_in, owner_id=owner_id)
+        created["events"].append(event)
+        return event
+
+    def create_events(n: int) -> Any:
+        events = [
+            crud.event.create_with_owner(
+                db,
+                obj_in=schemas.EventCreate(
+                    name=f"benchmark {n}.{number}", start_at=datetime.utcnow()
+                ),
+                owner_id=owner_id,
+                commit=False,
+            )
+            for number in range(batch)
+        ]
+        crud.event.commit(db, *events)
+        return events
+
+    def create_poll(n: int) -> Any:
+        event = created["events"][0]
+        poll_in = schemas.PollCreate(question=f"benchmark {n}", event_id=event.id)
+        poll = crud.poll.create_with_owner(db, obj_in=poll_in, owner_id=owner_id)
+        created["polls"].append(poll)
+        return poll
+
+    def create_option(n: int) -> Any:
+        poll = created["polls"][n % len(created["polls"])]
+        option_in = schemas.AnswerOptionCreate(text=f"option {n}", poll_id=poll.id)
+        option = crud.answer_option.create(db, obj_in=option_in)
+        created["options"].append(option)
+        return option
+
+    def update_options(n: int) -> Any:
+        options = created["options"][:batch]
+        for option in options:
+            crud.answer_option.update(
+                db, db_obj=option, obj_in={"text": f"option {n}"}, commit=False
+            )
+        crud.answer_option.commit(db, *options)
+        return options
+
+    def nth(name: str, n: int) -> Any:
+        return created[name][n % len(created[name])]
+
+    poll_plan = crud.poll.load_plan(schemas.Poll)
+    return [
+        ("event create", create_event),
+        (f"event create x{batch}", create_events),
+        ("event get", lambda n: crud.event.get(db, id=nth("events", n).id)),
+        (
+            "event get_summary",
+            lambda n: crud.event.get_summary(db, id=nth("events", n).id),
+        ),
+        ("event get_multi", lambda n: crud.event.get_multi(db, limit=100)),
+        (
+            "event get_multi_summaries",
+            lambda n: crud.event.get_multi_summaries(db, limit=100),
+        ),
+        (
+            "event update",
+            lambda n: crud.event.update(
+                db, db_obj=nth("events", n), obj_in={"description": f"updated {n}"}
+            ),
+        ),
+        ("poll create", create_poll),
+        (
+            "poll get",
+            lambda n: crud.poll.get(db, id=nth("polls", n).id, plan=poll_plan),
+        ),
+        (
+            "poll get_multi_by_event",
+            lambda n: crud.poll.get_multi_by_event(
+                db, event_id=created["events"][0].id, limit=100, plan=poll_plan
+            ),
+        ),
+        (
+            "poll update",
+            lambda n: crud.poll.update(
+                db, db_obj=nth("polls", n), obj_in={"is_running": n % 2 == 0}
+            ),
+        ),
+        ("answer option create", create_option),
+        (
+            "answer option update",
+            lambda n: crud.answer_option.update(
+                db, db_obj=nth("options", n), obj_in={"text": f"updated {n}"}
+            ),
+        ),
+        (f"answer option update x{batch}", update_options),
+        (
+            "answer option remove",
+            lambda n: crud.answer_option.remove(db, id=created["options"].pop().id),
+        ),
+    ]
+
+
+def measure(name: str, call: Callable[[int], Any], *, calls: int) -> None:
+    latencies: List[float] = []
+    with count_queries() as statements:
+        started = time.perf_counter()
+        for n in range(calls):
+            call_started = time.perf_counter()
+            call(n)
+            latencies.append(time.perf_counter() - call_started)
+        elapsed = time.perf_counter() - started
+    logger.info(
+        "%s  %.1f statements/call",
+        report(name, latencies, elapsed),
+        len(statements) / calls,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=1000)
+    parser.add_argument("--batch", type=int, default=20)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        (owner_id,) = create_users(db, count=1)
+        for name, call in cases(db, owner_id=owner_id, batch=args.batch):
+            measure(name, call, calls=args.calls)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Payload size and serialization time of an event: the full `schemas.Event`
+against `schemas.EventSummary` and a page of participants.
+
+Creates an event with `--participants` participants and reads it `--reads`
+times each way with a fresh session, loading and serializing it like the API
+does. Run it against a scratch database:
+
+    python -m app.benchmarks.event_payload --participants 10000
+"""
+import argparse
+import logging
+import time
+from typing import Callable, List
+
+from sqlalchemy.orm import Session
+
+from app import crud, schemas
+from app.benchmarks.utils import create_voting_fixture, report
+from app.db.session import SessionLocal
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def full_event(db: Session, event_id: int) -> str:
+    return schemas.Event.from_orm(crud.event.get(db, id=event_id)).json()
+
+
+def event_summary(db: Session, event_id: int) -> str:
+    return schemas.EventSummary.from_orm(crud.event.get_summary(db, id=event_id)).json()
+
+
+def participants_page(db: Session, event_id: int) -> str:
+    participants = crud.event.get_participants(db, event_id=event_id, limit=100)
+    return "[{}]".format(
+        ",".join(schemas.User.from_orm(user).json() for user in participants)
+    )
+
+
+def measure(
+    name: str, read: Callable[[Session, int], str], *, event_id: int, reads: int
+) -> None:
+    latencies: List[float] = []
+    size = 0
+    started = time.perf_counter()
+    for _ in range(reads):
+        db = SessionLocal()
+        try:
+            read_started = time.perf_counter()
+            size = len(read(db, event_id).encode())
+            latencies.append(time.perf_counter() - read_started)
+        finally:
+            db.close()
+    elapsed = time.perf_counter() - started
+    logger.info(report(name, latencies, elapsed))
+    logger.info("%s: %.1f KiB", name, size / 1024)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--participants", type=int, default=10000)
+    parser.add_argument("--reads", type=int, default=20)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        fixture = create_voting_fixture(db, voters=args.participants)
+    finally:
+        db.close()
+
+    for name, read in (
+        ("full event", full_event),
+        ("event summary", event_summary),
+        ("participants page", participants_page),
+    ):
+        measure(name, read, event_id=fixture.event_id, reads=args.reads)
+
+
+if __name__ == "__main__":
+    main()
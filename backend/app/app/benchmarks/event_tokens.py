@@ -0,0 +1,101 @@
+"""
+Database statements and latency per vote with access tokens and event tokens.
+
+Every voter of a fresh event votes once through `POST /answers/` of an
+in-process app, with `ROLE_CACHE_ENABLED` and `USER_CACHE_ENABLED` off and on,
+each time with plain access tokens and with event tokens from
+`/login/event-token/{event_id}`. The caches start empty, statements are counted
+on the engine. Run it against a scratch database:
+
+    python -m app.benchmarks.event_tokens --voters 2000
+"""
+import argparse
+import logging
+import time
+from typing import Any, Dict
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.benchmarks.utils import create_voting_fixture, report
+from app.core.config import settings
+from app.core.role_cache import role_cache
+from app.core.security import create_access_token
+from app.crud.crud_user import user_cache
+from app.db.session import SessionLocal, engine
+from app.main import app
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class StatementCounter:
+    def __init__(self) -> None:
+        self.count = 0
+
+    def __call__(self, *args: Any) -> None:
+        self.count += 1
+
+
+def vote(client: TestClient, *, voters: int, caches: bool, event_tokens: bool) -> None:
+    settings.ROLE_CACHE_ENABLED = caches
+    settings.USER_CACHE_ENABLED = caches
+    db = SessionLocal()
+    try:
+        fixture = create_voting_fixture(db, voters=voters)
+    finally:
+        db.close()
+
+    tokens: Dict[int, str] = {}
+    for voter_id in fixture.voter_ids:
+        tokens[voter_id] = create_access_token(voter_id)
+        if event_tokens:
+            response = client.post(
+                f"{settings.API_V1_STR}/login/event-token/{fixture.event_id}",
+                headers={"Authorization": f"Bearer {tokens[voter_id]}"},
+            )
+            response.raise_for_status()
+            tokens[voter_id] = response.json()["access_token"]
+    role_cache.clear()
+    user_cache.clear()
+
+    counter = StatementCounter()
+    event.listen(engine, "before_cursor_execute", counter)
+    latencies = []
+    started = time.perf_counter()
+    try:
+        for voter_id in fixture.voter_ids:
+            option_id = fixture.answer_option_ids[voter_id % 2]
+            vote_started = time.perf_counter()
+            response = client.post(
+                f"{settings.API_V1_STR}/answers/",
+                json={"poll_id": fixture.poll_id, "answer_option_id": option_id},
+                headers={"Authorization": f"Bearer {tokens[voter_id]}"},
+            )
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - vote_started)
+    finally:
+        event.remove(engine, "before_cursor_execute", counter)
+    elapsed = time.perf_counter() - started
+
+    token_kind = "event" if event_tokens else "access"
+    name = f"caches {'on' if caches else 'off'}, {token_kind} tokens"
+    logger.info(report(name, latencies, elapsed))
+    logger.info("%s: %.2f statements per vote", name, counter.count / voters)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--voters", type=int, default=2000)
+    args = parser.parse_args()
+
+    with TestClient(app) as client:
+        for caches in (False, True):
+            for event_tokens in (False, True):
+                vote(
+                    client, voters=args.voters, caches=caches, event_tokens=event_tokens
+                )
+
+
+if __name__ == "__main__":
+    main()
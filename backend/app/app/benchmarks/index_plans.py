@@ -0,0 +1,249 @@
+"""
+Query plans and insert throughput before and after the crud layer indexes.
+
+Fills the database with `--events` events of `--participants` participants,
+polls and answer options, and `--access-logs` access logs. The schema is then
+migrated down to the revision before the indexes, the plans of the queries the
+crud layer runs are printed with `EXPLAIN ANALYZE` and `--inserts` rows are
+inserted one transaction at a time, and the same is repeated after migrating
+back up. Run it from the directory of `alembic.ini` against a scratch database:
+
+    python -m app.benchmarks.index_plans --events 500 --access-logs 2000000
+"""
+import argparse
+import logging
+import subprocess
+import time
+from typing import Callable, Dict, List
+
+from sqlalchemy import insert, select, text
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+from app import models
+from app.benchmarks.utils import create_users, report
+from app.crud.crud_event import _summaries
+from app.db.session import SessionLocal
+from app.models.user import user_events_association_table
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BEFORE = "f2a9c7e41b05"
+AFTER = "b7d31e0c5a92"
+
+
+def fill(
+    db: Session, *, events: int, participants: int, access_logs: int
+) -> Dict[str, int]:
+    user_ids = create_users(db, count=max(participants * 4, 1000))
+    params = {
+        "user_ids": user_ids,
+        "users": len(user_ids),
+        "events": events,
+        "participants": participants,
+    }
+    event_ids = [
+        row.id
+        for row in db.execute(
+            text(
+                """
+                INSERT INTO event (name, description, owner_id, start_at, is_open)
+                SELECT 'benchmark ' || n, 'benchmark event ' || n,
+                       (:user_ids)[1 + n % :users], now(), true
+                FROM generate_series(1, :events) AS n
+                RETURNING id
+                """
+            ),
+            params,
+        )
+    ]
+    params["event_ids"] = event_ids
+    db.execute(
+        text(
+            """
+            INSERT INTO user_events_association (user_id, event_id)
+            SELECT (:user_ids)[1 + (e.n + p.n) % :users], e.id
+            FROM unnest(CAST(:event_ids AS integer[])) WITH ORDINALITY AS e (id, n),
+                 generate_series(1, :participants) AS p (n)
+            """
+        ),
+        params,
+    )
+    db.execute(
+        text(
+            """
+            INSERT INTO poll (question, owner_id, event_id, is_running)
+            SELECT 'benchmark question ' || n, (:user_ids)[1 + n % :users],
+                   (:event_ids)[1 + n % :events], false
+            FROM generate_series(1, :events * 4) AS n
+            """
+        ),
+        params,
+    )
+    db.execute(
+        text(
+            """
+            INSERT INTO answeroption (text, poll_id)
+            SELECT 'benchmark option ' || n, poll.id
+            FROM poll, generate_series(1, 4) AS n
+            WHERE poll.event_id = ANY(:event_ids)
+            """
+        ),
+        params,
+    )
+    db.commit()
+    chunk_size = 1_000_000
+    for start in range(0, access_logs, chunk_size):
+        count = min(chunk_size, access_logs - start)
+        db.execute(
+            text(
+                """
+                INSERT INTO accesslog (event_id, given_by_id, received_id)
+                SELECT (:event_ids)[1 + n % :events], (:user_ids)[1 + n % :users],
+                       (:user_ids)[1 + (n * 7) % :users]
+                FROM generate_series(1, :count) AS n
+                """
+            ),
+            {**params, "count": count},
+        )
+        db.commit()
+        logger.info("Inserted %s access logs", start + count)
+    return {
+        "event_id": event_ids[len(event_ids) // 2],
+        "user_id": user_ids[len(user_ids) // 2],
+        "answer_option_id": db.execute(
+            select(models.AnswerOption.id).order_by(models.AnswerOption.id.desc())
+        ).scalar(),
+    }
+
+
+def queries(event_id: int, user_id: int, answer_option_id: int) -> Dict[str, Select]:
+    """
+    The statements the crud layer runs for a page of every list and for the
+    checks before a write.
+    """
+    Poll, AnswerOption, AccessLog = models.Poll, models.AnswerOption, models.AccessLog
+    return {
+        "polls of an event": select(Poll)
+        .where(Poll.event_id == event_id)
+        .order_by(Poll.id)
+        .limit(100),
+        "options of an event": select(AnswerOption)
+        .join(Poll, Poll.id == AnswerOption.poll_id)
+        .where(Poll.event_id == event_id)
+        .order_by(AnswerOption.id),
+        "access logs of an event": select(AccessLog)
+        .where(AccessLog.event_id == event_id)
+        .order_by(AccessLog.id)
+        .limit(100),
+        "access logs received": select(AccessLog)
+        .where(AccessLog.event_id == event_id, AccessLog.received_id == user_id)
+        .order_by(AccessLog.id)
+        .limit(100),
+        "participants of an event": select(models.User)
+        .join(
+            user_events_association_table,
+            user_events_association_table.c.user_id == models.User.id,
+        )
+        .where(user_events_association_table.c.event_id == event_id)
+        .order_by(models.User.id)
+        .limit(100),
+        "event summary": _summaries().where(models.Event.id == event_id),
+        "events of an owner": _summaries()
+        .where(models.Event.owner_id == user_id)
+        .order_by(models.Event.id)
+        .limit(100),
+        "answers of an option": select(models.Answer.id)
+        .where(models.Answer.answer_option_id == answer_option_id)
+        .limit(1),
+    }
+
+
+def explain(db: Session, statements: Dict[str, Select]) -> None:
+    for name, statement in statements.items():
+        sql = statement.compile(
+            dialect=db.get_bind().dialect, compile_kwargs={"literal_binds": True}
+        )
+        plan = db.execute(text(f"EXPLAIN (ANALYZE, BUFFERS, COSTS OFF) {sql}"))
+        logger.info("%s:\n%s", name, "\n".join(row[0] for row in plan))
+
+
+def measure_inserts(
+    db: Session, name: str, values: Callable[[int], object], *, inserts: int
+) -> None:
+    latencies: List[float] = []
+    started = time.perf_counter()
+    for number in range(inserts):
+        insert_started = time.perf_counter()
+        db.execute(values(number))
+        db.commit()
+        latencies.append(time.perf_counter() - insert_started)
+    elapsed = time.perf_counter() - started
+    logger.info(report(name, latencies, elapsed))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=500)
+    parser.add_argument("--participants", type=int, default=200)
+    parser.add_argument("--access-logs", type=int, default=2_000_000)
+    parser.add_argument("--inserts", type=int, default=2000)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        fixture = fill(
+            db,
+            events=args.events,
+            participants=args.participants,
+            access_logs=args.access_logs,
+        )
+    finally:
+        db.close()
+    event_id, user_id = fixture["event_id"], fixture["user_id"]
+
+    for name, revision in (("before", BEFORE), ("after", AFTER)):
+        command = "downgrade" if revision == BEFORE else "upgrade"
+        subprocess.run(["alembic", command, revision], check=True)
+        logger.info("Indexes %s the migration", name)
+        db = SessionLocal()
+        try:
+            db.execute(text("ANALYZE"))
+            db.commit()
+            explain(db, queries(**fixture))
+            measure_inserts(
+                db,
+                f"{name}: access logs",
+                lambda n: insert(models.AccessLog).values(
+                    event_id=event_id, given_by_id=user_id, received_id=user_id
+                ),
+                inserts=args.inserts,
+            )
+            measure_inserts(
+                db,
+                f"{name}: polls",
+                lambda n: insert(models.Poll).values(
+                    question=f"benchmark question {n}",
+                    owner_id=user_id,
+                    event_id=event_id,
+                ),
+                inserts=args.inserts,
+            )
+            measure_inserts(
+                db,
+                f"{name}: events",
+                lambda n: insert(models.Event).values(
+                    name=f"benchmark {n}",
+                    description=f"benchmark event {n}",
+                    owner_id=user_id,
+                    start_at=text("now()"),
+                ),
+                inserts=args.inserts,
+            )
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Logins per second and per core for each password hashing scheme.
+
+Calibrates bcrypt and argon2 (when argon2-cffi is installed) to `--target-ms`
+per verification like app/calibrate_password_hashing.py does, then verifies a
+password in a loop on one core and on `--processes` cores at once. Size the
+login capacity of an event opening from the per core rate and
+`PASSWORD_HASH_WORKERS`. Needs no database:
+
+    python -m app.benchmarks.password_hashing --target-ms 250 --seconds 10
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+
+from passlib.hash import argon2
+
+from app.benchmarks.utils import report
+from app.core.security import (
+    calibrate_password_rounds,
+    configure_password_hashing,
+    get_password_hash,
+    verify_password,
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def verify_for(scheme: str, rounds: int, seconds: float) -> List[float]:
+    configure_password_hashing(scheme, rounds)
+    hashed_password = get_password_hash("benchmark")
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        verify_password("benchmark", hashed_password)
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def measure(scheme: str, *, target_ms: int, seconds: float, processes: int) -> None:
+    rounds = calibrate_password_rounds(scheme, target_ms / 1000)
+    logger.info("%s: %s rounds for %s ms", scheme, rounds, target_ms)
+
+    latencies = verify_for(scheme, rounds, seconds)
+    logger.info(report(f"{scheme}, 1 core", latencies, seconds))
+
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(processes, mp_context=context) as executor:
+        results = executor.map(
+            verify_for,
+            [scheme] * processes,
+            [rounds] * processes,
+            [seconds] * processes,
+        )
+        latencies = [latency for result in results for latency in result]
+    logger.info(report(f"{scheme}, {processes} cores", latencies, seconds))
+    logger.info(
+        "%s: %.1f logins/s per core", scheme, len(latencies) / seconds / processes
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--target-ms", type=int, default=250)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    for scheme in ("bcrypt", "argon2"):
+        if scheme == "argon2" and not argon2.has_backend():
+            logger.info("argon2: skipped, install argon2-cffi")
+            continue
+        measure(
+            scheme,
+            target_ms=args.target_ms,
+            seconds=args.seconds,
+            processes=args.processes,
+        )
+
+
+if __name__ == "__main__":
+    main()
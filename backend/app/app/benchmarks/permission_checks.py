@@ -0,0 +1,83 @@
+"""
+Cost of a permission check in a large event: loading the members against one
+`EXISTS` query for the role bitmask and against the role cache.
+
+Creates an event with `--participants` participants and checks random ones the
+way `send_answer` used to, by loading `event.participants` and looking for the
+user, and with `crud.event.get_roles` without and with `ROLE_CACHE_ENABLED`.
+Every check gets a fresh session, like a request does. Run it against a scratch
+database:
+
+    python -m app.benchmarks.permission_checks --participants 10000
+"""
+import argparse
+import logging
+import random
+import time
+from typing import Callable, List
+
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.benchmarks.utils import create_voting_fixture, report
+from app.core.config import settings
+from app.core.role_cache import role_cache
+from app.core.security import can_user_send_answer
+from app.db.session import SessionLocal
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def load_members(db: Session, event_id: int, user_id: int) -> bool:
+    event = crud.event.get(db, id=event_id)
+    return any(user.id == user_id for user in event.participants)
+
+
+def role_bitmask(db: Session, event_id: int, user_id: int) -> bool:
+    settings.ROLE_CACHE_ENABLED = False
+    roles = crud.event.get_roles(db, event_id=event_id, user_id=user_id)
+    return can_user_send_answer(roles)
+
+
+def role_cache_lookup(db: Session, event_id: int, user_id: int) -> bool:
+    settings.ROLE_CACHE_ENABLED = True
+    roles = crud.event.get_roles(db, event_id=event_id, user_id=user_id)
+    return can_user_send_answer(roles)
+
+
+def measure(
+    check: Callable[[Session, int, int], bool], *, event_id: int, user_ids: List[int]
+) -> None:
+    latencies = []
+    started = time.perf_counter()
+    for user_id in user_ids:
+        db = SessionLocal()
+        try:
+            check_started = time.perf_counter()
+            assert check(db, event_id, user_id)
+            latencies.append(time.perf_counter() - check_started)
+        finally:
+            db.close()
+    logger.info(report(check.__name__, latencies, time.perf_counter() - started))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--participants", type=int, default=10000)
+    parser.add_argument("--checks", type=int, default=200)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        fixture = create_voting_fixture(db, voters=args.participants)
+    finally:
+        db.close()
+    user_ids = random.choices(fixture.voter_ids, k=args.checks)
+    for check in (load_members, role_bitmask, role_cache_lookup):
+        measure(check, event_id=fixture.event_id, user_ids=user_ids)
+    logger.info("role cache: %s", role_cache.stats())
+
+
+if __name__ == "__main__":
+    main()
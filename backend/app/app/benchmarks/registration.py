@@ -0,0 +1,76 @@
+"""
+Student registrations per second against a local stand-in of lk.mirea.ru.
+
+Serves `StudentApi` with `--latency` seconds per request, points the student
+profile client at it and registers `--students` fresh students through
+`POST /users/register` of an in-process app, `--concurrency` at a time. The
+registrations are then repeated with the same emails and passwords, which are
+rejected as duplicates. Run it against a scratch database:
+
+    python -m app.benchmarks.registration --students 500 --latency 0.2
+"""
+import argparse
+import asyncio
+import logging
+import time
+import uuid
+from typing import List
+
+import httpx
+
+from app.benchmarks.utils import report
+from app.core.config import settings
+from app.core.student_profiles import student_profiles
+from app.main import app
+from app.tests.utils.student_api import StudentApi, run_student_api
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def register(emails: List[str], *, concurrency: int) -> List[float]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(client: httpx.AsyncClient, email: str) -> float:
+        async with semaphore:
+            started = time.perf_counter()
+            await client.post(
+                f"{settings.API_V1_STR}/users/register",
+                json={"email": email, "password": "benchmark", "is_student": True},
+            )
+            return time.perf_counter() - started
+
+    async with httpx.AsyncClient(app=app, base_url="http://testserver") as client:
+        return await asyncio.gather(*(one(client, email) for email in emails))
+
+
+async def measure(api: StudentApi, *, students: int, concurrency: int) -> None:
+    prefix = uuid.uuid4().hex[:8]
+    emails = [f"{prefix}-{number}@benchmark.test" for number in range(students)]
+    for name in ("new", "repeated"):
+        requests = api.requests
+        started = time.perf_counter()
+        latencies = await register(emails, concurrency=concurrency)
+        elapsed = time.perf_counter() - started
+        logger.info(report(f"{name} students", latencies, elapsed))
+        logger.info(
+            "%s students: %s student API requests", name, api.requests - requests
+        )
+    await student_profiles.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--students", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.2)
+    args = parser.parse_args()
+
+    api = StudentApi(latency=args.latency)
+    with run_student_api(api) as url:
+        student_profiles.url = url
+        asyncio.run(measure(api, students=args.students, concurrency=args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
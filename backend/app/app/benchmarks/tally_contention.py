@@ -0,0 +1,67 @@
+"""
+Vote latency with a single tally row per answer option against sharded tallies.
+
+Every voter of a fresh event votes once through `crud.answer.create_with_owner`
+from many threads at the same time, first with one counter row per option, then
+with `--shards` rows. Run it against a scratch database:
+
+    python -m app.benchmarks.tally_contention --voters 3000 --workers 32
+"""
+import argparse
+import logging
+import time
+from typing import List, Tuple
+
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.benchmarks.utils import create_voting_fixture, report, run_concurrently
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.schemas.answer import AnswerCreate
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def storm(
+    *, voters: int, answer_options: int, workers: int
+) -> Tuple[List[float], float]:
+    db = SessionLocal()
+    try:
+        fixture = create_voting_fixture(
+            db, voters=voters, answer_options=answer_options
+        )
+    finally:
+        db.close()
+
+    def vote(db: Session, voter_id: int) -> None:
+        option_id = fixture.answer_option_ids[voter_id % answer_options]
+        answer_in = AnswerCreate(poll_id=fixture.poll_id, answer_option_id=option_id)
+        crud.answer.create_with_owner(db, obj_in=answer_in, owner_id=voter_id)
+
+    started = time.perf_counter()
+    latencies = run_concurrently(vote, fixture.voter_ids, workers=workers)
+    return latencies, time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--voters", type=int, default=3000)
+    parser.add_argument("--answer-options", type=int, default=2)
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--shards", type=int, default=settings.ANSWER_TALLY_SHARDS)
+    args = parser.parse_args()
+
+    for shards in (1, args.shards):
+        crud.answer_tally.shards = shards
+        latencies, elapsed = storm(
+            voters=args.voters,
+            answer_options=args.answer_options,
+            workers=args.workers,
+        )
+        logger.info(report(f"{shards} tally shard(s)", latencies, elapsed))
+
+
+if __name__ == "__main__":
+    main()
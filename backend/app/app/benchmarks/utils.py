@@ -0,0 +1,130 @@
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Iterable, List, NamedTuple, TypeVar
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session, sessionmaker
+
+from app import models
+from app.core.config import settings
+from app.core.security import get_password_hash
+from app.models.user import user_events_association_table
+
+T = TypeVar("T")
+
+
+class VotingFixture(NamedTuple):
+    event_id: int
+    poll_id: int
+    answer_option_ids: List[int]
+    voter_ids: List[int]
+
+
+def create_users(db: Session, *, count: int) -> List[int]:
+    """
+    Insert `count` users sharing one password hash and return their ids.
+    """
+    hashed_password = get_password_hash(secrets.token_urlsafe())
+    prefix = secrets.token_hex(4)
+    user_ids: List[int] = []
+    for start in range(0, count, 5000):
+        rows = [
+            {
+                "email": f"bench-{prefix}-{number}@example.com",
+                "hashed_password": hashed_password,
+            }
+            for number in range(start, min(start + 5000, count))
+        ]
+        result = db.execute(insert(models.User).values(rows).returning(models.User.id))
+        user_ids.extend(row.id for row in result)
+    db.commit()
+    return user_ids
+
+
+def create_voting_fixture(
+    db: Session, *, voters: int, answer_options: int = 2
+) -> VotingFixture:
+    """
+    Create an event with `voters` participants and a running poll with
+    `answer_options` options.
+    """
+    owner_id, *voter_ids = create_users(db, count=voters + 1)
+    event = models.Event(
+        name=f"benchmark {datetime.utcnow()}",
+        owner_id=owner_id,
+        start_at=datetime.utcnow(),
+    )
+    db.add(event)
+    db.flush()
+    poll = models.Poll(
+        question="benchmark", owner_id=owner_id, event_id=event.id, is_running=True
+    )
+    db.add(poll)
+    db.flush()
+    options = [
+        models.AnswerOption(text=f"option {number}", poll_id=poll.id)
+        for number in range(answer_options)
+    ]
+    db.add_all(options)
+    for start in range(0, len(voter_ids), 5000):
+        end = start + 5000
+        db.execute(
+            insert(user_events_association_table).values(
+                [
+                    {"event_id": event.id, "user_id": voter_id}
+                    for voter_id in voter_ids[start:end]
+                ]
+            )
+        )
+    db.commit()
+    return VotingFixture(
+        event_id=event.id,
+        poll_id=poll.id,
+        answer_option_ids=[option.id for option in options],
+        voter_ids=voter_ids,
+    )
+
+
+def run_concurrently(
+    func: Callable[[Session, T], object], items: Iterable[T], *, workers: int
+) -> List[float]:
+    """
+    Call `func` for every item from `workers` threads, each call with its own
+    session, and return the latency of every call in seconds. The sessions come
+    from a pool with a connection per thread, so threads never wait for one.
+    """
+    engine = create_engine(
+        settings.SQLALCHEMY_DATABASE_URI, pool_size=workers, max_overflow=0
+    )
+    sessions = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def timed(item: T) -> float:
+        db = sessions()
+        try:
+            started = time.perf_counter()
+            func(db, item)
+            return time.perf_counter() - started
+        finally:
+            db.close()
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(timed, items))
+    finally:
+        engine.dispose()
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def report(name: str, latencies: List[float], elapsed: float) -> str:
+    return (
+        f"{name:<24} {len(latencies) / elapsed:>9.0f} ops/s"
+        f"  p50 {percentile(latencies, 50) * 1000:>7.2f} ms"
+        f"  p99 {percentile(latencies, 99) * 1000:>7.2f} ms"
+    )
@@ -0,0 +1,147 @@
+"""
+Votes per second with a commit per vote against the write-behind vote buffer.
+
+Every voter of a fresh event votes once from many threads: with the
+check-then-insert sequence `send_answer` used before votes became a single
+statement, through `crud.answer.create_with_owner`, and the way `send_answer`
+does in "buffered" mode: an eligibility check followed by `VoteBuffer.put`. The
+buffered run is timed until the buffer has written every vote. Run it against a
+scratch database:
+
+    python -m app.benchmarks.vote_ingestion --voters 20000 --workers 32
+"""
+import argparse
+import logging
+import time
+from typing import List
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app import crud, models
+from app.benchmarks.utils import (
+    VotingFixture,
+    create_voting_fixture,
+    report,
+    run_concurrently,
+)
+from app.core.vote_buffer import Vote, VoteBuffer, VoteBufferFull
+from app.db.session import SessionLocal
+from app.schemas.answer import AnswerCreate
+from app.tests.utils.poll import vote_check_then_insert
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def create_fixture(*, voters: int) -> VotingFixture:
+    db = SessionLocal()
+    try:
+        return create_voting_fixture(db, voters=voters)
+    finally:
+        db.close()
+
+
+def count_answers(*, poll_id: int) -> int:
+    db = SessionLocal()
+    try:
+        return (
+            db.query(func.count(models.Answer.id))
+            .filter(models.Answer.poll_id == poll_id)
+            .scalar()
+        )
+    finally:
+        db.close()
+
+
+def answer_for(fixture: VotingFixture, voter_id: int) -> AnswerCreate:
+    option_id = fixture.answer_option_ids[voter_id % len(fixture.answer_option_ids)]
+    return AnswerCreate(poll_id=fixture.poll_id, answer_option_id=option_id)
+
+
+def check_then_insert(*, voters: int, workers: int) -> None:
+    fixture = create_fixture(voters=voters)
+
+    def vote(db: Session, voter_id: int) -> None:
+        answer_in = answer_for(fixture, voter_id)
+        vote_check_then_insert(db, obj_in=answer_in, owner_id=voter_id)
+
+    started = time.perf_counter()
+    latencies = run_concurrently(vote, fixture.voter_ids, workers=workers)
+    elapsed = time.perf_counter() - started
+    logger.info(report("check then insert", latencies, elapsed))
+    assert count_answers(poll_id=fixture.poll_id) == voters
+
+
+def direct(*, voters: int, workers: int) -> None:
+    fixture = create_fixture(voters=voters)
+
+    def vote(db: Session, voter_id: int) -> None:
+        answer_in = answer_for(fixture, voter_id)
+        crud.answer.create_with_owner(db, obj_in=answer_in, owner_id=voter_id)
+
+    started = time.perf_counter()
+    latencies = run_concurrently(vote, fixture.voter_ids, workers=workers)
+    elapsed = time.perf_counter() - started
+    logger.info(report("commit per vote", latencies, elapsed))
+    assert count_answers(poll_id=fixture.poll_id) == voters
+
+
+def buffered(
+    *, voters: int, workers: int, batch_size: int, max_latency_ms: int
+) -> None:
+    fixture = create_fixture(voters=voters)
+
+    def write(votes: List[Vote]) -> None:
+        db = SessionLocal()
+        try:
+            crud.answer.create_multi_with_owners(db, votes=votes)
+        finally:
+            db.close()
+
+    buffer = VoteBuffer(
+        write,
+        max_size=voters,
+        batch_size=batch_size,
+        max_latency=max_latency_ms / 1000,
+    )
+
+    def vote(db: Session, voter_id: int) -> None:
+        answer_in = answer_for(fixture, voter_id)
+        if not crud.answer.is_eligible(db, obj_in=answer_in, owner_id=voter_id):
+            raise RuntimeError(f"Voter {voter_id} is not eligible")
+        db.rollback()
+        try:
+            buffer.put({**answer_in.dict(), "owner_id": voter_id})
+        except VoteBufferFull:
+            raise RuntimeError("Vote buffer overflow, raise its size")
+
+    buffer.start()
+    started = time.perf_counter()
+    latencies = run_concurrently(vote, fixture.voter_ids, workers=workers)
+    buffer.stop()
+    elapsed = time.perf_counter() - started
+    logger.info(report(f"buffered ({batch_size}/batch)", latencies, elapsed))
+    assert count_answers(poll_id=fixture.poll_id) == voters
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--voters", type=int, default=20000)
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--max-latency-ms", type=int, default=20)
+    args = parser.parse_args()
+
+    check_then_insert(voters=args.voters, workers=args.workers)
+    direct(voters=args.voters, workers=args.workers)
+    buffered(
+        voters=args.voters,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        max_latency_ms=args.max_latency_ms,
+    )
+
+
+if __name__ == "__main__":
+    main()
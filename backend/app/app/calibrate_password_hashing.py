@@ -0,0 +1,34 @@
+"""
+Print the rounds of the password hashing scheme for which a login takes about
+`--target-ms` on this machine, to set as `PASSWORD_HASH_ROUNDS` for every
+worker. Run it once on the hardware the API is served from:
+
+    python /app/app/calibrate_password_hashing.py --target-ms 250
+"""
+import argparse
+import logging
+
+from app.core.config import settings
+from app.core.security import calibrate_password_rounds
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--scheme", choices=("bcrypt", "argon2"), default=settings.PASSWORD_HASH_SCHEME
+    )
+    parser.add_argument("--target-ms", type=int, default=250)
+    args = parser.parse_args()
+
+    rounds = calibrate_password_rounds(args.scheme, args.target_ms / 1000)
+    logger.info(
+        "Calibrated %s to %s rounds for %s ms", args.scheme, rounds, args.target_ms
+    )
+    print(f"PASSWORD_HASH_ROUNDS={rounds}")
+
+
+if __name__ == "__main__":
+    main()
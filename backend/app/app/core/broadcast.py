@@ -0,0 +1,319 @@
+import asyncio
+import json
+import logging
+from collections import Counter, defaultdict
+from typing import Any, Callable, Dict, Iterable, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.db.pubsub import MAX_PAYLOAD_BYTES, pubsub
+
+logger = logging.getLogger(__name__)
+
+LIVE_RESULTS_CHANNEL = "live_results"
+
+# Topic of the frame a subscription gets when it fell behind on all its topics
+ALL_TOPICS = "*"
+
+
+def poll_topic(poll_id: int) -> str:
+    return f"poll:{poll_id}"
+
+
+def event_topic(event_id: int) -> str:
+    return f"event:{event_id}"
+
+
+ShardKey = Tuple[int, int]
+ShardValue = Tuple[int, int]
+
+
+class Frame:
+    """
+    Updates of one topic collected during a coalescing interval. `shards` maps
+    `(answer_option_id, shard)` to the `(version, count)` a tally shard was
+    left with, `state` holds the latest values of the changed poll fields.
+    """
+
+    __slots__ = ("shards", "state", "resync")
+
+    def __init__(
+        self,
+        shards: Optional[Dict[ShardKey, ShardValue]] = None,
+        state: Optional[Dict[str, Any]] = None,
+        resync: bool = False,
+    ) -> None:
+        self.shards: Dict[ShardKey, ShardValue] = dict(shards or {})
+        self.state: Dict[str, Any] = dict(state or {})
+        self.resync = resync
+
+    def merge(self, other: "Frame") -> None:
+        for key, value in other.shards.items():
+            # Frames of several workers arrive in any order, the newest wins
+            if key not in self.shards or value[0] > self.shards[key][0]:
+                self.shards[key] = value
+        self.state.update(other.state)
+        self.resync = self.resync or other.resync
+
+    def dumps(self, topic: str) -> str:
+        return json.dumps(
+            {
+                "topic": topic,
+                "shards": [
+                    [answer_option_id, shard, version, count]
+                    for (answer_option_id, shard), (version, count) in sorted(
+                        self.shards.items()
+                    )
+                ],
+                "state": self.state,
+                "resync": self.resync,
+            }
+        )
+
+    @classmethod
+    def loads(cls, payload: str) -> Tuple[str, "Frame"]:
+        message = json.loads(payload)
+        frame = cls(
+            shards={
+                (answer_option_id, shard): (version, count)
+                for answer_option_id, shard, version, count in message["shards"]
+            },
+            state=message["state"],
+            resync=message["resync"],
+        )
+        return message["topic"], frame
+
+
+class ShardCounts:
+    def __init__(self, rows: Iterable[Any] = ()):
+        """
+        Tally shards as a subscriber last saw them, seeded from the rows of
+        `CRUDAnswerTally.get_shards`. A frame can arrive after a snapshot that
+        already counted its votes; its shards are no newer than the snapshot's
+        and `apply` leaves them out.
+        """
+        self._shards: Dict[ShardKey, ShardValue] = {}
+        for row in rows:
+            if row.shard is not None:
+                key = (row.answer_option_id, row.shard)
+                self._shards[key] = (row.version, row.count)
+
+    def apply(self, frame: Frame) -> Dict[int, int]:
+        """
+        Take the shards of `frame` newer than the known ones and return the
+        resulting change of the vote count per answer option.
+        """
+        deltas: Counter = Counter()
+        for key, (version, count) in frame.shards.items():
+            known_version, known_count = self._shards.get(key, (0, 0))
+            if version <= known_version:
+                continue
+            self._shards[key] = (version, count)
+            deltas[key[0]] += count - known_count
+        return {key: value for key, value in deltas.items() if value}
+
+
+class Coalescer:
+    def __init__(self, interval: float, deliver: Callable[[str, Frame], None]):
+        """
+        Merges the frames submitted for a topic and hands them to `deliver` at
+        most once per `interval` seconds. `submit` may be called from any
+        thread, `deliver` runs on the event loop passed to `bind`.
+        """
+        self.interval = interval
+        self.deliver = deliver
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: Dict[str, Frame] = {}
+        self._last_flush: Dict[str, float] = {}
+
+    def bind(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._loop = loop
+
+    def unbind(self) -> None:
+        self._loop = None
+        self._pending.clear()
+        self._last_flush.clear()
+
+    def submit(self, topic: str, frame: Frame) -> bool:
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return False
+        loop.call_soon_threadsafe(self._enqueue, topic, frame)
+        return True
+
+    def flush_all(self) -> None:
+        for topic in list(self._pending):
+            self._flush(topic)
+
+    def _enqueue(self, topic: str, frame: Frame) -> None:
+        pending = self._pending.get(topic)
+        if pending is not None:
+            pending.merge(frame)
+            return
+        self._pending[topic] = frame
+        loop = asyncio.get_running_loop()
+        due = self._last_flush.get(topic, 0.0) + self.interval
+        loop.call_at(max(loop.time(), due), self._flush, topic)
+
+    def _flush(self, topic: str) -> None:
+        frame = self._pending.pop(topic, None)
+        if frame is None:
+            return
+        if self._loop is not None:
+            self._last_flush[topic] = self._loop.time()
+        try:
+            self.deliver(topic, frame)
+        except Exception:
+            logger.exception("Delivering a frame for %s failed", topic)
+
+
+class Subscription:
+    def __init__(self, broadcaster: "Broadcaster", maxsize: int):
+        self.topics: Set[str] = set()
+        self.queue: "asyncio.Queue[Tuple[str, Frame]]" = asyncio.Queue(maxsize)
+        self._broadcaster = broadcaster
+
+    def put(self, topic: str, frame: Frame) -> None:
+        try:
+            self.queue.put_nowait((topic, frame))
+        except asyncio.QueueFull:
+            # A slow client gets a single frame asking it to reload everything
+            # instead of an unbounded backlog
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait((ALL_TOPICS, Frame(resync=True)))
+
+    async def get(self) -> Tuple[str, Frame]:
+        return await self.queue.get()
+
+    def add_topic(self, topic: str) -> None:
+        self._broadcaster.add_topic(self, topic)
+
+    def close(self) -> None:
+        self._broadcaster.unsubscribe(self)
+
+
+class Broadcaster:
+    def __init__(self, interval: float, queue_size: int = 64):
+        """
+        Fans live poll updates out to the subscribers of this process.
+
+        Updates published for a topic are merged and delivered as at most one
+        frame per `interval` seconds, so a burst of votes turns into a few
+        frames. `publish` may be called from any thread; subscribing and
+        delivery happen on the event loop passed to `bind`.
+        """
+        self.queue_size = queue_size
+        self._coalescer = Coalescer(interval, self._fan_out)
+        self._subscriptions: Dict[str, Set[Subscription]] = defaultdict(set)
+
+    def bind(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._coalescer.bind(loop)
+
+    def unbind(self) -> None:
+        self._coalescer.unbind()
+        self._subscriptions.clear()
+
+    def subscribe(self, *topics: str) -> Subscription:
+        # A subscription to many topics can get a frame for each of them at
+        # once, leave room for that
+        subscription = Subscription(self, self.queue_size + len(topics))
+        for topic in topics:
+            self.add_topic(subscription, topic)
+        return subscription
+
+    def add_topic(self, subscription: Subscription, topic: str) -> None:
+        subscription.topics.add(topic)
+        self._subscriptions[topic].add(subscription)
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        for topic in subscription.topics:
+            subscribers = self._subscriptions.get(topic)
+            if subscribers is None:
+                continue
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscriptions[topic]
+
+    def publish(
+        self,
+        topic: str,
+        *,
+        shards: Optional[Dict[ShardKey, ShardValue]] = None,
+        state: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.publish_frame(topic, Frame(shards=shards, state=state))
+
+    def publish_frame(self, topic: str, frame: Frame) -> None:
+        if topic in self._subscriptions:
+            self._coalescer.submit(topic, frame)
+
+    def resync_all(self) -> None:
+        for topic in list(self._subscriptions):
+            self.publish_frame(topic, Frame(resync=True))
+
+    def _fan_out(self, topic: str, frame: Frame) -> None:
+        for subscription in list(self._subscriptions.get(topic, ())):
+            subscription.put(topic, frame)
+
+
+broadcaster = Broadcaster(interval=settings.LIVE_RESULTS_INTERVAL_MS / 1000)
+
+
+def _notify(topic: str, frame: Frame) -> None:
+    payload = frame.dumps(topic)
+    if len(payload.encode()) < MAX_PAYLOAD_BYTES:
+        pubsub.notify(LIVE_RESULTS_CHANNEL, payload)
+    elif len(frame.shards) > 1:
+        # Shards are versioned, so the halves can be applied in any order
+        shards = sorted(frame.shards.items())
+        middle = len(shards) // 2
+        _notify(topic, Frame(dict(shards[:middle]), frame.state, frame.resync))
+        _notify(topic, Frame(dict(shards[middle:])))
+    else:
+        logger.warning("Frame of %s is too long, sending a resync", topic)
+        pubsub.notify(LIVE_RESULTS_CHANNEL, Frame(resync=True).dumps(topic))
+
+
+# Updates of this process are merged before they are sent to PostgreSQL, so a
+# vote burst costs a few notifications per poll instead of one per vote
+outbox = Coalescer(settings.LIVE_RESULTS_INTERVAL_MS / 1000, _notify)
+
+
+def publish(
+    topic: str,
+    *,
+    shards: Optional[Dict[ShardKey, ShardValue]] = None,
+    state: Optional[Dict[str, Any]] = None,
+) -> None:
+    """
+    Publish a live update to the subscribers of every worker. Call it only for
+    committed changes.
+    """
+    frame = Frame(shards=shards, state=state)
+    if settings.LIVE_RESULTS_BACKEND == "memory":
+        broadcaster.publish_frame(topic, frame)
+    elif not outbox.submit(topic, frame):
+        # Outside of the web server (Celery, scripts) there is no event loop
+        _notify(topic, frame)
+
+
+def _receive(payload: str) -> None:
+    topic, frame = Frame.loads(payload)
+    broadcaster.publish_frame(topic, frame)
+
+
+async def start_live_results() -> None:
+    loop = asyncio.get_running_loop()
+    broadcaster.bind(loop)
+    if settings.LIVE_RESULTS_BACKEND == "postgres":
+        outbox.bind(loop)
+        pubsub.subscribe(LIVE_RESULTS_CHANNEL, _receive)
+        # Subscribers may have missed updates while the listener was away
+        pubsub.on_reconnect(broadcaster.resync_all)
+
+
+async def stop_live_results() -> None:
+    if settings.LIVE_RESULTS_BACKEND == "postgres":
+        outbox.flush_all()
+        outbox.unbind()
+    broadcaster.unbind()
@@ -2,4 +2,7 @@ from celery import Celery
 
 celery_app = Celery("worker", broker="amqp://guest@queue//")
 
-celery_app.conf.task_routes = {"app.worker.test_celery": "main-queue"}
+celery_app.conf.task_routes = {
+    "app.worker.test_celery": "main-queue",
+    "app.worker.reconcile_answer_tallies": "main-queue",
+}
@@ -1,8 +1,11 @@
 import secrets
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Literal, Optional, Union
 
 from pydantic import AnyHttpUrl, BaseSettings, EmailStr, HttpUrl, PostgresDsn, validator
 
+# Least rounds new password hashes are made with, bcrypt rounds and argon2 passes
+MIN_PASSWORD_HASH_ROUNDS = {"bcrypt": 12, "argon2": 3}
+
 
 class Settings(BaseSettings):
     API_V1_STR: str = "/api/v1"
@@ -51,6 +54,89 @@ class Settings(BaseSettings):
             path=f"/{values.get('POSTGRES_DB') or ''}",
         )
 
+    SQLALCHEMY_ASYNC_DATABASE_URI: Optional[str] = None
+
+    @validator("SQLALCHEMY_ASYNC_DATABASE_URI", pre=True)
+    def assemble_async_db_connection(
+        cls, v: Optional[str], values: Dict[str, Any]
+    ) -> str:
+        if isinstance(v, str):
+            return v
+        uri = str(values.get("SQLALCHEMY_DATABASE_URI"))
+        return uri.replace("postgresql://", "postgresql+asyncpg://", 1)
+
+    # Serve the hot endpoints (voting, poll and answer reads, login) from the
+    # event loop with asyncpg instead of the threadpool
+    ASYNC_ENDPOINTS: bool = False
+    ASYNC_POOL_SIZE: int = 20
+    ASYNC_MAX_OVERFLOW: int = 10
+
+    # Counter rows per answer option, spreads the row locks of a vote burst
+    ANSWER_TALLY_SHARDS: int = 16
+    # Live result streams send at most one frame per poll in this interval
+    LIVE_RESULTS_INTERVAL_MS: int = 250
+    # "postgres" shares live results between workers with LISTEN/NOTIFY,
+    # "memory" keeps them inside a single process
+    LIVE_RESULTS_BACKEND: Literal["memory", "postgres"] = "postgres"
+    # "buffered" answers votes with 202 and writes them in batches from a
+    # background thread, "direct" stores every vote before responding
+    VOTE_INGESTION_MODE: Literal["direct", "buffered"] = "direct"
+    VOTE_BUFFER_SIZE: int = 10000
+    VOTE_BUFFER_BATCH_SIZE: int = 500
+    # A buffered vote waits at most this long before its batch is written
+    VOTE_BUFFER_MAX_LATENCY_MS: int = 20
+    # Buffered votes are journaled to disk before they are acknowledged when
+    # set, one directory per host shared by its workers
+    VOTE_JOURNAL_DIR: Optional[str] = None
+    VOTE_JOURNAL_FSYNC_INTERVAL_MS: int = 2
+    VOTE_JOURNAL_SEGMENT_SIZE: int = 1024 * 1024
+    # Permission checks read event members from a per-worker cache, kept in
+    # sync between workers with LISTEN/NOTIFY
+    ROLE_CACHE_ENABLED: bool = True
+    ROLE_CACHE_MAX_EVENTS: int = 256
+    # Bounds how long a lost invalidation leaves an entry stale
+    ROLE_CACHE_TTL_SECONDS: int = 300
+    # The authenticated user is read from a per-worker cache of snapshots
+    # instead of the database on every request
+    USER_CACHE_ENABLED: bool = True
+    USER_CACHE_MAX_USERS: int = 10000
+    USER_CACHE_TTL_SECONDS: int = 60
+    # Processes hashing passwords, 0 hashes in the request thread
+    PASSWORD_HASH_WORKERS: int = 2
+    # Logins waiting for a hashing process beyond this are answered with 503
+    PASSWORD_HASH_MAX_QUEUE: int = 64
+    # Processes hashing the passwords of bulk user imports, apart from the
+    # ones logins use
+    PASSWORD_IMPORT_WORKERS: int = 1
+    # New hashes use this scheme, stored hashes of the other are replaced on
+    # the next login
+    PASSWORD_HASH_SCHEME: Literal["bcrypt", "argon2"] = "bcrypt"
+    # Rounds of new hashes, the least allowed for the scheme when unset. Every
+    # worker hashes alike, measure the rounds that fit a login budget once with
+    # app/calibrate_password_hashing.py
+    PASSWORD_HASH_ROUNDS: Optional[int] = None
+
+    @validator("PASSWORD_HASH_ROUNDS")
+    def password_hash_rounds_floor(
+        cls, v: Optional[int], values: Dict[str, Any]
+    ) -> Optional[int]:
+        scheme = values.get("PASSWORD_HASH_SCHEME", "bcrypt")
+        if v is not None and v < MIN_PASSWORD_HASH_ROUNDS[scheme]:
+            raise ValueError(
+                f"{scheme} needs at least {MIN_PASSWORD_HASH_ROUNDS[scheme]} rounds"
+            )
+        return v
+
+    # lk.mirea.ru API that verifies students on registration
+    STUDENT_API_URL: str = "https://lk.mirea.ru/local/ajax/mrest.php"
+    STUDENT_API_TIMEOUT_SECONDS: float = 5
+    STUDENT_API_MAX_CONNECTIONS: int = 20
+    # Failures in a row after which registration of students is refused for
+    # STUDENT_API_COOLDOWN_SECONDS without calling the API
+    STUDENT_API_FAILURE_THRESHOLD: int = 5
+    STUDENT_API_COOLDOWN_SECONDS: int = 30
+    STUDENT_PROFILE_CACHE_SECONDS: int = 300
+
     SMTP_TLS: bool = True
     SMTP_PORT: Optional[int] = None
     SMTP_HOST: Optional[str] = None
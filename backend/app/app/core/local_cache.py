@@ -0,0 +1,124 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+from app.core.config import settings
+from app.db.pubsub import pubsub
+
+KeyType = TypeVar("KeyType", bound=Hashable)
+ValueType = TypeVar("ValueType")
+
+
+class LocalCache(Generic[KeyType, ValueType]):
+    def __init__(self, *, channel: str, enabled: str, max_size: int, ttl: float):
+        """
+        Per-worker LRU cache of database rows, kept in sync between workers.
+
+        Values are loaded by the caller on a miss and stored with `put`.
+        `invalidate` drops a key once a change was committed, in this worker
+        right away and in the others as soon as the notification on `channel`
+        arrives. A lost notification is bounded by `ttl` seconds. Nothing is
+        sent while the setting named `enabled` is false.
+        """
+        self.channel = channel
+        self.enabled = enabled
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[KeyType, Tuple[ValueType, float]]" = OrderedDict()
+        # Bumped by every invalidation, a load that raced with one is not kept
+        self._generations: Dict[KeyType, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.lag_count = 0
+        self.lag_total = 0.0
+        self.lag_max = 0.0
+
+    def get(self, key: KeyType) -> Optional[ValueType]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[1] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            return None
+
+    def generation(self, key: KeyType) -> int:
+        """
+        Take before loading a value, pass the result to `put`.
+        """
+        with self._lock:
+            return self._generations.get(key, 0)
+
+    def put(self, key: KeyType, value: ValueType, generation: int) -> None:
+        with self._lock:
+            if self._generations.get(key, 0) != generation:
+                return
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def discard(self, key: KeyType, *, changed_at: Optional[float] = None) -> None:
+        """
+        Drop a key from this worker. `changed_at` is the wall clock time of the
+        change, the delay is recorded as staleness.
+        """
+        with self._lock:
+            self._generations[key] = self._generations.get(key, 0) + 1
+            self._entries.pop(key, None)
+            self.invalidations += 1
+            if changed_at is not None:
+                lag = max(time.time() - changed_at, 0.0)
+                self.lag_count += 1
+                self.lag_total += lag
+                self.lag_max = max(self.lag_max, lag)
+
+    def invalidate(self, key: KeyType) -> None:
+        """
+        Drop a key from every worker. Call after the change was committed.
+        """
+        self.discard(key)
+        if getattr(settings, self.enabled):
+            payload = json.dumps({"key": key, "changed_at": time.time()})
+            pubsub.notify(self.channel, payload)
+
+    def clear(self) -> None:
+        with self._lock:
+            for key in self._entries:
+                self._generations[key] = self._generations.get(key, 0) + 1
+            self._entries.clear()
+
+    def receive(self, payload: str) -> None:
+        message = json.loads(payload)
+        self.discard(message["key"], changed_at=message["changed_at"])
+
+    def subscribe(self) -> None:
+        if getattr(settings, self.enabled):
+            pubsub.subscribe(self.channel, self.receive)
+            # Invalidations sent while the listener was away are lost
+            pubsub.on_reconnect(self.clear)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            now = time.monotonic()
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "invalidation_lag_avg_ms": (
+                    self.lag_total / self.lag_count * 1000 if self.lag_count else 0.0
+                ),
+                "invalidation_lag_max_ms": self.lag_max * 1000,
+                "oldest_entry_age_s": max(
+                    (now - loaded_at for _, loaded_at in self._entries.values()),
+                    default=0.0,
+                ),
+            }
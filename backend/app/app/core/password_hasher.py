@@ -0,0 +1,250 @@
+import asyncio
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    CancelledError,
+    Future,
+    ProcessPoolExecutor,
+    wait,
+)
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import MIN_PASSWORD_HASH_ROUNDS, settings
+from app.core.security import (
+    configure_password_hashing,
+    get_password_hash,
+    verify_and_update_password,
+    verify_password,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordHasherBusy(Exception):
+    pass
+
+
+def _timed(func: Callable[..., Any], *args: Any) -> Tuple[Any, float, float]:
+    # Runs in a pool process, wall clock times are comparable between processes
+    started = time.time()
+    return func(*args), started, time.time()
+
+
+def _hash_many(passwords: Sequence[str]) -> List[str]:
+    return [get_password_hash(password) for password in passwords]
+
+
+class PasswordHasher:
+    def __init__(self, *, workers: int, max_queue: int):
+        """
+        Runs bcrypt in a pool of `workers` processes, so a burst of logins
+        neither holds the GIL nor the request threadpool the votes are served
+        from.
+
+        At most `max_queue` hashes wait for a free process, beyond that
+        `PasswordHasherBusy` is raised right away, which the API answers with
+        503. With no workers hashes run in the calling thread.
+        """
+        self.workers = workers
+        self.max_queue = max_queue
+        self._lock = threading.Lock()
+        self._bulk_lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._policy: Tuple[Any, ...] = ()
+        self._pending = 0
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.queue_time_total = 0.0
+        self.queue_time_max = 0.0
+        self.hash_time_total = 0.0
+
+    def _submit(self, func: Callable[..., Any], *args: Any) -> Future:
+        with self._lock:
+            if self._pending >= self.workers + self.max_queue:
+                self.rejected += 1
+                raise PasswordHasherBusy()
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=configure_password_hashing if self._policy else None,
+                    initargs=self._policy,
+                )
+            try:
+                task = self._executor.submit(_timed, func, *args)
+            except BrokenProcessPool:
+                self._executor = None
+                raise
+            self._pending += 1
+            self.submitted += 1
+        submitted_at = time.time()
+        # Callers wait on a future of their own that is only resolved once the
+        # task is no longer counted as pending, the pool wakes the waiters of
+        # `task` before it runs its callbacks
+        future: Future = Future()
+        future.set_running_or_notify_cancel()
+        task.add_done_callback(lambda task: self._done(task, future, submitted_at))
+        return future
+
+    def _done(self, task: Future, future: Future, submitted_at: float) -> None:
+        with self._lock:
+            self._pending -= 1
+            exception = None if task.cancelled() else task.exception()
+            if isinstance(exception, BrokenProcessPool):
+                logger.error("Password hashing process died, restarting the pool")
+                self._executor = None
+            elif not task.cancelled() and exception is None:
+                _, started, finished = task.result()
+                queue_time = max(started - submitted_at, 0.0)
+                self.completed += 1
+                self.queue_time_total += queue_time
+                self.queue_time_max = max(self.queue_time_max, queue_time)
+                self.hash_time_total += finished - started
+        if task.cancelled():
+            future.set_exception(CancelledError())
+        elif exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(task.result())
+
+    def configure(self, *, scheme: str, rounds: int) -> None:
+        """
+        Apply a hashing policy here and in the pool processes, which are
+        restarted.
+        """
+        configure_password_hashing(scheme, rounds)
+        with self._lock:
+            self._policy = (scheme, rounds)
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def hash(self, password: str) -> str:
+        if not self.workers:
+            return get_password_hash(password)
+        return self._submit(get_password_hash, password).result()[0]
+
+    def verify(self, password: str, hashed_password: str) -> bool:
+        if not self.workers:
+            return verify_password(password, hashed_password)
+        return self._submit(verify_password, password, hashed_password).result()[0]
+
+    def verify_and_update(
+        self, password: str, hashed_password: str
+    ) -> Tuple[bool, Optional[str]]:
+        if not self.workers:
+            return verify_and_update_password(password, hashed_password)
+        future = self._submit(verify_and_update_password, password, hashed_password)
+        return future.result()[0]
+
+    def hash_many(self, passwords: Sequence[str], *, chunk_size: int = 64) -> List[str]:
+        """
+        Hash `passwords` for a bulk import, `chunk_size` of them per task. At
+        most one task per process is in flight, the rest wait here instead of in
+        the queue of the pool. Concurrent imports take turns, so they are not
+        rejected for lack of a queue.
+        """
+        if not self.workers:
+            return _hash_many(passwords)
+        results: List[List[str]] = []
+        running: Dict[Future, int] = {}
+        with self._bulk_lock:
+            for start in range(0, len(passwords), chunk_size):
+                end = start + chunk_size
+                while len(running) >= self.workers:
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        results[running.pop(future)] = future.result()[0]
+                task = self._submit(_hash_many, passwords[start:end])
+                running[task] = len(results)
+                results.append([])
+            for future, index in running.items():
+                results[index] = future.result()[0]
+        return [hashed_password for chunk in results for hashed_password in chunk]
+
+    async def hash_async(self, password: str) -> str:
+        if not self.workers:
+            return await run_in_threadpool(get_password_hash, password)
+        future = self._submit(get_password_hash, password)
+        return (await asyncio.wrap_future(future))[0]
+
+    async def verify_async(self, password: str, hashed_password: str) -> bool:
+        if not self.workers:
+            return await run_in_threadpool(verify_password, password, hashed_password)
+        future = self._submit(verify_password, password, hashed_password)
+        return (await asyncio.wrap_future(future))[0]
+
+    async def verify_and_update_async(
+        self, password: str, hashed_password: str
+    ) -> Tuple[bool, Optional[str]]:
+        if not self.workers:
+            return await run_in_threadpool(
+                verify_and_update_password, password, hashed_password
+            )
+        future = self._submit(verify_and_update_password, password, hashed_password)
+        return (await asyncio.wrap_future(future))[0]
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "pending": self._pending,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "queue_time_avg_ms": (
+                    self.queue_time_total / self.completed * 1000
+                    if self.completed
+                    else 0.0
+                ),
+                "queue_time_max_ms": self.queue_time_max * 1000,
+                "hash_time_avg_ms": (
+                    self.hash_time_total / self.completed * 1000
+                    if self.completed
+                    else 0.0
+                ),
+            }
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS, max_queue=settings.PASSWORD_HASH_MAX_QUEUE
+)
+# Bulk imports hash in processes of their own, so they never hold up logins
+import_password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_IMPORT_WORKERS, max_queue=0
+)
+
+
+def get_password_rounds() -> int:
+    """
+    `PASSWORD_HASH_ROUNDS`, or the least rounds allowed for
+    `PASSWORD_HASH_SCHEME`.
+    """
+    rounds = settings.PASSWORD_HASH_ROUNDS
+    if rounds is None:
+        rounds = MIN_PASSWORD_HASH_ROUNDS[settings.PASSWORD_HASH_SCHEME]
+    return rounds
+
+
+def start_password_hashing() -> None:
+    rounds = get_password_rounds()
+    for hasher in (password_hasher, import_password_hasher):
+        hasher.configure(scheme=settings.PASSWORD_HASH_SCHEME, rounds=rounds)
+
+
+def stop_password_hashing() -> None:
+    password_hasher.shutdown()
+    import_password_hasher.shutdown()
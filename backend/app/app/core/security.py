@@ -1,11 +1,14 @@
+import enum
+import math
+import time
 from datetime import datetime, timedelta
-from typing import Any, Union
+from typing import Any, Optional, Tuple, Union
 
 from jose import jwt
 from passlib.context import CryptContext
+from passlib.hash import argon2, bcrypt
 
-from app.core.config import settings
-from app.schemas.event import Event
+from app.core.config import MIN_PASSWORD_HASH_ROUNDS, settings
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -27,41 +30,130 @@ def create_access_token(
     return encoded_jwt
 
 
+def create_event_token(
+    subject: Union[str, Any],
+    *,
+    event_id: int,
+    roles: "EventRole",
+    version: int,
+    expires_delta: timedelta = None,
+) -> str:
+    """
+    An access token that also carries the roles of the user in one event, as of
+    the roles version `version` of the event (see `crud.event.get_roles_version`).
+    """
+    if expires_delta:
+        expire = datetime.utcnow() + expires_delta
+    else:
+        expire = datetime.utcnow() + timedelta(
+            minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
+        )
+    to_encode = {
+        "exp": expire,
+        "sub": str(subject),
+        "event": event_id,
+        "roles": int(roles),
+        "ver": version,
+    }
+    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    """
+    Like `verify_password`, also returns a new hash of the password when the
+    stored one does not match the hashing policy anymore.
+    """
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
-def can_user_send_answer(user_id: int, event: Event):
+# argon2 memory per hash in KiB, its rounds are the number of passes
+ARGON2_MEMORY_COST = 64 * 1024
+
+
+def configure_password_hashing(scheme: str, rounds: int) -> None:
+    """
+    Hash new passwords with `scheme` at `rounds`. Stored hashes of the other
+    scheme or with fewer rounds need an update, see
+    `verify_and_update_password`.
+    """
+    pwd_context.load(
+        {
+            "schemes": ["bcrypt", "argon2"],
+            "default": scheme,
+            "deprecated": "auto",
+            f"{scheme}__default_rounds": rounds,
+            f"{scheme}__min_rounds": rounds,
+            "argon2__memory_cost": ARGON2_MEMORY_COST,
+        }
+    )
+
+
+def calibrate_password_rounds(scheme: str, target: float) -> int:
+    """
+    Rounds of `scheme` for which verifying a password takes about `target`
+    seconds on this machine, never fewer than `MIN_PASSWORD_HASH_ROUNDS`. bcrypt
+    doubles its cost with every round, argon2 grows linearly with its passes.
+    """
+    minimum = MIN_PASSWORD_HASH_ROUNDS[scheme]
+    if scheme == "bcrypt":
+        probe = bcrypt.using(rounds=8)
+    else:
+        probe = argon2.using(rounds=1, memory_cost=ARGON2_MEMORY_COST)
+    hashed_password = probe.hash("calibration")
+    elapsed = math.inf
+    for _ in range(3):
+        started = time.perf_counter()
+        probe.verify("calibration", hashed_password)
+        elapsed = min(elapsed, time.perf_counter() - started)
+    if scheme == "bcrypt":
+        return min(max(8 + round(math.log2(target / elapsed)), minimum), 20)
+    return max(round(target / elapsed), minimum)
+
+
+class EventRole(enum.IntFlag):
+    """Roles of a user in an event, see `crud.event.get_roles`"""
+
+    NONE = 0
+    OWNER = 1
+    PARTICIPANT = 2
+    VOTING_MODERATOR = 4
+    ACCESS_MODERATOR = 8
+
+
+def can_user_send_answer(roles: Optional[EventRole]) -> bool:
     """Returns True for participants"""
-    for user in event.participants:
-        if user.id == user_id:
-            return True
+    return bool(roles and roles & EventRole.PARTICIPANT)
 
 
-def can_user_manage_voting(user_id: int, event: Event):
+def can_user_manage_voting(roles: Optional[EventRole]) -> bool:
     """Returns True for voting moderators and event owners"""
-    can_manage = False
-    if event.owner_id != user_id:
-        return True
-    for user in event.voting_moderators:
-        if user.id == user_id:
-            can_manage = True
-    return can_manage
+    managers = EventRole.OWNER | EventRole.VOTING_MODERATOR
+    return bool(roles and roles & managers)
+
+
+def can_user_manage_access(roles: Optional[EventRole]) -> bool:
+    """Returns True for access moderators and event owners"""
+    managers = EventRole.OWNER | EventRole.ACCESS_MODERATOR
+    return bool(roles and roles & managers)
+
+
+def can_user_view_members(roles: Optional[EventRole]) -> bool:
+    """Returns True for moderators and event owners"""
+    viewers = EventRole.OWNER | EventRole.VOTING_MODERATOR | EventRole.ACCESS_MODERATOR
+    return bool(roles and roles & viewers)
 
 
-def can_user_view_poll_info(user_id: int, event: Event):
+def can_user_view_poll_info(roles: Optional[EventRole]) -> bool:
     """Returns True for participants, voting moderators and event owners"""
-    if event.owner_id != user_id:
-        return True
-    can_view = False
-    for user in event.voting_moderators:
-        if user.id == user_id:
-            can_view = True
-    for user in event.participants:
-        if user.id == user_id:
-            can_view = True
-    return can_view
+    viewers = EventRole.OWNER | EventRole.VOTING_MODERATOR | EventRole.PARTICIPANT
+    return bool(roles and roles & viewers)
@@ -0,0 +1,176 @@
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class StudentProfile(NamedTuple):
+    full_name: str
+    academic_group: str
+
+
+class StudentVerificationError(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class CircuitBreaker:
+    def __init__(self, *, failure_threshold: int, cooldown: float):
+        """
+        Stops calls to a failing service for `cooldown` seconds after
+        `failure_threshold` failures in a row, then lets one call through to
+        probe it.
+        """
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            # Half open: the next failure opens it again right away
+            self.opened_at = time.monotonic()
+            return True
+        return False
+
+    def succeeded(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+
+    def failed(self) -> None:
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                logger.warning("Student API failed %s times, pausing", self.failures)
+            self.opened_at = time.monotonic()
+
+
+class StudentProfileClient:
+    def __init__(
+        self,
+        *,
+        url: str,
+        timeout: float,
+        max_connections: int,
+        failure_threshold: int,
+        cooldown: float,
+        cache_ttl: float,
+        cache_size: int = 10000,
+    ):
+        """
+        Looks up students at lk.mirea.ru from the event loop.
+
+        One connection pool is shared by all requests of the worker, every call
+        is bounded by `timeout` seconds and a circuit breaker answers right away
+        while the service is down. Credentials are checked by logging in every
+        time, the profile that follows a successful login is cached by email for
+        `cache_ttl` seconds, so a retried registration skips fetching it again.
+        """
+        self.url = url
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.breaker = CircuitBreaker(
+            failure_threshold=failure_threshold, cooldown=cooldown
+        )
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, Tuple[StudentProfile, float]]" = OrderedDict()
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+        return self._client
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _call(
+        self, params: Dict[str, str], headers: Optional[Dict[str, str]], error: str
+    ) -> Dict[str, Any]:
+        if not self.breaker.allow():
+            raise StudentVerificationError(
+                503, "Student verification is unavailable, try again later"
+            )
+        try:
+            response = await self._get_client().get(
+                self.url, params=params, headers=headers
+            )
+        except httpx.TimeoutException:
+            self.breaker.failed()
+            raise StudentVerificationError(504, "Student verification timed out")
+        except httpx.HTTPError:
+            self.breaker.failed()
+            raise StudentVerificationError(502, error)
+        if response.status_code >= 500:
+            self.breaker.failed()
+        else:
+            self.breaker.succeeded()
+        if response.status_code != 200:
+            raise StudentVerificationError(response.status_code, error)
+        data = response.json()
+        if "errors" in data:
+            raise StudentVerificationError(400, data["errors"][0])
+        return data
+
+    async def get_profile(self, *, email: str, password: str) -> StudentProfile:
+        login = await self._call(
+            {"action": "login", "login": email, "password": password},
+            None,
+            "error when trying to log in",
+        )
+        cached = self._cache.get(email)
+        if cached is not None and time.monotonic() - cached[1] < self.cache_ttl:
+            return cached[0]
+
+        data = await self._call(
+            {"action": "getData", "url": "https://lk.mirea.ru/profile/"},
+            {"Authorization": login["token"]},
+            "error when trying to get profile data",
+        )
+        name = data["arUser"]["NAME"]
+        last_name = data["arUser"]["LAST_NAME"]
+        second_name = data["arUser"]["SECOND_NAME"]
+        student = list(data["STUDENTS"].values())[0]
+        profile = StudentProfile(
+            full_name=f"{name} {second_name} {last_name}",
+            academic_group=student["PROPERTIES"]["ACADEMIC_GROUP"]["VALUE_TEXT"],
+        )
+
+        self._cache[email] = (profile, time.monotonic())
+        self._cache.move_to_end(email)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return profile
+
+
+student_profiles = StudentProfileClient(
+    url=settings.STUDENT_API_URL,
+    timeout=settings.STUDENT_API_TIMEOUT_SECONDS,
+    max_connections=settings.STUDENT_API_MAX_CONNECTIONS,
+    failure_threshold=settings.STUDENT_API_FAILURE_THRESHOLD,
+    cooldown=settings.STUDENT_API_COOLDOWN_SECONDS,
+    cache_ttl=settings.STUDENT_PROFILE_CACHE_SECONDS,
+)
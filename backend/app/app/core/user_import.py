@@ -0,0 +1,145 @@
+import csv
+import io
+import json
+from collections import Counter
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.core.password_hasher import PasswordHasher, import_password_hasher
+from app.schemas.user import UserCreate
+from app.schemas.user_import import UserImportReport, UserImportRow
+
+FORMATS = ("csv", "jsonl")
+# Columns an import may set, superusers are never created in bulk
+COLUMNS = ("email", "password", "full_name", "academic_group", "is_student")
+
+
+class UserImportError(Exception):
+    pass
+
+
+def guess_format(filename: str) -> str:
+    file_format = filename.rsplit(".", 1)[-1].lower()
+    if file_format not in FORMATS:
+        raise UserImportError("Unsupported file format, use CSV or JSONL")
+    return file_format
+
+
+def read_rows(
+    content: str, *, file_format: str
+) -> Iterator[Tuple[int, Optional[Dict[str, Any]]]]:
+    """
+    Rows of a CSV file with a header row or of a JSONL file with the line they
+    start on, None for the lines that are not a JSON object.
+    """
+    if file_format == "csv":
+        reader = csv.DictReader(io.StringIO(content))
+        reader.fieldnames  # Reads the header row
+        line = reader.line_num + 1
+        for row in reader:
+            yield line, {
+                column: value
+                for column, value in row.items()
+                if column is not None and value
+            }
+            line = reader.line_num + 1
+        return
+    for line, text in enumerate(content.splitlines(), start=1):
+        if not text.strip():
+            continue
+        try:
+            value = json.loads(text)
+        except ValueError:
+            value = None
+        yield line, value if isinstance(value, dict) else None
+
+
+def import_users(
+    db: Session,
+    content: str,
+    *,
+    file_format: str,
+    hasher: PasswordHasher = import_password_hasher,
+    chunk_size: int = 1000,
+) -> UserImportReport:
+    """
+    Create the users of a CSV or JSONL file.
+
+    Rows are validated like `POST /users/`, emails repeated in the file or
+    already taken are found with one query, the passwords of the rest are hashed
+    in the process pool of `hasher`, by default not the one logins use, and the
+    users are inserted `chunk_size` at a time. Every row gets a line in the
+    report.
+    """
+    rows: List[UserImportRow] = []
+    new_users: Dict[str, Tuple[UserImportRow, UserCreate]] = {}
+    for line, values in read_rows(content, file_format=file_format):
+        if values is None:
+            rows.append(
+                UserImportRow(row=line, status="invalid", detail="Not a JSON object")
+            )
+            continue
+        try:
+            user_in = UserCreate(
+                **{column: values[column] for column in COLUMNS if column in values}
+            )
+        except ValidationError as exc:
+            error = exc.errors()[0]
+            email = values.get("email")
+            rows.append(
+                UserImportRow(
+                    row=line,
+                    email=None if email is None else str(email),
+                    status="invalid",
+                    detail=f"{error['loc'][0]}: {error['msg']}",
+                )
+            )
+            continue
+        row = UserImportRow(row=line, email=user_in.email, status="created")
+        rows.append(row)
+        if user_in.email in new_users:
+            row.status = "duplicate"
+            row.detail = f"Repeats row {new_users[user_in.email][0].row}"
+            continue
+        new_users[user_in.email] = (row, user_in)
+
+    for email in crud.user.get_existing_emails(db, emails=new_users.keys()):
+        row, _ = new_users.pop(email)
+        row.status = "duplicate"
+        row.detail = "The user with this username already exists in the system"
+
+    users = list(new_users.values())
+    hashed_passwords = hasher.hash_many([user_in.password for _, user_in in users])
+    ids = crud.user.create_multi(
+        db,
+        rows=[
+            {
+                "email": user_in.email,
+                "hashed_password": hashed_password,
+                "full_name": user_in.full_name,
+                "academic_group": user_in.academic_group,
+                "is_student": user_in.is_student,
+                "is_active": True,
+                "is_superuser": False,
+            }
+            for (_, user_in), hashed_password in zip(users, hashed_passwords)
+        ],
+        chunk_size=chunk_size,
+    )
+    for row, user_in in users:
+        row.id = ids.get(user_in.email)
+        if row.id is None:
+            # Registered while the passwords were hashed
+            row.status = "duplicate"
+            row.detail = "The user with this username already exists in the system"
+
+    counts = Counter(row.status for row in rows)
+    return UserImportReport(
+        created=counts["created"],
+        duplicates=counts["duplicate"],
+        invalid=counts["invalid"],
+        rows=rows,
+    )
@@ -0,0 +1,227 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
+from collections import Counter
+from functools import partial
+from typing import Callable, List, Optional, Set, Tuple
+
+from app import crud
+from app.core.config import settings
+from app.core.vote_journal import Segment, Vote, VoteJournal, replay_orphaned
+from app.db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+class VoteBufferFull(Exception):
+    pass
+
+
+class VoteBuffer:
+    def __init__(
+        self,
+        write: Callable[[List[Vote]], None],
+        *,
+        max_size: int,
+        batch_size: int,
+        max_latency: float,
+        retries: int = 3,
+        journal: Optional[VoteJournal] = None,
+    ):
+        """
+        Write-behind buffer for votes that were already checked for eligibility.
+
+        `put` queues a vote and returns at once; a background thread collects
+        queued votes for at most `max_latency` seconds or `batch_size` votes and
+        passes them to `write`. A failed batch is retried `retries` times before
+        it is given up. `stop` writes everything still queued.
+
+        Without a `journal` votes accepted by a process that is killed, or given
+        up, are lost. With one, `put` returns only after the vote is on disk and
+        the votes that did not reach the database stay in the journal until the
+        next `start` replays them.
+        """
+        self.write = write
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.max_latency = max_latency
+        self.retries = retries
+        self.journal = journal
+        self._queue: "queue.Queue[Optional[Tuple[Vote, Optional[Segment]]]]" = (
+            queue.Queue()
+        )
+        self._pending: Set[Tuple[int, int]] = set()
+        self._putting = 0
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        with self._condition:
+            if self._thread is not None:
+                return
+            if self.journal is not None:
+                replayed = replay_orphaned(
+                    self.journal.directory, self.write, batch_size=self.batch_size
+                )
+                if replayed:
+                    logger.info("Replayed %s journaled vote(s)", replayed)
+                self.journal.open()
+            self._thread = threading.Thread(
+                target=self._write_forever, name="vote-buffer", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        with self._condition:
+            thread = self._thread
+            if thread is None:
+                return
+            self._thread = None
+            # Votes being journaled are queued after the sentinel otherwise
+            while self._putting:
+                self._condition.wait()
+        self._queue.put(None)
+        thread.join(timeout)
+        if self.journal is not None:
+            self.journal.close()
+
+    def put(self, vote: Vote) -> bool:
+        """
+        Queue a vote. Returns `False` if a vote of the same owner for the same
+        poll is still queued, raises `VoteBufferFull` if the buffer is full or
+        not running.
+        """
+        key = (vote["poll_id"], vote["owner_id"])
+        with self._condition:
+            if self._thread is None or len(self._pending) >= self.max_size:
+                raise VoteBufferFull()
+            if key in self._pending:
+                return False
+            self._pending.add(key)
+            self._putting += 1
+        try:
+            segment = self.journal.append(vote) if self.journal else None
+        except OSError:
+            logger.exception("Journaling a vote failed")
+            with self._condition:
+                self._pending.discard(key)
+            raise VoteBufferFull()
+        finally:
+            with self._condition:
+                self._putting -= 1
+                self._condition.notify_all()
+        self._queue.put((vote, segment))
+        return True
+
+    def _write_forever(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.max_latency
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._write_batch(batch)
+        # Votes queued while the last batches were written
+        batch = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                batch.append(item)
+        for start in range(0, len(batch), self.batch_size):
+            end = start + self.batch_size
+            self._write_batch(batch[start:end])
+
+    def _write_batch(self, batch: List[Tuple[Vote, Optional[Segment]]]) -> None:
+        votes = [vote for vote, _ in batch]
+        delay = 0.1
+        for attempt in range(self.retries + 1):
+            try:
+                self.write(votes)
+            except Exception:
+                if attempt == self.retries:
+                    if self.journal is None:
+                        logger.exception("Dropped %s vote(s): %s", len(votes), votes)
+                    else:
+                        logger.exception(
+                            "Writing %s vote(s) failed, they are replayed from "
+                            "the journal on restart",
+                            len(votes),
+                        )
+                    break
+                logger.exception("Writing %s vote(s) failed, retrying", len(votes))
+                time.sleep(delay)
+                delay *= 2
+            else:
+                if self.journal is not None:
+                    for segment, count in Counter(
+                        segment for _, segment in batch
+                    ).items():
+                        self.journal.done(segment, count)
+                break
+        with self._condition:
+            for vote in votes:
+                self._pending.discard((vote["poll_id"], vote["owner_id"]))
+
+
+def write_votes(votes: List[Vote]) -> None:
+    db = SessionLocal()
+    try:
+        crud.answer.create_multi_with_owners(db, votes=votes)
+    finally:
+        db.close()
+
+
+vote_buffer = VoteBuffer(
+    write_votes,
+    max_size=settings.VOTE_BUFFER_SIZE,
+    batch_size=settings.VOTE_BUFFER_BATCH_SIZE,
+    max_latency=settings.VOTE_BUFFER_MAX_LATENCY_MS / 1000,
+    journal=(
+        VoteJournal(
+            settings.VOTE_JOURNAL_DIR,
+            fsync_interval=settings.VOTE_JOURNAL_FSYNC_INTERVAL_MS / 1000,
+            segment_size=settings.VOTE_JOURNAL_SEGMENT_SIZE,
+        )
+        if settings.VOTE_JOURNAL_DIR
+        else None
+    ),
+)
+
+
+async def start_vote_buffer() -> None:
+    loop = asyncio.get_running_loop()
+    if settings.VOTE_INGESTION_MODE == "buffered":
+        await loop.run_in_executor(None, vote_buffer.start)
+    elif vote_buffer.journal is not None:
+        # Votes journaled before switching back to direct mode
+        await loop.run_in_executor(
+            None,
+            partial(
+                replay_orphaned,
+                vote_buffer.journal.directory,
+                write_votes,
+                batch_size=vote_buffer.batch_size,
+            ),
+        )
+
+
+async def stop_vote_buffer() -> None:
+    await asyncio.get_running_loop().run_in_executor(None, vote_buffer.stop)
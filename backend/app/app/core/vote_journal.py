@@ -0,0 +1,269 @@
+import fcntl
+import glob
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from typing import Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+Vote = Dict[str, int]
+
+# poll_id, answer_option_id, owner_id and the CRC32 of the three
+RECORD = struct.Struct("<qqqI")
+PAYLOAD = struct.Struct("<qqq")
+
+
+def pack_vote(vote: Vote) -> bytes:
+    payload = PAYLOAD.pack(vote["poll_id"], vote["answer_option_id"], vote["owner_id"])
+    return payload + struct.pack("<I", zlib.crc32(payload))
+
+
+def read_votes(path: str) -> Iterator[Vote]:
+    """
+    Votes of a journal segment in the order they were appended. A record cut
+    short or garbled by a crash ends the segment; it was never acknowledged.
+    """
+    with open(path, "rb") as file:
+        size = os.fstat(file.fileno()).st_size
+        if size == 0:
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            for offset in range(0, size - RECORD.size + 1, RECORD.size):
+                poll_id, answer_option_id, owner_id, crc = RECORD.unpack_from(
+                    data, offset
+                )
+                end = offset + PAYLOAD.size
+                payload = data[offset:end]
+                if zlib.crc32(payload) != crc:
+                    logger.warning("Torn record at %s in %s", offset, path)
+                    return
+                yield {
+                    "poll_id": poll_id,
+                    "answer_option_id": answer_option_id,
+                    "owner_id": owner_id,
+                }
+
+
+class Segment:
+    def __init__(self, path: str):
+        self.path = path
+        # Created under a name replayers skip and only renamed once locked, so
+        # no other process can take the segment for an orphan in between
+        creating = f"{path}.tmp"
+        self.fd = os.open(creating, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+        # Tells replayers of other processes that this segment is in use
+        fcntl.flock(self.fd, fcntl.LOCK_EX)
+        os.rename(creating, path)
+        self.size = 0
+        self.outstanding = 0
+        self.sealed = False
+
+
+class VoteJournal:
+    def __init__(self, directory: str, *, fsync_interval: float, segment_size: int):
+        """
+        Append-only, crash-safe record of accepted votes.
+
+        `append` returns once the vote is on disk. Appends of concurrent callers
+        are made durable together by one `fsync` at most every
+        `fsync_interval` seconds. Votes are written to segment files of about
+        `segment_size` bytes; a segment is deleted once `done` was called for
+        every vote in it. Segments left behind by a process that died are read
+        back with `replay_orphaned`.
+        """
+        self.directory = directory
+        self.fsync_interval = fsync_interval
+        self.segment_size = segment_size
+        self._condition = threading.Condition()
+        self._segment: Optional[Segment] = None
+        self._segments: List[Segment] = []
+        self._unsynced: List[Segment] = []
+        self._syncing: List[Segment] = []
+        self._appended = 0
+        self._synced = 0
+        self._failed: Optional[OSError] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def open(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        with self._condition:
+            self._failed = None
+            self._segment = self._new_segment()
+            self._thread = threading.Thread(
+                target=self._sync_forever, name="vote-journal", daemon=True
+            )
+            self._thread.start()
+
+    def close(self) -> None:
+        with self._condition:
+            thread, self._thread = self._thread, None
+            self._condition.notify_all()
+        if thread is not None:
+            thread.join()
+        with self._condition:
+            self._segment = None
+            for segment in list(self._segments):
+                segment.sealed = True
+                self._release_if_done(segment)
+                if segment.fd >= 0:
+                    # Votes that never reached the database, kept for replay
+                    os.close(segment.fd)
+                    segment.fd = -1
+            self._segments = []
+
+    def _new_segment(self) -> Segment:
+        name = f"votes-{os.getpid()}-{time.time_ns()}.log"
+        segment = Segment(os.path.join(self.directory, name))
+        self._segments.append(segment)
+        return segment
+
+    def append(self, vote: Vote) -> Segment:
+        """
+        Write a vote and wait until it is durable. Returns the segment to pass
+        to `done` once the vote is stored in the database.
+        """
+        record = pack_vote(vote)
+        with self._condition:
+            segment = self._segment
+            if segment is None:
+                raise OSError("Vote journal is closed")
+            if segment.size >= self.segment_size:
+                segment = self._rotate(segment)
+            os.write(segment.fd, record)
+            segment.size += len(record)
+            segment.outstanding += 1
+            if segment not in self._unsynced:
+                self._unsynced.append(segment)
+            self._appended += 1
+            ticket = self._appended
+            self._condition.notify_all()
+            while self._synced < ticket:
+                if self._failed is not None:
+                    raise self._failed
+                self._condition.wait()
+        return segment
+
+    def done(self, segment: Segment, count: int = 1) -> None:
+        with self._condition:
+            segment.outstanding -= count
+            self._release_if_done(segment)
+
+    def _rotate(self, segment: Segment) -> Segment:
+        segment.sealed = True
+        self._segment = self._new_segment()
+        self._release_if_done(segment)
+        return self._segment
+
+    def _release_if_done(self, segment: Segment) -> None:
+        if segment.sealed and segment.outstanding == 0 and segment.fd >= 0:
+            if segment in self._unsynced or segment in self._syncing:
+                # Released once its last records are synced
+                return
+            os.unlink(segment.path)
+            os.close(segment.fd)
+            segment.fd = -1
+            self._segments.remove(segment)
+
+    def _sync_forever(self) -> None:
+        while True:
+            with self._condition:
+                while self._thread is not None and self._appended == self._synced:
+                    self._condition.wait()
+                if self._appended == self._synced:
+                    return
+            # Let more appends join this fsync
+            time.sleep(self.fsync_interval)
+            with self._condition:
+                target = self._appended
+                self._syncing, self._unsynced = self._unsynced, []
+            try:
+                for segment in self._syncing:
+                    os.fsync(segment.fd)
+            except OSError as exc:
+                logger.exception("Vote journal fsync failed")
+                with self._condition:
+                    self._failed = exc
+                    self._condition.notify_all()
+                return
+            with self._condition:
+                self._synced = target
+                segments, self._syncing = self._syncing, []
+                for segment in segments:
+                    self._release_if_done(segment)
+                self._condition.notify_all()
+
+
+def _replay_batch(write: Callable[[List[Vote]], None], batch: List[Vote]) -> List[Vote]:
+    """
+    Write a batch, and vote by vote if it fails. Returns the votes that failed.
+    """
+    try:
+        write(batch)
+        return []
+    except Exception:
+        logger.exception("Replaying %s vote(s) failed, retrying one by one", len(batch))
+    failed = []
+    for vote in batch:
+        try:
+            write([vote])
+        except Exception:
+            logger.exception("Replaying vote %s failed", vote)
+            failed.append(vote)
+    return failed
+
+
+def replay_orphaned(
+    directory: str, write: Callable[[List[Vote]], None], *, batch_size: int
+) -> int:
+    """
+    Pass the votes of every segment in `directory` that no live process holds to
+    `write`, in batches, then delete the segment. `write` must be idempotent,
+    votes written before the crash are replayed as well. Votes `write` keeps
+    failing for are moved to a `.failed` file next to the segment, in the same
+    format, so that one bad vote does not stop the others or the startup.
+    Returns the number of replayed votes.
+    """
+    replayed = 0
+    for path in sorted(glob.glob(os.path.join(directory, "votes-*.log"))):
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                continue
+            if not os.path.exists(path):
+                # Another replayer finished it while we waited for the lock
+                continue
+            failed: List[Vote] = []
+            batch: List[Vote] = []
+            for vote in read_votes(path):
+                batch.append(vote)
+                if len(batch) == batch_size:
+                    failed += _replay_batch(write, batch)
+                    replayed += len(batch)
+                    batch = []
+            if batch:
+                failed += _replay_batch(write, batch)
+                replayed += len(batch)
+            replayed -= len(failed)
+            if failed:
+                with open(f"{path}.failed", "ab") as file:
+                    file.write(b"".join(pack_vote(vote) for vote in failed))
+                    file.flush()
+                    os.fsync(file.fileno())
+                logger.error(
+                    "Moved %s vote(s) of %s that could not be replayed to %s.failed",
+                    len(failed),
+                    path,
+                    path,
+                )
+            os.unlink(path)
+            logger.info("Replayed vote journal segment %s", path)
+        finally:
+            os.close(fd)
+    return replayed
@@ -1,10 +1,11 @@
 from .crud_access_log import access_log
-from .crud_answer import answer
-from .crud_answer_option import answer_option
-from .crud_event import event
+from .crud_answer import answer, async_answer
+from .crud_answer_option import answer_option, async_answer_option
+from .crud_answer_tally import answer_tally
+from .crud_event import async_event, event
 from .crud_item import item
-from .crud_poll import poll
-from .crud_user import user
+from .crud_poll import async_poll, poll
+from .crud_user import async_user, user
 
 # For a new basic set of CRUD operations you could just do
 
@@ -1,14 +1,110 @@
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+from typing import (
+    Any,
+    Collection,
+    Dict,
+    Generic,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Type,
+    TypeVar,
+    Union,
+)
 
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import insert, inspect, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import (
+    Query,
+    Session,
+    joinedload,
+    load_only,
+    raiseload,
+    selectinload,
+)
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.sql import Select
 
 from app.db.base_class import Base
 
 ModelType = TypeVar("ModelType", bound=Base)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
+QueryType = TypeVar("QueryType", Query, Select)
+
+
+class Range(NamedTuple):
+    """
+    Filter value for the rows with `start <= column < end`, either bound may
+    be `None`.
+    """
+
+    start: Optional[Any] = None
+    end: Optional[Any] = None
+
+
+def build_filters(model: Type[Base], filters: Mapping[str, Any]) -> List[Any]:
+    """
+    Conditions on the columns of `model` from `filters`, column name to value:
+    a `Range` bounds the column, a list, tuple or set gives the values it may
+    take and anything else is the value it must equal. `None` values are left
+    out, so the optional parameters of an endpoint can be passed as they are.
+    """
+    columns = inspect(model).columns
+    conditions: List[Any] = []
+    for name, value in filters.items():
+        if value is None:
+            continue
+        column = columns[name]
+        if isinstance(value, Range):
+            if value.start is not None:
+                conditions.append(column >= value.start)
+            if value.end is not None:
+                conditions.append(column < value.end)
+        elif isinstance(value, (list, tuple, set, frozenset)):
+            conditions.append(column.in_(value))
+        else:
+            conditions.append(column == value)
+    return conditions
+
+
+def load_plan(
+    model: Type[Base],
+    schema: Type[BaseModel],
+    fields: Optional[Collection[str]] = None,
+) -> List[Any]:
+    """
+    Query options loading what `schema` serializes of `model` up front, so a
+    list costs the same number of queries whatever its length.
+
+    Relationships of nested schemas are loaded recursively, collections with
+    `selectinload` and single objects with `joinedload`. Every other
+    relationship raises when touched instead of loading lazily. With `fields`
+    only those are loaded, columns included.
+    """
+    mapper = inspect(model)
+    names = list(schema.__fields__) if fields is None else list(fields)
+    options: List[Any] = []
+    if fields is not None:
+        columns = [name for name in names if name in mapper.column_attrs]
+        options.append(load_only(*columns or ["id"]))
+    for name in names:
+        relationship = mapper.relationships.get(name)
+        nested = schema.__fields__[name].type_
+        if relationship is None or not (
+            isinstance(nested, type) and issubclass(nested, BaseModel)
+        ):
+            continue
+        attribute = getattr(model, name)
+        loader = (
+            selectinload(attribute) if relationship.uselist else joinedload(attribute)
+        )
+        options.append(loader.options(*load_plan(relationship.mapper.class_, nested)))
+    options.append(raiseload("*"))
+    return options
 
 
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
@@ -23,40 +119,136 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         """
         self.model = model
 
-    def get(self, db: Session, id: Any) -> Optional[ModelType]:
-        return db.query(self.model).filter(self.model.id == id).first()
+    def load_plan(
+        self, schema: Type[BaseModel], fields: Optional[Collection[str]] = None
+    ) -> List[Any]:
+        """
+        Options for the `plan` of the read methods, see `load_plan`.
+        """
+        return load_plan(self.model, schema, fields)
+
+    def filter(
+        self, query: QueryType, filters: Optional[Mapping[str, Any]] = None
+    ) -> QueryType:
+        """
+        `query` narrowed down by `filters`, see `build_filters`.
+        """
+        if not filters:
+            return query
+        return query.filter(*build_filters(self.model, filters))
+
+    def page(
+        self,
+        query: QueryType,
+        *,
+        skip: int = 0,
+        limit: Optional[int] = 100,
+        after: Optional[int] = None,
+    ) -> QueryType:
+        """
+        `query` in id order: the `limit` rows following the row with id `after`,
+        found through the primary key index at any depth, past `skip` more rows,
+        which are read and thrown away.
+        """
+        if after is not None:
+            query = query.filter(self.model.id > after)
+        return query.order_by(self.model.id).offset(skip).limit(limit)
+
+    def get(
+        self, db: Session, id: Any, *, plan: Sequence[Any] = ()
+    ) -> Optional[ModelType]:
+        return db.query(self.model).options(*plan).filter(self.model.id == id).first()
 
     def get_multi(
-        self, db: Session, *, skip: int = 0, limit: int = 100
+        self,
+        db: Session,
+        *,
+        skip: int = 0,
+        limit: Optional[int] = 100,
+        after: Optional[int] = None,
+        filters: Optional[Mapping[str, Any]] = None,
+        plan: Sequence[Any] = (),
     ) -> List[ModelType]:
-        return db.query(self.model).offset(skip).limit(limit).all()
+        query = self.filter(db.query(self.model).options(*plan), filters)
+        return self.page(query, skip=skip, limit=limit, after=after).all()
 
-    def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
-        obj_in_data = jsonable_encoder(obj_in)
-        db_obj = self.model(**obj_in_data)  # type: ignore
-        db.add(db_obj)
+    def commit(self, db: Session, *db_objs: ModelType) -> None:
+        """
+        Commit, keeping the column values of `db_objs` loaded. Committing
+        expires them and the next access would read them back with a `SELECT`.
+        """
+        keys = [attribute.key for attribute in inspect(self.model).column_attrs]
+        values = [
+            (
+                db_obj,
+                {key: db_obj.__dict__[key] for key in keys if key in db_obj.__dict__},
+            )
+            for db_obj in db_objs
+        ]
         db.commit()
-        db.refresh(db_obj)
+        for db_obj, obj_values in values:
+            for key, value in obj_values.items():
+                set_committed_value(db_obj, key, value)
+
+    def insert(
+        self, db: Session, *, values: Dict[str, Any], commit: bool = True
+    ) -> ModelType:
+        """
+        Insert a row with the column `values`. The row comes back from the
+        `INSERT ... RETURNING`, server defaults included, so nothing is read
+        after it. With `commit=False` the caller commits, e.g. after more writes
+        in the same transaction.
+        """
+        stmt = (
+            insert(self.model)
+            .values(**values)
+            .returning(*self.model.__table__.columns)  # type: ignore
+        )
+        db_obj = db.execute(select(self.model).from_statement(stmt)).scalar_one()
+        if commit:
+            self.commit(db, db_obj)
         return db_obj
 
+    def create(
+        self, db: Session, *, obj_in: CreateSchemaType, commit: bool = True
+    ) -> ModelType:
+        return self.insert(db, values=jsonable_encoder(obj_in), commit=commit)
+
     def update(
         self,
         db: Session,
         *,
         db_obj: ModelType,
-        obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]],
+        commit: bool = True,
     ) -> ModelType:
-        obj_data = jsonable_encoder(db_obj)
+        """
+        Update the columns of `db_obj` set in `obj_in` with an `UPDATE ...
+        RETURNING` that also loads the new values into `db_obj`. With
+        `commit=False` the caller commits.
+        """
         if isinstance(obj_in, dict):
             update_data = obj_in
         else:
             update_data = obj_in.dict(exclude_unset=True)
-        for field in obj_data:
-            if field in update_data:
-                setattr(db_obj, field, update_data[field])
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        columns = inspect(self.model).column_attrs
+        values = {
+            field: value for field, value in update_data.items() if field in columns
+        }
+        if values:
+            stmt = (
+                update(self.model)
+                .where(self.model.id == db_obj.id)
+                .values(**values)
+                .returning(*self.model.__table__.columns)  # type: ignore
+            )
+            db_obj = db.execute(
+                select(self.model)
+                .from_statement(stmt)
+                .execution_options(populate_existing=True)
+            ).scalar_one()
+        if commit:
+            self.commit(db, db_obj)
         return db_obj
 
     def remove(self, db: Session, *, id: int) -> ModelType:
@@ -64,3 +256,99 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         db.delete(obj)
         db.commit()
         return obj
+
+
+class AsyncCRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+    def __init__(self, model: Type[ModelType]):
+        """
+        CRUD object with the default methods of `CRUDBase` for an `AsyncSession`.
+
+        Relationships are not loaded lazily with an `AsyncSession`, load the
+        ones the caller needs with query options.
+
+        **Parameters**
+
+        * `model`: A SQLAlchemy model class
+        """
+        self.model = model
+
+    async def get(self, db: AsyncSession, id: Any) -> Optional[ModelType]:
+        result = await db.execute(select(self.model).where(self.model.id == id))
+        return result.scalars().first()
+
+    async def get_multi(
+        self,
+        db: AsyncSession,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[int] = None,
+    ) -> List[ModelType]:
+        query = select(self.model)
+        if after is not None:
+            query = query.where(self.model.id > after)
+        result = await db.execute(
+            query.order_by(self.model.id).offset(skip).limit(limit)
+        )
+        return result.scalars().all()
+
+    async def insert(
+        self, db: AsyncSession, *, values: Dict[str, Any], commit: bool = True
+    ) -> ModelType:
+        """
+        `CRUDBase.insert`, the session is expected not to expire on commit.
+        """
+        stmt = (
+            insert(self.model)
+            .values(**values)
+            .returning(*self.model.__table__.columns)  # type: ignore
+        )
+        result = await db.execute(select(self.model).from_statement(stmt))
+        db_obj = result.scalar_one()
+        if commit:
+            await db.commit()
+        return db_obj
+
+    async def create(
+        self, db: AsyncSession, *, obj_in: CreateSchemaType, commit: bool = True
+    ) -> ModelType:
+        return await self.insert(db, values=jsonable_encoder(obj_in), commit=commit)
+
+    async def update(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: ModelType,
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]],
+        commit: bool = True,
+    ) -> ModelType:
+        if isinstance(obj_in, dict):
+            update_data = obj_in
+        else:
+            update_data = obj_in.dict(exclude_unset=True)
+        columns = inspect(self.model).column_attrs
+        values = {
+            field: value for field, value in update_data.items() if field in columns
+        }
+        if values:
+            stmt = (
+                update(self.model)
+                .where(self.model.id == db_obj.id)
+                .values(**values)
+                .returning(*self.model.__table__.columns)  # type: ignore
+            )
+            result = await db.execute(
+                select(self.model)
+                .from_statement(stmt)
+                .execution_options(populate_existing=True)
+            )
+            db_obj = result.scalar_one()
+        if commit:
+            await db.commit()
+        return db_obj
+
+    async def remove(self, db: AsyncSession, *, id: int) -> ModelType:
+        obj = await db.get(self.model, id)
+        await db.delete(obj)
+        await db.commit()
+        return obj
@@ -1,8 +1,8 @@
-from typing import List
+from typing import List, Optional
 
 from sqlalchemy.orm import Session
 
-from app.crud.base import CRUDBase
+from app.crud.base import CRUDBase, Range
 from app.models.access_log import AccessLog
 from app.schemas.access_log import AccessLogCreate, AccessLogUpdate
 
@@ -15,49 +15,22 @@ class CRUDAccessLog(CRUDBase[AccessLog, AccessLogCreate, AccessLogUpdate]):
         event_id: int,
         skip: int = 0,
         limit: int = 100,
+        after: Optional[int] = None,
         given_by_id: int = None,
         received_id: int = None,
+        received_at: Optional[Range] = None,
     ) -> List[AccessLog]:
-        if given_by_id and received_id:
-            return (
-                db.query(self.model)
-                .filter(
-                    AccessLog.event_id == event_id,
-                    AccessLog.given_by_id == given_by_id,
-                    AccessLog.received_id == received_id,
-                )
-                .offset(skip)
-                .limit(limit)
-                .all()
-            )
-        elif given_by_id:
-            return (
-                db.query(self.model)
-                .filter(
-                    AccessLog.event_id == event_id,
-                    AccessLog.given_by_id == given_by_id,
-                )
-                .offset(skip)
-                .limit(limit)
-                .all()
-            )
-        elif received_id:
-            return (
-                db.query(self.model)
-                .filter(
-                    AccessLog.event_id == event_id,
-                    AccessLog.received_id == received_id,
-                )
-                .offset(skip)
-                .limit(limit)
-                .all()
-            )
-        return (
-            db.query(self.model)
-            .filter(AccessLog.event_id == event_id)
-            .offset(skip)
-            .limit(limit)
-            .all()
+        return super().get_multi(
+            db,
+            skip=skip,
+            limit=limit,
+            after=after,
+            filters={
+                "event_id": event_id,
+                "given_by_id": given_by_id,
+                "received_id": received_id,
+                "received_at": received_at,
+            },
         )
 
 
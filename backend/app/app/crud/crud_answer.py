@@ -1,38 +1,329 @@
-from typing import List
+from typing import Any, Collection, Dict, List, Optional, Sequence, Tuple
 
-from fastapi.encoders import jsonable_encoder
-from sqlalchemy.orm import Session
+from sqlalchemy import Integer, and_, column, exists, literal, select, values
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.sql import Select
 
 from app.models.answer import Answer
+from app.models.answer_option import AnswerOption
+from app.models.poll import Poll
+from app.models.user import User, user_events_association_table
 from app.schemas.answer import AnswerCreate, AnswerUpdate
 
-from .base import CRUDBase
+from .base import AsyncCRUDBase, CRUDBase, Range, build_filters
+from .crud_answer_tally import answer_tally
+
+
+def _eligible(*, obj_in: AnswerCreate, owner_id: int, check_membership: bool) -> Select:
+    eligible = (
+        select(AnswerOption.id, literal(owner_id), Poll.id)
+        .join(Poll, Poll.id == AnswerOption.poll_id)
+        .where(
+            AnswerOption.id == obj_in.answer_option_id,
+            Poll.id == obj_in.poll_id,
+            Poll.is_running.is_(True),
+        )
+    )
+    if check_membership:
+        eligible = eligible.where(
+            exists().where(
+                user_events_association_table.c.event_id == Poll.event_id,
+                user_events_association_table.c.user_id == owner_id,
+            )
+        )
+    return eligible
+
+
+def _eligibility_check(
+    *, obj_in: AnswerCreate, owner_id: int, check_membership: bool
+) -> Select:
+    eligible = _eligible(
+        obj_in=obj_in, owner_id=owner_id, check_membership=check_membership
+    ).where(~exists().where(Answer.poll_id == Poll.id, Answer.owner_id == owner_id))
+    return select(eligible.exists())
+
+
+def _vote_insert(
+    *, obj_in: AnswerCreate, owner_id: int, check_membership: bool
+) -> Select:
+    eligible = _eligible(
+        obj_in=obj_in, owner_id=owner_id, check_membership=check_membership
+    )
+    stmt = (
+        insert(Answer)
+        .from_select(["answer_option_id", "owner_id", "poll_id"], eligible)
+        .on_conflict_do_nothing(constraint="answer_poll_id_owner_id_key")
+        .returning(*Answer.__table__.c)
+    )
+    return select(Answer).from_statement(stmt)
 
 
 class CRUDAnswer(CRUDBase[Answer, AnswerCreate, AnswerUpdate]):
-    def get_multi_by_poll(self, db: Session, *, poll_id: int) -> List[Answer]:
-        return db.query(self.model).filter(Answer.poll_id == poll_id).all()
+    def get_multi_by_poll(
+        self,
+        db: Session,
+        *,
+        poll_id: int,
+        answer_option_id: Optional[Collection[int]] = None,
+        created_at: Optional[Range] = None,
+        limit: Optional[int] = None,
+        after: Optional[int] = None,
+        plan: Sequence[Any] = (),
+    ) -> List[Answer]:
+        query = self.filter(
+            db.query(self.model).options(*plan),
+            {
+                "poll_id": poll_id,
+                "answer_option_id": answer_option_id,
+                "created_at": created_at,
+            },
+        )
+        return self.page(query, limit=limit, after=after).all()
 
     def get_multi_by_owner(
         self, db: Session, *, owner_id: int, poll_id: int = None
     ) -> List[Answer]:
-        if poll_id:
-            return (
-                db.query(self.model)
-                .filter(Answer.owner_id == owner_id, Answer.poll_id == poll_id)
-                .all()
-            )
-        return db.query(self.model).filter(Answer.owner_id == owner_id).all()
+        query = db.query(self.model)
+        return self.filter(query, {"owner_id": owner_id, "poll_id": poll_id}).all()
+
+    def is_eligible(
+        self,
+        db: Session,
+        *,
+        obj_in: AnswerCreate,
+        owner_id: int,
+        check_membership: bool = True,
+    ) -> bool:
+        """
+        Check in one query that `create_with_owner` would store the vote right
+        now, without writing anything.
+        """
+        stmt = _eligibility_check(
+            obj_in=obj_in, owner_id=owner_id, check_membership=check_membership
+        )
+        return db.execute(stmt).scalar()
 
     def create_with_owner(
-        self, db: Session, *, obj_in: AnswerCreate, owner_id: int
-    ) -> Answer:
-        obj_in_data = jsonable_encoder(obj_in)
-        db_obj = self.model(**obj_in_data, owner_id=owner_id)
-        db.add(db_obj)
+        self,
+        db: Session,
+        *,
+        obj_in: AnswerCreate,
+        owner_id: int,
+        check_membership: bool = True,
+    ) -> Optional[Answer]:
+        """
+        Store a vote with a single `INSERT ... SELECT ... ON CONFLICT DO NOTHING
+        RETURNING` statement.
+
+        The row is only written if the answer option belongs to the poll, the poll
+        is running and, unless `check_membership` is disabled, the owner is a
+        participant of the poll's event. Repeated votes are rejected by the
+        `answer_poll_id_owner_id_key` constraint. Returns `None` if nothing was
+        inserted; the returned answer is detached from the session.
+        """
+        stmt = _vote_insert(
+            obj_in=obj_in, owner_id=owner_id, check_membership=check_membership
+        )
+        db_obj = db.execute(stmt).scalars().first()
+        if db_obj is None:
+            db.rollback()
+            return None
+        answer_tally.add(
+            db,
+            poll_id=db_obj.poll_id,
+            answer_option_id=db_obj.answer_option_id,
+            owner_id=owner_id,
+        )
+        # Keep the loaded values instead of expiring them on commit
+        db.expunge(db_obj)
+        db.commit()
+        return db_obj
+
+    def create_multi_with_owners(
+        self, db: Session, *, votes: Sequence[Dict[str, int]]
+    ) -> List[Answer]:
+        """
+        Store a batch of already validated votes, each a dict with `poll_id`,
+        `answer_option_id` and `owner_id`, with one `INSERT ... SELECT` and one
+        tally upsert, and commit.
+
+        If an owner has several votes for a poll in the batch the first one wins,
+        like it would have if they were stored one by one; votes of owners who
+        already have an answer are skipped. Votes whose answer option or owner
+        was deleted since they were validated are skipped as well, instead of
+        failing the batch. A vote validated while its poll was running is stored
+        even if the poll was stopped since, it was already acknowledged. Returns
+        the inserted answers.
+        """
+        rows: Dict[Tuple[int, int], Dict[str, int]] = {}
+        for vote in votes:
+            key = (vote["poll_id"], vote["owner_id"])
+            if key not in rows:
+                rows[key] = {
+                    "poll_id": vote["poll_id"],
+                    "answer_option_id": vote["answer_option_id"],
+                    "owner_id": vote["owner_id"],
+                }
+        if not rows:
+            return []
+        batch = values(
+            column("poll_id", Integer),
+            column("answer_option_id", Integer),
+            column("owner_id", Integer),
+            name="vote",
+        ).data(
+            [
+                (row["poll_id"], row["answer_option_id"], row["owner_id"])
+                for row in rows.values()
+            ]
+        )
+        existing = (
+            select(batch.c.answer_option_id, batch.c.owner_id, batch.c.poll_id)
+            .join(
+                AnswerOption,
+                and_(
+                    AnswerOption.id == batch.c.answer_option_id,
+                    AnswerOption.poll_id == batch.c.poll_id,
+                ),
+            )
+            .join(User, User.id == batch.c.owner_id)
+            # Like the foreign key checks, keeps the rows from being deleted
+            # before the insert
+            .with_for_update(read=True, key_share=True, of=[AnswerOption, User])
+        )
+        stmt = (
+            insert(Answer)
+            .from_select(["answer_option_id", "owner_id", "poll_id"], existing)
+            .on_conflict_do_nothing(constraint="answer_poll_id_owner_id_key")
+            .returning(*Answer.__table__.c)
+        )
+        db_objs = db.execute(select(Answer).from_statement(stmt)).scalars().all()
+        answer_tally.add_multi(db, answers=db_objs)
+        for db_obj in db_objs:
+            db.expunge(db_obj)
         db.commit()
-        db.refresh(db_obj)
+        return db_objs
+
+    def update_with_owner(
+        self, db: Session, *, obj_in: AnswerUpdate, owner_id: int
+    ) -> Optional[Answer]:
+        """
+        Move the owner's answer in `obj_in.poll_id` to another answer option and
+        shift one vote between the option tallies in the same transaction.
+        """
+        db_obj = (
+            db.query(self.model)
+            .filter(Answer.poll_id == obj_in.poll_id, Answer.owner_id == owner_id)
+            .with_for_update()
+            .first()
+        )
+        if not db_obj:
+            return None
+        previous_option_id = db_obj.answer_option_id
+        if previous_option_id != obj_in.answer_option_id:
+            db_obj.answer_option_id = obj_in.answer_option_id
+            db.flush()
+            # Counter rows are always locked in (answer_option_id, shard) order,
+            # so two voters moving in opposite directions cannot deadlock
+            moves = sorted(
+                [(previous_option_id, -1), (obj_in.answer_option_id, 1)],
+                key=lambda move: (move[0], answer_tally.shard_for(owner_id)),
+            )
+            for answer_option_id, amount in moves:
+                answer_tally.add(
+                    db,
+                    poll_id=db_obj.poll_id,
+                    answer_option_id=answer_option_id,
+                    owner_id=owner_id,
+                    amount=amount,
+                )
+        self.commit(db, db_obj)
+        return db_obj
+
+
+class AsyncCRUDAnswer(AsyncCRUDBase[Answer, AnswerCreate, AnswerUpdate]):
+    async def get_multi_by_poll(
+        self,
+        db: AsyncSession,
+        *,
+        poll_id: int,
+        answer_option_id: Optional[Collection[int]] = None,
+        created_at: Optional[Range] = None,
+        limit: Optional[int] = None,
+        after: Optional[int] = None,
+    ) -> List[Answer]:
+        query = select(self.model).where(
+            *build_filters(
+                Answer,
+                {
+                    "poll_id": poll_id,
+                    "answer_option_id": answer_option_id,
+                    "created_at": created_at,
+                },
+            )
+        )
+        if after is not None:
+            query = query.where(Answer.id > after)
+        result = await db.execute(
+            query.options(
+                joinedload(Answer.owner),
+                joinedload(Answer.poll).joinedload(Poll.owner),
+            )
+            .order_by(Answer.id)
+            .limit(limit)
+        )
+        return result.scalars().all()
+
+    async def is_eligible(
+        self,
+        db: AsyncSession,
+        *,
+        obj_in: AnswerCreate,
+        owner_id: int,
+        check_membership: bool = True,
+    ) -> bool:
+        stmt = _eligibility_check(
+            obj_in=obj_in, owner_id=owner_id, check_membership=check_membership
+        )
+        return (await db.execute(stmt)).scalar()
+
+    async def create_with_owner(
+        self,
+        db: AsyncSession,
+        *,
+        obj_in: AnswerCreate,
+        owner_id: int,
+        check_membership: bool = True,
+    ) -> Optional[Answer]:
+        """
+        Same as `CRUDAnswer.create_with_owner`.
+        """
+        stmt = _vote_insert(
+            obj_in=obj_in, owner_id=owner_id, check_membership=check_membership
+        )
+        db_obj = (await db.execute(stmt)).scalars().first()
+        if db_obj is None:
+            await db.rollback()
+            return None
+        shard = (
+            await db.execute(
+                answer_tally.upsert(
+                    poll_id=db_obj.poll_id,
+                    answer_option_id=db_obj.answer_option_id,
+                    owner_id=owner_id,
+                )
+            )
+        ).one()
+        answer_tally.track(
+            db.sync_session,
+            poll_id=db_obj.poll_id,
+            rows=[shard],
+        )
+        await db.commit()
         return db_obj
 
 
 answer = CRUDAnswer(Answer)
+async_answer = AsyncCRUDAnswer(Answer)
@@ -1,16 +1,34 @@
-from typing import List
+from typing import Any, List, Optional, Sequence
 
 from sqlalchemy.orm import Session
 
 from app.models.answer_option import AnswerOption
+from app.models.poll import Poll
 from app.schemas.answer_option import AnswerOptionCreate, AnswerOptionUpdate
 
-from .base import CRUDBase
+from .base import AsyncCRUDBase, CRUDBase
 
 
 class CRUDAnswerOption(CRUDBase[AnswerOption, AnswerOptionCreate, AnswerOptionUpdate]):
-    def get_multi_by_event(self, db: Session, *, event_id: int) -> List[AnswerOption]:
-        return db.query(self.model).filter(AnswerOption.event_id == event_id).all()
+    def get_multi_by_event(
+        self,
+        db: Session,
+        *,
+        event_id: int,
+        limit: Optional[int] = None,
+        after: Optional[int] = None,
+        plan: Sequence[Any] = (),
+    ) -> List[AnswerOption]:
+        query = (
+            db.query(self.model)
+            .options(*plan)
+            .join(Poll, Poll.id == AnswerOption.poll_id)
+            .filter(Poll.event_id == event_id)
+        )
+        return self.page(query, limit=limit, after=after).all()
 
 
 answer_option = CRUDAnswerOption(AnswerOption)
+async_answer_option = AsyncCRUDBase[
+    AnswerOption, AnswerOptionCreate, AnswerOptionUpdate
+](AnswerOption)
@@ -0,0 +1,315 @@
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Sequence, Type
+
+from sqlalchemy import delete, event, func, literal, select, text
+from sqlalchemy.dialects.postgresql import Insert, insert
+from sqlalchemy.orm import Session
+
+from app.core.broadcast import Frame, poll_topic, publish
+from app.core.config import settings
+from app.models.answer import Answer
+from app.models.answer_option import AnswerOption
+from app.models.answer_tally import AnswerTally, answer_tally_version
+
+PENDING_FRAMES_KEY = "answer_tally_frames"
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_committed_frames(session: Session) -> None:
+    frames = session.info.pop(PENDING_FRAMES_KEY, None)
+    for poll_id, frame in (frames or {}).items():
+        publish(poll_topic(poll_id), shards=frame.shards)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_frames(session: Session) -> None:
+    session.info.pop(PENDING_FRAMES_KEY, None)
+
+
+class CRUDAnswerTally:
+    def __init__(self, model: Type[AnswerTally], shards: int = 1):
+        """
+        Vote counters per answer option. They are changed in the same transaction
+        as the answers, so reading poll results never has to touch `answer`.
+
+        **Parameters**
+
+        * `model`: A SQLAlchemy model class
+        * `shards`: Number of counter rows the votes of one option are spread over
+        """
+        self.model = model
+        self.shards = shards
+
+    def shard_for(self, owner_id: int) -> int:
+        # Changing the number of shards is safe, results always sum every row
+        return owner_id % self.shards
+
+    def upsert(
+        self, *, poll_id: int, answer_option_id: int, owner_id: int, amount: int = 1
+    ) -> Insert:
+        """
+        Statement adding `amount` to the counter shard of an answer option picked
+        by the voter and returning the shard. Pass the returned row to `track`
+        as well once it is executed.
+        """
+        stmt = insert(self.model).values(
+            answer_option_id=answer_option_id,
+            shard=self.shard_for(owner_id),
+            poll_id=poll_id,
+            count=amount,
+        )
+        return self._on_conflict_add(stmt)
+
+    def _on_conflict_add(self, stmt: Insert) -> Insert:
+        return stmt.on_conflict_do_update(
+            index_elements=[self.model.answer_option_id, self.model.shard],
+            set_={
+                "count": self.model.__table__.c.count + stmt.excluded.count,
+                "version": answer_tally_version.next_value(),
+            },
+        ).returning(*self._shard_columns())
+
+    def _shard_columns(self) -> List[Any]:
+        return [
+            self.model.answer_option_id,
+            self.model.shard,
+            self.model.version,
+            self.model.count,
+        ]
+
+    def add(
+        self,
+        db: Session,
+        *,
+        poll_id: int,
+        answer_option_id: int,
+        owner_id: int,
+        amount: int = 1,
+    ) -> None:
+        """
+        Add `amount` to the counter shard of an answer option picked by the voter.
+        Does not commit, the caller commits together with the answer it has
+        written.
+        """
+        row = db.execute(
+            self.upsert(
+                poll_id=poll_id,
+                answer_option_id=answer_option_id,
+                owner_id=owner_id,
+                amount=amount,
+            )
+        ).one()
+        self.track(db, poll_id=poll_id, rows=[row])
+
+    def add_multi(self, db: Session, *, answers: Sequence[Answer]) -> None:
+        """
+        Count a batch of new answers with a single multi-row upsert. Does not
+        commit.
+        """
+        counts: Counter = Counter()
+        for answer in answers:
+            key = (
+                answer.answer_option_id,
+                self.shard_for(answer.owner_id),
+                answer.poll_id,
+            )
+            counts[key] += 1
+        if not counts:
+            return
+        # A row may appear only once in an upsert, hence the counting above
+        stmt = insert(self.model).values(
+            [
+                {
+                    "answer_option_id": answer_option_id,
+                    "shard": shard,
+                    "poll_id": poll_id,
+                    "count": count,
+                }
+                for (answer_option_id, shard, poll_id), count in counts.items()
+            ]
+        )
+        rows = db.execute(self._on_conflict_add(stmt)).all()
+        poll_ids = {
+            (answer_option_id, shard): poll_id
+            for answer_option_id, shard, poll_id in counts
+        }
+        for row in rows:
+            self.track(
+                db, poll_id=poll_ids[row.answer_option_id, row.shard], rows=[row]
+            )
+
+    def track(
+        self,
+        db: Session,
+        *,
+        poll_id: int,
+        rows: Iterable[Any],
+    ) -> None:
+        """
+        Publish the shard rows a statement returned to live result subscribers
+        once the session commits.
+        """
+        frames: Dict[int, Frame] = db.info.setdefault(PENDING_FRAMES_KEY, {})
+        frame = Frame(
+            shards={
+                (row.answer_option_id, row.shard): (row.version, row.count)
+                for row in rows
+            },
+        )
+        if poll_id in frames:
+            frames[poll_id].merge(frame)
+        else:
+            frames[poll_id] = frame
+
+    def get_shards(self, db: Session, *, poll_ids: Sequence[int]) -> List[Any]:
+        """
+        The tally shards of every answer option of the polls, read in one
+        statement so that they are consistent with each other. Options without
+        votes have one row with `shard`, `version` and `count` set to `None`.
+        Seed a `ShardCounts` with them to turn live frames into exact changes.
+        """
+        return (
+            db.query(
+                AnswerOption.poll_id,
+                AnswerOption.id.label("answer_option_id"),
+                AnswerOption.text,
+                self.model.shard,
+                self.model.version,
+                self.model.count,
+            )
+            .outerjoin(self.model, self.model.answer_option_id == AnswerOption.id)
+            .filter(AnswerOption.poll_id.in_(poll_ids))
+            .order_by(AnswerOption.id, self.model.shard)
+            .all()
+        )
+
+    def get_multi_by_poll(self, db: Session, *, poll_id: int) -> List[Any]:
+        """
+        Vote counts of every answer option of the poll, options without votes
+        included.
+        """
+        return (
+            db.query(
+                AnswerOption.id.label("answer_option_id"),
+                AnswerOption.text,
+                func.coalesce(func.sum(self.model.count), 0).label("votes"),
+            )
+            .outerjoin(self.model, self.model.answer_option_id == AnswerOption.id)
+            .filter(AnswerOption.poll_id == poll_id)
+            .group_by(AnswerOption.id)
+            .order_by(AnswerOption.id)
+            .all()
+        )
+
+    def sum_shards(self, shards: Iterable[Any]) -> List[Dict[str, Any]]:
+        """
+        Vote counts per answer option of the rows of `get_shards`, in the shape
+        of the rows of `get_multi_by_poll`.
+        """
+        options: Dict[int, Dict[str, Any]] = {}
+        for row in shards:
+            option = options.setdefault(
+                row.answer_option_id,
+                {
+                    "poll_id": row.poll_id,
+                    "answer_option_id": row.answer_option_id,
+                    "text": row.text,
+                    "votes": 0,
+                },
+            )
+            option["votes"] += row.count or 0
+        return list(options.values())
+
+    def reconcile(
+        self, db: Session, *, poll_id: int = None, fix: bool = True
+    ) -> List[Any]:
+        """
+        Recount the answers with `GROUP BY` and return the options whose stored
+        counter differs from it. With `fix` the counters are overwritten with the
+        recounted values; vote writes wait for the check to finish so the result
+        is exact. Without `fix` nothing is locked and votes that are in flight
+        may show up as drift.
+        """
+        if fix:
+            db.execute(
+                text(
+                    f"LOCK TABLE {self.model.__tablename__} "
+                    "IN SHARE ROW EXCLUSIVE MODE"
+                )
+            )
+        counted_query = select(
+            Answer.answer_option_id, func.count(Answer.id).label("count")
+        ).group_by(Answer.answer_option_id)
+        if poll_id:
+            counted_query = counted_query.where(Answer.poll_id == poll_id)
+        counted = counted_query.subquery()
+        summed_query = select(
+            self.model.answer_option_id, func.sum(self.model.count).label("count")
+        ).group_by(self.model.answer_option_id)
+        if poll_id:
+            summed_query = summed_query.where(self.model.poll_id == poll_id)
+        summed = summed_query.subquery()
+        stored = func.coalesce(summed.c.count, 0)
+        recounted = func.coalesce(counted.c.count, 0)
+        query = (
+            db.query(
+                AnswerOption.id.label("answer_option_id"),
+                AnswerOption.poll_id,
+                stored.label("stored"),
+                recounted.label("counted"),
+            )
+            .outerjoin(counted, counted.c.answer_option_id == AnswerOption.id)
+            .outerjoin(summed, summed.c.answer_option_id == AnswerOption.id)
+            .filter(stored != recounted)
+        )
+        if poll_id:
+            query = query.filter(AnswerOption.poll_id == poll_id)
+        drift = query.all()
+
+        if fix and drift:
+            # Drifted options start over with their recounted votes in one shard.
+            # The removed shards are published as empty with a new version.
+            removed = db.execute(
+                delete(self.model)
+                .where(
+                    self.model.answer_option_id.in_(
+                        [row.answer_option_id for row in drift]
+                    )
+                )
+                .returning(
+                    self.model.answer_option_id,
+                    self.model.shard,
+                    answer_tally_version.next_value().label("version"),
+                    literal(0).label("count"),
+                )
+            ).all()
+            recounted_shards = db.execute(
+                insert(self.model)
+                .values(
+                    [
+                        {
+                            "answer_option_id": row.answer_option_id,
+                            "shard": 0,
+                            "poll_id": row.poll_id,
+                            "count": row.counted,
+                        }
+                        for row in drift
+                    ]
+                )
+                .returning(*self._shard_columns())
+            ).all()
+            for row in drift:
+                self.track(
+                    db,
+                    poll_id=row.poll_id,
+                    rows=[
+                        shard
+                        for shard in removed + recounted_shards
+                        if shard.answer_option_id == row.answer_option_id
+                    ],
+                )
+        db.commit()
+        return drift
+
+
+answer_tally = CRUDAnswerTally(AnswerTally, shards=settings.ANSWER_TALLY_SHARDS)
@@ -1,59 +1,369 @@
-from typing import List
+from typing import Any, Collection, List, Optional, Tuple
 
 from fastapi.encoders import jsonable_encoder
 from requests import Session
+from sqlalchemy import (
+    Integer,
+    Table,
+    any_,
+    bindparam,
+    case,
+    exists,
+    func,
+    literal,
+    select,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
 
+from app.core.config import settings
+from app.core.role_cache import EventMembers, role_cache
+from app.core.security import EventRole
+from app.models.access_log import AccessLog
 from app.models.event import Event
-from app.models.user import User
+from app.models.poll import Poll
+from app.models.user import (
+    User,
+    acess_moderator_events_association_table,
+    user_events_association_table,
+    voting_moderator_events_association_table,
+)
 from app.schemas.event import EventCreate, EventUpdate
 from app.utils import ModeratorType
 
-from .base import CRUDBase
+from .base import AsyncCRUDBase, CRUDBase
+
+
+def _roles(*, event_id: int, user_id: int) -> Select:
+    # One row for an existing event: the roles of the user as an `EventRole`
+    # bitmask, every membership is an `EXISTS` on the association's primary key
+    def member_of(table: Table, role: EventRole) -> Any:
+        membership = exists().where(
+            table.c.event_id == Event.id, table.c.user_id == user_id
+        )
+        return case((membership, role.value), else_=0)
+
+    roles = (
+        case((Event.owner_id == user_id, EventRole.OWNER.value), else_=0)
+        + member_of(user_events_association_table, EventRole.PARTICIPANT)
+        + member_of(
+            voting_moderator_events_association_table, EventRole.VOTING_MODERATOR
+        )
+        + member_of(
+            acess_moderator_events_association_table, EventRole.ACCESS_MODERATOR
+        )
+    )
+    return select(roles).where(Event.id == event_id)
+
+
+def _member_ids(table: Table, *, event_id: int) -> Select:
+    return select(table.c.user_id).where(table.c.event_id == event_id)
+
+
+def _moderators_table(moderator_type: ModeratorType) -> Table:
+    if moderator_type == ModeratorType.VOTING:
+        return voting_moderator_events_association_table
+    return acess_moderator_events_association_table
+
+
+def _summaries(fields: Optional[Collection[str]] = None) -> Select:
+    # Columns of `schemas.EventSummary`, the sizes are correlated subqueries.
+    # With `fields` only those, the id and the owner are selected.
+    def count(table: Table) -> Any:
+        return (
+            select(func.count()).where(table.c.event_id == Event.id).scalar_subquery()
+        )
+
+    columns = {
+        "id": Event.id,
+        "name": Event.name,
+        "description": Event.description,
+        "start_at": Event.start_at,
+        "close_at": Event.close_at,
+        "owner_id": Event.owner_id,
+        "participants_count": count(user_events_association_table),
+        "access_moderators_count": count(acess_moderator_events_association_table),
+        "voting_moderators_count": count(voting_moderator_events_association_table),
+        "polls_count": count(Poll.__table__),
+    }
+    if fields is not None:
+        wanted = {"id", "owner_id", *fields}
+        columns = {name: column for name, column in columns.items() if name in wanted}
+    return select(*(column.label(name) for name, column in columns.items()))
 
 
 class CRUDEvent(CRUDBase[Event, EventCreate, EventUpdate]):
+    def get_roles(
+        self, db: Session, *, event_id: int, user_id: int
+    ) -> Optional[EventRole]:
+        """
+        Roles of the user in the event, `None` if there is no such event. Served
+        from the role cache when `ROLE_CACHE_ENABLED` is set, otherwise with one
+        query.
+        """
+        if not settings.ROLE_CACHE_ENABLED:
+            roles = db.execute(_roles(event_id=event_id, user_id=user_id)).scalar()
+            return None if roles is None else EventRole(roles)
+        members = role_cache.get(event_id)
+        if members is None:
+            generation = role_cache.generation(event_id)
+            members = self.get_members(db, event_id=event_id)
+            if members is None:
+                return None
+            role_cache.put(event_id, members, generation)
+        return members.roles(user_id)
+
+    def get_roles_version(self, db: Session, *, event_id: int) -> Optional[int]:
+        """
+        Version of the event's members, bumped by every change of them. `None` if
+        there is no such event.
+        """
+        version = (
+            role_cache.get_version(event_id) if settings.ROLE_CACHE_ENABLED else None
+        )
+        if version is None:
+            generation = role_cache.generation(event_id)
+            version = db.execute(
+                select(Event.roles_version).where(Event.id == event_id)
+            ).scalar()
+            if version is not None and settings.ROLE_CACHE_ENABLED:
+                role_cache.put_version(event_id, version, generation)
+        return version
+
+    def get_members(self, db: Session, *, event_id: int) -> Optional[EventMembers]:
+        owner_id = db.execute(
+            select(Event.owner_id).where(Event.id == event_id)
+        ).first()
+        if owner_id is None:
+            return None
+        return EventMembers(
+            owner_id=owner_id[0],
+            participants=db.execute(
+                _member_ids(user_events_association_table, event_id=event_id)
+            ).scalars(),
+            voting_moderators=db.execute(
+                _member_ids(
+                    voting_moderator_events_association_table, event_id=event_id
+                )
+            ).scalars(),
+            access_moderators=db.execute(
+                _member_ids(acess_moderator_events_association_table, event_id=event_id)
+            ).scalars(),
+        )
+
+    def get_summary(
+        self, db: Session, *, id: int, fields: Optional[Collection[str]] = None
+    ) -> Optional[Row]:
+        """
+        The event with the sizes of its member lists and polls, one query.
+        """
+        return db.execute(_summaries(fields).where(Event.id == id)).first()
+
+    def get_multi_summaries(
+        self,
+        db: Session,
+        *,
+        owner_id: Optional[int] = None,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[int] = None,
+        fields: Optional[Collection[str]] = None,
+    ) -> List[Row]:
+        query = _summaries(fields)
+        if owner_id is not None:
+            query = query.where(Event.owner_id == owner_id)
+        return db.execute(self.page(query, skip=skip, limit=limit, after=after)).all()
+
+    def get_participants(
+        self,
+        db: Session,
+        *,
+        event_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[int] = None,
+    ) -> List[User]:
+        query = (
+            db.query(User)
+            .join(
+                user_events_association_table,
+                user_events_association_table.c.user_id == User.id,
+            )
+            .filter(user_events_association_table.c.event_id == event_id)
+        )
+        if after is not None:
+            query = query.filter(User.id > after)
+        return query.order_by(User.id).offset(skip).limit(limit).all()
+
+    def get_moderators(
+        self,
+        db: Session,
+        *,
+        event_id: int,
+        moderator_type: ModeratorType,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[int] = None,
+    ) -> List[User]:
+        table = _moderators_table(moderator_type)
+        query = (
+            db.query(User)
+            .join(table, table.c.user_id == User.id)
+            .filter(table.c.event_id == event_id)
+        )
+        if after is not None:
+            query = query.filter(User.id > after)
+        return query.order_by(User.id).offset(skip).limit(limit).all()
+
     def create_with_owner(
-        self, db: Session, *, obj_in: EventCreate, owner_id: int
+        self, db: Session, *, obj_in: EventCreate, owner_id: int, commit: bool = True
     ) -> Event:
         obj_in_data = jsonable_encoder(obj_in)
-        db_obj = self.model(**obj_in_data, owner_id=owner_id)
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
-        return db_obj
+        return self.insert(
+            db, values={**obj_in_data, "owner_id": owner_id}, commit=commit
+        )
 
     def get_multi_by_owner(
-        self, db: Session, *, owner_id: int, skip: int = 0, limit: int = 100
+        self,
+        db: Session,
+        *,
+        owner_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[int] = None,
     ) -> List[Event]:
-        return (
-            db.query(self.model)
-            .filter(Event.owner_id == owner_id)
-            .offset(skip)
-            .limit(limit)
-            .all()
-        )
+        query = db.query(self.model).filter(Event.owner_id == owner_id)
+        return self.page(query, skip=skip, limit=limit, after=after).all()
 
     def add_participant_to_event(
         self, db: Session, *, event_id: int, user: User
-    ) -> Event:
-        db_obj = db.query(self.model).filter(self.model.id == event_id).first()
-        db_obj.participants.append(user)
+    ) -> None:
+        # Inserted directly, appending to `Event.participants` would load them all
+        db.execute(
+            insert(user_events_association_table).values(
+                event_id=event_id, user_id=user.id
+            )
+        )
+        self._bump_roles_version(db, event_id=event_id)
         db.commit()
-        db.refresh(db_obj)
-        return db_obj
+        role_cache.invalidate(event_id)
+
+    def _bump_roles_version(self, db: Session, *, event_id: int) -> None:
+        db.execute(
+            update(Event)
+            .where(Event.id == event_id)
+            .values(roles_version=Event.roles_version + 1)
+        )
+
+    def add_participants(
+        self,
+        db: Session,
+        *,
+        event_id: int,
+        given_by_id: int,
+        user_ids: Optional[Collection[int]] = None,
+        academic_group: Optional[str] = None,
+    ) -> Tuple[int, int]:
+        """
+        Add the users with `user_ids` or from `academic_group` that are not
+        participants yet and log who gave them access, in one transaction with
+        set-based inserts. Returns how many users were found and how many of
+        them were added.
+        """
+        if user_ids is not None:
+            ids = bindparam("user_ids", list(user_ids), type_=ARRAY(Integer))
+            users = User.id == any_(ids)
+        else:
+            users = User.academic_group == academic_group
+        found = db.execute(select(func.count()).select_from(User).where(users)).scalar()
+        # Data-modifying CTEs only run at the top level, so the new memberships
+        # are attached to the insert of their access logs
+        added = (
+            insert(user_events_association_table)
+            .from_select(
+                ["user_id", "event_id"],
+                select(User.id, literal(event_id)).where(users),
+            )
+            .on_conflict_do_nothing()
+            .returning(user_events_association_table.c.user_id)
+            .cte("added")
+        )
+        access_logs = (
+            insert(AccessLog)
+            .from_select(
+                ["event_id", "given_by_id", "received_id"],
+                select(literal(event_id), literal(given_by_id), added.c.user_id),
+            )
+            .add_cte(added)
+            .returning(AccessLog.id)
+        )
+        added_count = len(db.execute(access_logs).all())
+        if added_count:
+            self._bump_roles_version(db, event_id=event_id)
+        db.commit()
+        if added_count:
+            role_cache.invalidate(event_id)
+        return found, added_count
+
+    def count_participants(self, db: Session, *, event_id: int) -> int:
+        return (
+            db.query(func.count(user_events_association_table.c.user_id))
+            .filter(user_events_association_table.c.event_id == event_id)
+            .scalar()
+        )
 
     def add_moderator_to_event(
         self, db: Session, *, event_id: int, user: User, moderator_type: ModeratorType
-    ) -> Event:
-        db_obj = db.query(self.model).filter(self.model.id == event_id).first()
-        if moderator_type.ACCESS:
-            db_obj.access_moderators.append(user)
-        elif moderator_type.VOTING:
-            db_obj.voting_moderators.append(user)
+    ) -> None:
+        db.execute(
+            insert(_moderators_table(moderator_type))
+            .values(event_id=event_id, user_id=user.id)
+            .on_conflict_do_nothing()
+        )
+        self._bump_roles_version(db, event_id=event_id)
         db.commit()
-        db.refresh(db_obj)
-        return db_obj
+        role_cache.invalidate(event_id)
+
+
+class AsyncCRUDEvent(AsyncCRUDBase[Event, EventCreate, EventUpdate]):
+    async def get_roles(
+        self, db: AsyncSession, *, event_id: int, user_id: int
+    ) -> Optional[EventRole]:
+        if not settings.ROLE_CACHE_ENABLED:
+            result = await db.execute(_roles(event_id=event_id, user_id=user_id))
+            roles = result.scalar()
+            return None if roles is None else EventRole(roles)
+        members = role_cache.get(event_id)
+        if members is None:
+            generation = role_cache.generation(event_id)
+            members = await db.run_sync(
+                lambda session: event.get_members(session, event_id=event_id)
+            )
+            if members is None:
+                return None
+            role_cache.put(event_id, members, generation)
+        return members.roles(user_id)
+
+    async def get_roles_version(
+        self, db: AsyncSession, *, event_id: int
+    ) -> Optional[int]:
+        version = (
+            role_cache.get_version(event_id) if settings.ROLE_CACHE_ENABLED else None
+        )
+        if version is None:
+            generation = role_cache.generation(event_id)
+            result = await db.execute(
+                select(Event.roles_version).where(Event.id == event_id)
+            )
+            version = result.scalar()
+            if version is not None and settings.ROLE_CACHE_ENABLED:
+                role_cache.put_version(event_id, version, generation)
+        return version
 
 
 event = CRUDEvent(Event)
+async_event = AsyncCRUDEvent(Event)
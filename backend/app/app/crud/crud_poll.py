@@ -1,38 +1,99 @@
-from typing import List
+from typing import Any, List, Optional, Sequence
 
 from fastapi.encoders import jsonable_encoder
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
 
+from app.core.role_cache import role_cache
 from app.models.poll import Poll
 from app.schemas.poll import PollCreate, PollUpdate
 
-from .base import CRUDBase
+from .base import AsyncCRUDBase, CRUDBase
 
 
 class CRUDPoll(CRUDBase[Poll, PollCreate, PollUpdate]):
     def create_with_owner(
-        self, db: Session, *, obj_in: PollCreate, owner_id: int
+        self, db: Session, *, obj_in: PollCreate, owner_id: int, commit: bool = True
     ) -> Poll:
         obj_in_data = jsonable_encoder(obj_in)
-        db_obj = self.model(**obj_in_data, owner_id=owner_id)
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
-        return db_obj
+        return self.insert(
+            db, values={**obj_in_data, "owner_id": owner_id}, commit=commit
+        )
 
     def get_multi_by_owner(
-        self, db: Session, *, owner_id: int, skip: int = 0, limit: int = 100
+        self,
+        db: Session,
+        *,
+        owner_id: int,
+        is_running: Optional[bool] = None,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[int] = None,
+        plan: Sequence[Any] = (),
+    ) -> List[Poll]:
+        return self.get_multi(
+            db,
+            skip=skip,
+            limit=limit,
+            after=after,
+            filters={"owner_id": owner_id, "is_running": is_running},
+            plan=plan,
+        )
+
+    def get_multi_by_event(
+        self,
+        db: Session,
+        *,
+        event_id: int,
+        is_running: Optional[bool] = None,
+        skip: int = 0,
+        limit: Optional[int] = None,
+        after: Optional[int] = None,
+        plan: Sequence[Any] = (),
     ) -> List[Poll]:
-        return (
-            db.query(self.model)
-            .filter(Poll.owner_id == owner_id)
-            .offset(skip)
-            .limit(limit)
-            .all()
+        return self.get_multi(
+            db,
+            skip=skip,
+            limit=limit,
+            after=after,
+            filters={"event_id": event_id, "is_running": is_running},
+            plan=plan,
+        )
+
+    def get_event_id(self, db: Session, *, poll_id: int) -> Optional[int]:
+        """
+        Event of the poll, `None` if there is no such poll. Kept in the role
+        cache, polls do not move between events.
+        """
+        event_id = role_cache.get_poll_event(poll_id)
+        if event_id is None:
+            event_id = db.execute(
+                select(Poll.event_id).where(Poll.id == poll_id)
+            ).scalar()
+            if event_id is not None:
+                role_cache.put_poll_event(poll_id, event_id)
+        return event_id
+
+
+class AsyncCRUDPoll(AsyncCRUDBase[Poll, PollCreate, PollUpdate]):
+    async def get(self, db: AsyncSession, id: Any) -> Optional[Poll]:
+        result = await db.execute(
+            select(self.model)
+            .where(self.model.id == id)
+            .options(joinedload(self.model.owner))
         )
+        return result.scalars().first()
 
-    def get_multi_by_event(self, db: Session, *, event_id: int) -> List[Poll]:
-        return db.query(self.model).filter(Poll.event_id == event_id).all()
+    async def get_event_id(self, db: AsyncSession, *, poll_id: int) -> Optional[int]:
+        event_id = role_cache.get_poll_event(poll_id)
+        if event_id is None:
+            result = await db.execute(select(Poll.event_id).where(Poll.id == poll_id))
+            event_id = result.scalar()
+            if event_id is not None:
+                role_cache.put_poll_event(poll_id, event_id)
+        return event_id
 
 
 poll = CRUDPoll(Poll)
+async_poll = AsyncCRUDPoll(Poll)
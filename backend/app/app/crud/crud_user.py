@@ -1,57 +1,173 @@
-from typing import Any, Dict, Optional, Union
+from typing import Any, Collection, Dict, Optional, Sequence, Set, Union
 
+from sqlalchemy import String, any_, bindparam, select
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.security import get_password_hash, verify_password
-from app.crud.base import CRUDBase
+from app.core.config import settings
+from app.core.local_cache import LocalCache
+from app.core.password_hasher import password_hasher
+from app.crud.base import AsyncCRUDBase, CRUDBase
 from app.models.user import User
-from app.schemas.user import UserCreate, UserUpdate
+from app.schemas.user import UserCreate, UserSnapshot, UserUpdate
+
+user_cache: LocalCache[int, UserSnapshot] = LocalCache(
+    channel="users",
+    enabled="USER_CACHE_ENABLED",
+    max_size=settings.USER_CACHE_MAX_USERS,
+    ttl=settings.USER_CACHE_TTL_SECONDS,
+)
 
 
 class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
+    def get_snapshot(self, db: Session, *, id: int) -> Optional[UserSnapshot]:
+        """
+        Immutable copy of the user from the user cache, loaded on a miss.
+        """
+        snapshot = user_cache.get(id)
+        if snapshot is None:
+            generation = user_cache.generation(id)
+            db_obj = self.get(db, id=id)
+            if db_obj is None:
+                return None
+            snapshot = UserSnapshot.from_orm(db_obj)
+            user_cache.put(id, snapshot, generation)
+        return snapshot
+
     def get_by_email(self, db: Session, *, email: str) -> Optional[User]:
         return db.query(User).filter(User.email == email).first()
 
-    def create(self, db: Session, *, obj_in: UserCreate) -> User:
-        db_obj = User(
-            email=obj_in.email,
-            hashed_password=get_password_hash(obj_in.password),
-            full_name=obj_in.full_name,
-            is_superuser=obj_in.is_superuser,
-            is_student=obj_in.is_student,
-            academic_group=obj_in.academic_group,
-        )
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
-        return db_obj
+    def create(self, db: Session, *, obj_in: UserCreate, commit: bool = True) -> User:
+        values = {
+            "email": obj_in.email,
+            "hashed_password": password_hasher.hash(obj_in.password),
+            "full_name": obj_in.full_name,
+            "is_superuser": obj_in.is_superuser,
+            "is_student": obj_in.is_student,
+            "academic_group": obj_in.academic_group,
+        }
+        return self.insert(db, values=values, commit=commit)
+
+    def get_existing_emails(self, db: Session, *, emails: Collection[str]) -> Set[str]:
+        """
+        The ones of `emails` that are taken, with a single query.
+        """
+        if not emails:
+            return set()
+        emails_param = bindparam("emails", list(emails), type_=ARRAY(String))
+        rows = db.query(User.email).filter(User.email == any_(emails_param))
+        return {row.email for row in rows}
+
+    def create_multi(
+        self, db: Session, *, rows: Sequence[Dict[str, Any]], chunk_size: int = 1000
+    ) -> Dict[str, int]:
+        """
+        Insert users given as column values with the password already hashed,
+        `chunk_size` of them per statement and transaction. Users whose email
+        is taken by then are skipped. Returns the ids of the created users by
+        email.
+        """
+        ids: Dict[str, int] = {}
+        for start in range(0, len(rows), chunk_size):
+            end = start + chunk_size
+            stmt = (
+                insert(User)
+                .values(rows[start:end])
+                .on_conflict_do_nothing(index_elements=[User.email])
+                .returning(User.id, User.email)
+            )
+            ids.update({row.email: row.id for row in db.execute(stmt)})
+            db.commit()
+        return ids
 
     def update(
-        self, db: Session, *, db_obj: User, obj_in: Union[UserUpdate, Dict[str, Any]]
+        self,
+        db: Session,
+        *,
+        db_obj: User,
+        obj_in: Union[UserUpdate, Dict[str, Any]],
+        commit: bool = True,
     ) -> User:
         if isinstance(obj_in, dict):
             update_data = obj_in
         else:
             update_data = obj_in.dict(exclude_unset=True)
-        if update_data["password"]:
-            hashed_password = get_password_hash(update_data["password"])
+        if update_data.get("password"):
+            hashed_password = password_hasher.hash(update_data["password"])
             del update_data["password"]
             update_data["hashed_password"] = hashed_password
-        return super().update(db, db_obj=db_obj, obj_in=update_data)
+        db_obj = super().update(db, db_obj=db_obj, obj_in=update_data, commit=commit)
+        user_cache.invalidate(db_obj.id)
+        return db_obj
+
+    def remove(self, db: Session, *, id: int) -> User:
+        db_obj = super().remove(db, id=id)
+        user_cache.invalidate(id)
+        return db_obj
 
     def authenticate(self, db: Session, *, email: str, password: str) -> Optional[User]:
         user = self.get_by_email(db, email=email)
         if not user:
             return None
-        if not verify_password(password, user.hashed_password):
+        verified, new_hash = password_hasher.verify_and_update(
+            password, user.hashed_password
+        )
+        if not verified:
+            return None
+        if new_hash:
+            # The hashing policy changed since the password was stored
+            user.hashed_password = new_hash
+            db.commit()
+        return user
+
+    def is_active(self, user: Union[User, UserSnapshot]) -> bool:
+        return user.is_active
+
+    def is_superuser(self, user: Union[User, UserSnapshot]) -> bool:
+        return user.is_superuser
+
+
+class AsyncCRUDUser(AsyncCRUDBase[User, UserCreate, UserUpdate]):
+    async def get_snapshot(
+        self, db: AsyncSession, *, id: int
+    ) -> Optional[UserSnapshot]:
+        snapshot = user_cache.get(id)
+        if snapshot is None:
+            generation = user_cache.generation(id)
+            db_obj = await self.get(db, id=id)
+            if db_obj is None:
+                return None
+            snapshot = UserSnapshot.from_orm(db_obj)
+            user_cache.put(id, snapshot, generation)
+        return snapshot
+
+    async def get_by_email(self, db: AsyncSession, *, email: str) -> Optional[User]:
+        result = await db.execute(select(User).where(User.email == email))
+        return result.scalars().first()
+
+    async def authenticate(
+        self, db: AsyncSession, *, email: str, password: str
+    ) -> Optional[User]:
+        user = await self.get_by_email(db, email=email)
+        if not user:
+            return None
+        verified, new_hash = await password_hasher.verify_and_update_async(
+            password, user.hashed_password
+        )
+        if not verified:
             return None
+        if new_hash:
+            user.hashed_password = new_hash
+            await db.commit()
         return user
 
-    def is_active(self, user: User) -> bool:
+    def is_active(self, user: Union[User, UserSnapshot]) -> bool:
         return user.is_active
 
-    def is_superuser(self, user: User) -> bool:
+    def is_superuser(self, user: Union[User, UserSnapshot]) -> bool:
         return user.is_superuser
 
 
 user = CRUDUser(User)
+async_user = AsyncCRUDUser(User)
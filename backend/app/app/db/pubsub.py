@@ -0,0 +1,205 @@
+import asyncio
+import logging
+import queue
+import threading
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import psycopg2
+from psycopg2 import sql
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT, connection
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[str], None]
+
+# PostgreSQL rejects a notification payload of this many bytes or more
+MAX_PAYLOAD_BYTES = 8000
+
+
+class PostgresPubSub:
+    def __init__(self, dsn: str, max_batch: int = 100):
+        """
+        Publish/subscribe between processes over PostgreSQL `LISTEN/NOTIFY`.
+
+        Each process runs one listener connection, driven by the event loop
+        passed to `start`, which calls the handlers registered for a channel
+        with the payload of every notification. `notify` can be called from any
+        thread; notifications are sent from a background thread over a separate
+        connection, several of them per round trip.
+        """
+        self.dsn = dsn
+        self.max_batch = max_batch
+        self._handlers: Dict[str, List[Handler]] = defaultdict(list)
+        self._reconnect_handlers: List[Callable[[], None]] = []
+        self._task: Optional[asyncio.Task] = None
+        self._outgoing: "queue.Queue[Optional[Tuple[str, str]]]" = queue.Queue()
+        self._sender: Optional[threading.Thread] = None
+        self._sender_lock = threading.Lock()
+
+    def _connect(self) -> connection:
+        conn = psycopg2.connect(self.dsn)
+        conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+        return conn
+
+    def subscribe(self, channel: str, handler: Handler) -> None:
+        """
+        Call `handler` with the payload of every notification on `channel`.
+        Channels must be subscribed to before `start`.
+        """
+        if handler not in self._handlers[channel]:
+            self._handlers[channel].append(handler)
+
+    def on_reconnect(self, handler: Callable[[], None]) -> None:
+        """
+        Call `handler` after the listener lost its connection and got it back.
+        Notifications sent in between are lost.
+        """
+        if handler not in self._reconnect_handlers:
+            self._reconnect_handlers.append(handler)
+
+    def notify(self, channel: str, payload: str) -> None:
+        """
+        Send `payload` to the listeners of `channel` in every process. Raises
+        `ValueError` for a payload PostgreSQL would refuse.
+        """
+        if len(payload.encode()) >= MAX_PAYLOAD_BYTES:
+            raise ValueError(
+                f"Notification payload on {channel} is longer than "
+                f"{MAX_PAYLOAD_BYTES - 1} bytes"
+            )
+        if self._sender is None:
+            with self._sender_lock:
+                if self._sender is None:
+                    self._sender = threading.Thread(
+                        target=self._send_forever, name="pubsub-sender", daemon=True
+                    )
+                    self._sender.start()
+        self._outgoing.put((channel, payload))
+
+    def _send_forever(self) -> None:
+        conn: Optional[connection] = None
+        while True:
+            item = self._outgoing.get()
+            if item is None:
+                break
+            batch = [item]
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._outgoing.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._outgoing.put(None)
+                    break
+                batch.append(item)
+            conn = self._send(conn, batch)
+        if conn is not None:
+            conn.close()
+
+    def _send(
+        self, conn: Optional[connection], batch: List[Tuple[str, str]]
+    ) -> Optional[connection]:
+        """
+        Send `batch` in one statement and return the connection to reuse. When
+        the statement fails its halves are sent on their own, so a notification
+        the server refuses drops only itself.
+        """
+        try:
+            if conn is None or conn.closed:
+                conn = self._connect()
+        except psycopg2.Error:
+            logger.exception("Dropped %s notification(s)", len(batch))
+            return None
+        statement = "SELECT " + ", ".join(["pg_notify(%s, %s)"] * len(batch))
+        params = [value for notification in batch for value in notification]
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(statement, params)
+        except psycopg2.Error:
+            if len(batch) == 1:
+                logger.exception("Dropped a notification on %s", batch[0][0])
+                return conn
+            middle = len(batch) // 2
+            conn = self._send(conn, batch[:middle])
+            return self._send(conn, batch[middle:])
+        return conn
+
+    async def start(self) -> None:
+        if not self._handlers:
+            # Nothing to listen to, notifications can still be sent
+            return
+        self._task = asyncio.get_running_loop().create_task(self._listen_forever())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._sender is not None:
+            self._outgoing.put(None)
+            await asyncio.get_running_loop().run_in_executor(None, self._sender.join, 5)
+            self._sender = None
+
+    async def _listen_forever(self) -> None:
+        loop = asyncio.get_running_loop()
+        delay = 1.0
+        connected_before = False
+        while True:
+            conn = None
+            try:
+                conn = await loop.run_in_executor(None, self._connect)
+                with conn.cursor() as cursor:
+                    for channel in self._handlers:
+                        cursor.execute(
+                            sql.SQL("LISTEN {}").format(sql.Identifier(channel))
+                        )
+                lost = loop.create_future()
+                loop.add_reader(conn.fileno(), self._receive, conn, lost)
+                if connected_before:
+                    self._run_reconnect_handlers()
+                connected_before = True
+                delay = 1.0
+                await lost
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Listener connection failed")
+            finally:
+                if conn is not None:
+                    if not conn.closed:
+                        loop.remove_reader(conn.fileno())
+                    conn.close()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30.0)
+
+    def _receive(self, conn: connection, lost: "asyncio.Future[None]") -> None:
+        try:
+            conn.poll()
+        except psycopg2.Error:
+            asyncio.get_running_loop().remove_reader(conn.fileno())
+            if not lost.done():
+                lost.set_result(None)
+            return
+        while conn.notifies:
+            notification = conn.notifies.pop(0)
+            for handler in self._handlers.get(notification.channel, ()):
+                try:
+                    handler(notification.payload)
+                except Exception:
+                    logger.exception("Handler for %s failed", notification.channel)
+
+    def _run_reconnect_handlers(self) -> None:
+        for handler in self._reconnect_handlers:
+            try:
+                handler()
+            except Exception:
+                logger.exception("Reconnect handler failed")
+
+
+pubsub = PostgresPubSub(str(settings.SQLALCHEMY_DATABASE_URI))
@@ -0,0 +1,61 @@
+"""
+Create users from a CSV file with a header row or a JSONL file, the way
+`POST /users/import` does, hashing passwords on all cores:
+
+    python /app/app/import_users.py students.csv --report report.json
+"""
+import argparse
+import logging
+import os
+from pathlib import Path
+
+from app.core.config import settings
+from app.core.password_hasher import PasswordHasher, get_password_rounds
+from app.core.user_import import FORMATS, guess_format, import_users
+from app.db.session import SessionLocal
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--format", choices=FORMATS)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--report", type=Path, help="write the report as JSON")
+    args = parser.parse_args()
+
+    hasher = PasswordHasher(workers=args.workers, max_queue=0)
+    hasher.configure(scheme=settings.PASSWORD_HASH_SCHEME, rounds=get_password_rounds())
+    db = SessionLocal()
+    try:
+        report = import_users(
+            db,
+            args.path.read_text(encoding="utf-8-sig"),
+            file_format=args.format or guess_format(args.path.name),
+            hasher=hasher,
+            chunk_size=args.chunk_size,
+        )
+    finally:
+        db.close()
+        hasher.shutdown()
+
+    for row in report.rows:
+        if row.status != "created":
+            logger.warning(
+                "Row %s, %s: %s %s", row.row, row.email, row.status, row.detail
+            )
+    logger.info(
+        "Created %s users, %s duplicates, %s invalid rows",
+        report.created,
+        report.duplicates,
+        report.invalid,
+    )
+    if args.report:
+        args.report.write_text(report.json())
+
+
+if __name__ == "__main__":
+    main()
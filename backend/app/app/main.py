@@ -1,8 +1,21 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from starlette.middleware.cors import CORSMiddleware
 
 from app.api.api_v1.api import api_router
+from app.api.pagination import NEXT_CURSOR_HEADER
+from app.core.broadcast import start_live_results, stop_live_results
 from app.core.config import settings
+from app.core.password_hasher import (
+    PasswordHasherBusy,
+    start_password_hashing,
+    stop_password_hashing,
+)
+from app.core.role_cache import role_cache
+from app.core.student_profiles import student_profiles
+from app.core.vote_buffer import start_vote_buffer, stop_vote_buffer
+from app.crud.crud_user import user_cache
+from app.db.pubsub import pubsub
 
 app = FastAPI(
     title=settings.PROJECT_NAME, openapi_url=f"{settings.API_V1_STR}/openapi.json"
@@ -16,6 +29,34 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=[NEXT_CURSOR_HEADER],
     )
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
+
+
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy(
+    request: Request, exc: PasswordHasherBusy
+) -> JSONResponse:
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Too many logins, try again later"},
+        headers={"Retry-After": "1"},
+    )
+
+
+app.add_event_handler("startup", start_password_hashing)
+app.add_event_handler("startup", start_live_results)
+app.add_event_handler("startup", role_cache.subscribe)
+app.add_event_handler("startup", user_cache.subscribe)
+# Listens to the channels subscribed to above
+app.add_event_handler("startup", pubsub.start)
+app.add_event_handler("startup", start_vote_buffer)
+# Buffered votes are written before live results stop, so their tallies are
+# still published
+app.add_event_handler("shutdown", stop_vote_buffer)
+app.add_event_handler("shutdown", stop_live_results)
+app.add_event_handler("shutdown", pubsub.stop)
+app.add_event_handler("shutdown", stop_password_hashing)
+app.add_event_handler("shutdown", student_profiles.close)
@@ -1,6 +1,7 @@
 from .access_log import AccessLog
 from .answer import Answer
 from .answer_option import AnswerOption
+from .answer_tally import AnswerTally
 from .event import Event
 from .item import Item
 from .poll import Poll
@@ -1,11 +1,27 @@
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, func
+from sqlalchemy import (
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    UniqueConstraint,
+    func,
+)
 from sqlalchemy.orm import relationship
 
 from app.db.base_class import Base
 
 
 class Answer(Base):
-    id = Column(Integer, primary_key=True, index=True)
+    __table_args__ = (
+        # One answer per user and poll, enforced by the database so that
+        # concurrent votes cannot slip past an application level check
+        UniqueConstraint("poll_id", "owner_id", name="answer_poll_id_owner_id_key"),
+        # Whether an answer option has answers before it is deleted
+        Index("ix_answer_answer_option_id", "answer_option_id"),
+    )
+
+    id = Column(Integer, primary_key=True)
     answer_option_id = Column(Integer, ForeignKey("answeroption.id"))
     answer_option = relationship("AnswerOption", back_populates="answers")
     owner_id = Column(Integer, ForeignKey("user.id"))
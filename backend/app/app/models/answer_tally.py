@@ -0,0 +1,27 @@
+from sqlalchemy import BigInteger, Column, ForeignKey, Integer, Sequence
+from sqlalchemy.orm import relationship
+
+from app.db.base_class import Base
+
+# Every change of a shard takes the next value while the row is locked, so the
+# versions of one shard grow in commit order
+answer_tally_version = Sequence("answertally_version_seq")
+
+
+class AnswerTally(Base):
+    # Every option's counter is split over several shard rows so that a burst
+    # of votes for one option does not queue up on a single row lock. The
+    # number of votes is the sum over all shards of the option.
+    answer_option_id = Column(
+        Integer, ForeignKey("answeroption.id", ondelete="CASCADE"), primary_key=True
+    )
+    shard = Column(Integer, primary_key=True, default=0, server_default="0")
+    answer_option = relationship("AnswerOption")
+    poll_id = Column(Integer, ForeignKey("poll.id"), index=True, nullable=False)
+    count = Column(Integer, nullable=False, default=0, server_default="0")
+    version = Column(
+        BigInteger,
+        answer_tally_version,
+        nullable=False,
+        server_default=answer_tally_version.next_value(),
+    )
@@ -1,6 +1,15 @@
 from typing import TYPE_CHECKING
 
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String, func
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    func,
+)
 from sqlalchemy.orm import relationship
 
 from app.db.base_class import Base
@@ -16,10 +25,12 @@ if TYPE_CHECKING:
 
 
 class Event(Base):
-    id = Column(Integer, primary_key=True, index=True)
+    __table_args__ = (Index("ix_event_owner_id_id", "owner_id", "id"),)
+
+    id = Column(Integer, primary_key=True)
     is_open = Column(Boolean(), default=False)
-    name = Column(String, index=True)
-    description = Column(String, index=True, nullable=True)
+    name = Column(String)
+    description = Column(String, nullable=True)
     owner = relationship("User", back_populates="events")
     owner_id = Column(Integer, ForeignKey("user.id"))
     participants = relationship(
@@ -40,3 +51,5 @@ class Event(Base):
     start_at = Column(DateTime, nullable=False)
     close_at = Column(DateTime, nullable=True)
     polls = relationship("Poll", back_populates="event")
+    # Bumped by every membership change, invalidates the event tokens issued before
+    roles_version = Column(Integer, nullable=False, default=0, server_default="0")
@@ -1,12 +1,26 @@
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String, func
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    func,
+)
 from sqlalchemy.orm import relationship
 
 from app.db.base_class import Base
 
 
 class Poll(Base):
-    id = Column(Integer, primary_key=True, index=True)
-    question = Column(String, index=True, nullable=False)
+    __table_args__ = (
+        Index("ix_poll_event_id_id", "event_id", "id"),
+        Index("ix_poll_owner_id_id", "owner_id", "id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    question = Column(String, nullable=False)
     owner_id = Column(Integer, ForeignKey("user.id"))
     owner = relationship("User", back_populates="polls_created")
     answers = relationship("Answer", back_populates="poll")
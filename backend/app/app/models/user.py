@@ -1,13 +1,15 @@
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, Table
+from sqlalchemy import Boolean, Column, ForeignKey, Index, Integer, String, Table
 from sqlalchemy.orm import relationship
 
 from app.db.base_class import Base
 
+# The primary keys find the events of a user, the indexes the members of an event
 user_events_association_table = Table(
     "user_events_association",
     Base.metadata,
     Column("user_id", ForeignKey("user.id"), primary_key=True),
     Column("event_id", ForeignKey("event.id"), primary_key=True),
+    Index("ix_user_events_association_event_id_user_id", "event_id", "user_id"),
 )
 
 acess_moderator_events_association_table = Table(
@@ -15,6 +17,11 @@ acess_moderator_events_association_table = Table(
     Base.metadata,
     Column("user_id", ForeignKey("user.id"), primary_key=True),
     Column("event_id", ForeignKey("event.id"), primary_key=True),
+    Index(
+        "ix_acess_moderator_events_association_event_id_user_id",
+        "event_id",
+        "user_id",
+    ),
 )
 
 voting_moderator_events_association_table = Table(
@@ -22,12 +29,17 @@ voting_moderator_events_association_table = Table(
     Base.metadata,
     Column("user_id", ForeignKey("user.id"), primary_key=True),
     Column("event_id", ForeignKey("event.id"), primary_key=True),
+    Index(
+        "ix_voting_moderator_events_association_event_id_user_id",
+        "event_id",
+        "user_id",
+    ),
 )
 
 
 class User(Base):
-    id = Column(Integer, primary_key=True, index=True)
-    full_name = Column(String, index=True)
+    id = Column(Integer, primary_key=True)
+    full_name = Column(String)
     academic_group = Column(String, index=True, nullable=True)
     is_student = Column(Boolean(), default=True)
     email = Column(String, unique=True, index=True, nullable=False)
@@ -1,14 +1,34 @@
 from .access_log import AccessLog, AccessLogCreate, AccessLogInDB, AccessLogUpdate
-from .answer import Answer, AnswerCreate, AnswerInDB, AnswerUpdate
+from .answer import Answer, AnswerCreate, AnswerInDB, AnswerReceipt, AnswerUpdate
 from .answer_option import (
     AnswerOption,
     AnswerOptionCreate,
     AnswerOptionInDB,
     AnswerOptionUpdate,
 )
-from .event import Event, EventCreate, EventInDB, EventUpdate
+from .cache import CacheStats
+from .event import (
+    Event,
+    EventCreate,
+    EventInDB,
+    EventParticipantsAdd,
+    EventParticipantsAdded,
+    EventSummary,
+    EventUpdate,
+)
 from .item import Item, ItemCreate, ItemInDB, ItemUpdate
 from .msg import Msg
-from .poll import Poll, PollCreate, PollInDB, PollRename, PollUpdate
+from .password_hashing import PasswordHashingStats
+from .poll import (
+    AnswerOptionResult,
+    Poll,
+    PollCreate,
+    PollInDB,
+    PollRename,
+    PollResults,
+    PollSummary,
+    PollUpdate,
+)
 from .token import Token, TokenPayload
-from .user import User, UserCreate, UserInDB, UserUpdate
+from .user import User, UserCreate, UserInDB, UserSnapshot, UserUpdate
+from .user_import import UserImportReport, UserImportRow
@@ -19,6 +19,16 @@ class AnswerUpdate(AnswerBase):
     answer_option_id: int
 
 
+# Properties to return to client once a vote is stored
+class AnswerReceipt(AnswerBase):
+    id: int
+    owner_id: int
+    created_at: datetime.datetime
+
+    class Config:
+        orm_mode = True
+
+
 class AnswerInDBBase(AnswerBase):
     id: int
     owner_id: int
@@ -0,0 +1,12 @@
+from pydantic import BaseModel
+
+
+class CacheStats(BaseModel):
+    entries: int
+    hits: int
+    misses: int
+    hit_rate: float
+    invalidations: int
+    invalidation_lag_avg_ms: float
+    invalidation_lag_max_ms: float
+    oldest_entry_age_s: float
@@ -1,7 +1,7 @@
 import datetime
 from typing import List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, root_validator
 
 from .poll import Poll
 from .user import User
@@ -46,3 +46,37 @@ class Event(EventInDBBase):
 # Properties properties stored in DB
 class EventInDB(EventInDBBase):
     pass
+
+
+# Event with the sizes of its member lists and polls instead of the lists, they
+# are paginated under /events/{event_id}/participants, /moderators and /polls
+class EventSummary(EventBase):
+    id: int
+    owner_id: int
+    participants_count: int
+    access_moderators_count: int
+    voting_moderators_count: int
+    polls_count: int
+
+    class Config:
+        orm_mode = True
+
+
+# Participants to add at once: the users with the ids or a whole academic group
+class EventParticipantsAdd(BaseModel):
+    user_ids: Optional[List[int]] = None
+    academic_group: Optional[str] = None
+
+    @root_validator
+    def check_users(cls, values: dict) -> dict:
+        if (values.get("user_ids") is None) == (values.get("academic_group") is None):
+            raise ValueError("give either user_ids or academic_group")
+        return values
+
+
+# Counts to return once participants are added at once
+class EventParticipantsAdded(BaseModel):
+    added: int
+    already_participants: int
+    not_found: int
+    participants: int
@@ -0,0 +1,12 @@
+from pydantic import BaseModel
+
+
+class PasswordHashingStats(BaseModel):
+    workers: int
+    pending: int
+    submitted: int
+    completed: int
+    rejected: int
+    queue_time_avg_ms: float
+    queue_time_max_ms: float
+    hash_time_avg_ms: float
@@ -1,5 +1,5 @@
 import datetime
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import BaseModel
 
@@ -46,3 +46,32 @@ class Poll(PollInDBBase):
 # Properties properties stored in DB
 class PollInDB(PollInDBBase):
     pass
+
+
+# Poll without its owner, for listing the polls of an event
+class PollSummary(PollBase):
+    id: int
+    created_at: datetime.datetime
+    owner_id: int
+    is_running: bool = False
+    stop_at: Optional[datetime.datetime]
+
+    class Config:
+        orm_mode = True
+
+
+class AnswerOptionResult(BaseModel):
+    answer_option_id: int
+    text: str
+    votes: int
+
+    class Config:
+        orm_mode = True
+
+
+# Vote counts of a poll, read from the answer tallies
+class PollResults(BaseModel):
+    poll_id: int
+    is_running: bool
+    total: int
+    options: List[AnswerOptionResult]
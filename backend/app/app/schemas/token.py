@@ -10,3 +10,7 @@ class Token(BaseModel):
 
 class TokenPayload(BaseModel):
     sub: Optional[int] = None
+    # Set in event tokens only
+    event: Optional[int] = None
+    roles: Optional[int] = None
+    ver: Optional[int] = None
@@ -36,6 +36,14 @@ class User(UserInDBBase):
     pass
 
 
+# Immutable copy of an authenticated user, safe to share between requests
+class UserSnapshot(UserInDBBase):
+    id: int
+
+    class Config:
+        allow_mutation = False
+
+
 # Additional properties stored in DB
 class UserInDB(UserInDBBase):
     hashed_password: str
@@ -0,0 +1,19 @@
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+# Outcome of one row of a bulk user import: created, duplicate or invalid
+class UserImportRow(BaseModel):
+    row: int
+    email: Optional[str] = None
+    status: str
+    id: Optional[int] = None
+    detail: Optional[str] = None
+
+
+class UserImportReport(BaseModel):
+    created: int
+    duplicates: int
+    invalid: int
+    rows: List[UserImportRow]
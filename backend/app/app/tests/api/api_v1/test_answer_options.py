@@ -0,0 +1,39 @@
+from typing import Dict
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.core.config import settings
+from app.schemas.answer import AnswerCreate
+from app.tests.utils.poll import (
+    add_participants,
+    create_random_answer_option,
+    create_random_poll,
+)
+from app.tests.utils.queries import count_queries
+from app.tests.utils.user import create_random_users
+
+
+def test_read_answer_options_by_event_query_count(
+    client: TestClient, superuser_token_headers: Dict[str, str], db: Session
+) -> None:
+    poll = create_random_poll(db)
+    option = create_random_answer_option(db, poll_id=poll.id)
+    voters = create_random_users(db, count=5)
+    add_participants(db, event_id=poll.event_id, user_ids=voters)
+    url = f"{settings.API_V1_STR}/answer-options/{poll.event_id}"
+    client.get(url, headers=superuser_token_headers)
+
+    with count_queries() as no_answers:
+        r = client.get(url, headers=superuser_token_headers)
+    assert [item["id"] for item in r.json()] == [option.id]
+    answer_in = AnswerCreate(poll_id=poll.id, answer_option_id=option.id)
+    for voter in voters:
+        crud.answer.create_with_owner(db, obj_in=answer_in, owner_id=voter)
+    create_random_answer_option(db, poll_id=poll.id)
+    with count_queries() as five_answers:
+        r = client.get(url, headers=superuser_token_headers)
+    assert len(r.json()) == 2
+    assert {answer["owner"]["id"] for answer in r.json()[0]["answers"]} == set(voters)
+    assert len(five_answers) == len(no_answers)
@@ -1,8 +1,12 @@
 from typing import Dict
 
 from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
 
+from app import crud, models
 from app.core.config import settings
+from app.tests.utils.poll import create_random_answer_option, create_random_poll
+from app.worker import reconcile_answer_tallies
 
 
 def test_celery_worker_test(
@@ -16,3 +20,42 @@ def test_celery_worker_test(
     )
     response = r.json()
     assert response["msg"] == "Word received"
+
+
+def test_reconcile_tallies(
+    client: TestClient, superuser_token_headers: Dict[str, str], db: Session
+) -> None:
+    poll = create_random_poll(db)
+    r = client.post(
+        f"{settings.API_V1_STR}/utils/reconcile-tallies/",
+        params={"poll_id": poll.id},
+        headers=superuser_token_headers,
+    )
+    assert r.status_code == 201
+    assert r.json()["msg"] == "Reconciliation scheduled"
+
+
+def test_reconcile_tallies_needs_superuser(
+    client: TestClient, normal_user_token_headers: Dict[str, str]
+) -> None:
+    r = client.post(
+        f"{settings.API_V1_STR}/utils/reconcile-tallies/",
+        headers=normal_user_token_headers,
+    )
+    assert r.status_code == 400
+
+
+def test_reconcile_tallies_task_fixes_one_poll(db: Session) -> None:
+    drifted, other = create_random_poll(db), create_random_poll(db)
+    for poll in (drifted, other):
+        option = create_random_answer_option(db, poll_id=poll.id)
+        db.add(models.AnswerTally(answer_option_id=option.id, poll_id=poll.id, count=3))
+    db.commit()
+
+    drift = reconcile_answer_tallies(drifted.id)
+    assert [(row["poll_id"], row["stored"], row["counted"]) for row in drift] == [
+        (drifted.id, 3, 0)
+    ]
+    assert crud.answer_tally.reconcile(db, poll_id=drifted.id, fix=False) == []
+    # Polls other than the requested one are left alone
+    assert len(crud.answer_tally.reconcile(db, poll_id=other.id, fix=False)) == 1
@@ -0,0 +1,142 @@
+from typing import Dict
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.core.config import settings
+from app.tests.utils.poll import (
+    add_participants,
+    create_random_event,
+    create_random_poll,
+)
+from app.tests.utils.user import create_random_user
+
+
+def test_add_participants_to_event(
+    client: TestClient, superuser_token_headers: Dict[str, str], db: Session
+) -> None:
+    event = create_random_event(db)
+    member, user = create_random_user(db), create_random_user(db)
+    add_participants(db, event_id=event.id, user_ids=[member.id])
+    r = client.post(
+        f"{settings.API_V1_STR}/events/{event.id}/participants",
+        headers=superuser_token_headers,
+        json={"user_ids": [member.id, user.id, -1]},
+    )
+    assert r.status_code == 200
+    assert r.json() == {
+        "added": 1,
+        "already_participants": 1,
+        "not_found": 1,
+        "participants": 2,
+    }
+    assert crud.event.count_participants(db, event_id=event.id) == 2
+
+
+def test_add_participants_needs_users(
+    client: TestClient, superuser_token_headers: Dict[str, str], db: Session
+) -> None:
+    event = create_random_event(db)
+    r = client.post(
+        f"{settings.API_V1_STR}/events/{event.id}/participants",
+        headers=superuser_token_headers,
+        json={},
+    )
+    assert r.status_code == 422
+
+
+def test_add_participants_not_enough_permissions(
+    client: TestClient, normal_user_token_headers: Dict[str, str], db: Session
+) -> None:
+    event = create_random_event(db)
+    r = client.post(
+        f"{settings.API_V1_STR}/events/{event.id}/participants",
+        headers=normal_user_token_headers,
+        json={"academic_group": "IKBO-01-21"},
+    )
+    assert r.status_code == 400
+
+
+def test_add_second_moderator_to_event(
+    client: TestClient, superuser_token_headers: Dict[str, str], db: Session
+) -> None:
+    event = create_random_event(db)
+    first, second = create_random_user(db), create_random_user(db)
+    for moderator_type in ("access", "voting"):
+        for user in (first, second):
+            r = client.put(
+                f"{settings.API_V1_STR}/events/mod/{moderator_type}/{event.id}/"
+                f"{user.id}",
+                headers=superuser_token_headers,
+            )
+            assert r.status_code == 200
+        assert r.json()[f"{moderator_type}_moderators_count"] == 2
+        r = client.put(
+            f"{settings.API_V1_STR}/events/mod/{moderator_type}/{event.id}/"
+            f"{first.id}",
+            headers=superuser_token_headers,
+        )
+        assert r.status_code == 400
+        assert r.json()["detail"] == "user is already a moderator"
+
+
+def test_read_event_summary_and_members(
+    client: TestClient, superuser_token_headers: Dict[str, str], db: Session
+) -> None:
+    poll = create_random_poll(db)
+    users = [create_random_user(db) for _ in range(3)]
+    add_participants(db, event_id=poll.event_id, user_ids=[user.id for user in users])
+
+    r = client.get(
+        f"{settings.API_V1_STR}/events/{poll.event_id}",
+        headers=superuser_token_headers,
+    )
+    assert r.status_code == 200
+    summary = r.json()
+    assert "participants" not in summary
+    assert (summary["participants_count"], summary["polls_count"]) == (3, 1)
+
+    r = client.get(
+        f"{settings.API_V1_STR}/events/{poll.event_id}/participants",
+        headers=superuser_token_headers,
+        params={"skip": 1, "limit": 1},
+    )
+    assert [user["id"] for user in r.json()] == sorted(user.id for user in users)[1:2]
+
+    r = client.get(
+        f"{settings.API_V1_STR}/events/{poll.event_id}/moderators/voting",
+        headers=superuser_token_headers,
+    )
+    assert r.json() == []
+
+    r = client.get(
+        f"{settings.API_V1_STR}/events/{poll.event_id}/polls",
+        headers=superuser_token_headers,
+    )
+    assert [item["id"] for item in r.json()] == [poll.id]
+    assert "owner" not in r.json()[0]
+
+
+def test_create_event_returns_summary(
+    client: TestClient, superuser_token_headers: Dict[str, str]
+) -> None:
+    r = client.post(
+        f"{settings.API_V1_STR}/events/",
+        headers=superuser_token_headers,
+        json={"name": "event", "start_at": "2026-01-01T10:00:00"},
+    )
+    assert r.status_code == 200
+    assert r.json()["participants_count"] == 0
+
+
+def test_read_event_fields(
+    client: TestClient, superuser_token_headers: Dict[str, str], db: Session
+) -> None:
+    event = create_random_event(db)
+    r = client.get(
+        f"{settings.API_V1_STR}/events/{event.id}",
+        headers=superuser_token_headers,
+        params={"fields": "name,participants_count"},
+    )
+    assert r.json() == {"name": event.name, "participants_count": 0}
@@ -1,8 +1,19 @@
 from typing import Dict
 
 from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
 
+from app import crud
+from app.api import deps
+from app.core import security
 from app.core.config import settings
+from app.tests.utils.poll import (
+    add_participants,
+    create_random_answer_option,
+    create_random_event,
+    create_random_poll,
+)
+from app.tests.utils.user import create_random_user
 
 
 def test_get_access_token(client: TestClient) -> None:
@@ -26,3 +37,59 @@ def test_use_access_token(
     result = r.json()
     assert r.status_code == 200
     assert "email" in result
+
+
+def test_event_token_carries_roles(client: TestClient, db: Session) -> None:
+    poll = create_random_poll(db)
+    option = create_random_answer_option(db, poll_id=poll.id)
+    voter = create_random_user(db)
+    add_participants(db, event_id=poll.event_id, user_ids=[voter.id])
+
+    headers = {"Authorization": f"Bearer {security.create_access_token(voter.id)}"}
+    r = client.post(
+        f"{settings.API_V1_STR}/login/event-token/{poll.event_id}", headers=headers
+    )
+    assert r.status_code == 200
+    token = r.json()["access_token"]
+    payload = deps.decode_token(token)
+    assert payload.sub == voter.id
+    assert payload.event == poll.event_id
+    assert payload.roles == security.EventRole.PARTICIPANT
+
+    r = client.post(
+        f"{settings.API_V1_STR}/answers/",
+        json={"poll_id": poll.id, "answer_option_id": option.id},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert r.status_code == 200
+
+
+def test_member_change_revokes_event_token_roles(db: Session) -> None:
+    event = create_random_event(db)
+    user = create_random_user(db)
+    version = crud.event.get_roles_version(db, event_id=event.id)
+    # Roles the user no longer has, as if they were taken away after login
+    token = security.create_event_token(
+        user.id,
+        event_id=event.id,
+        roles=security.EventRole.PARTICIPANT,
+        version=version,
+    )
+    token_data = deps.decode_token(token)
+    assert (
+        deps.get_event_roles(
+            db, token_data=token_data, event_id=event.id, user_id=user.id
+        )
+        == security.EventRole.PARTICIPANT
+    )
+
+    crud.event.add_participant_to_event(
+        db, event_id=event.id, user=create_random_user(db)
+    )
+    assert crud.event.get_roles_version(db, event_id=event.id) == version + 1
+    assert (
+        deps.get_event_roles(
+            db, token_data=token_data, event_id=event.id, user_id=user.id
+        )
+        == security.EventRole.NONE
+    )
@@ -0,0 +1,104 @@
+from typing import Dict
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from starlette.websockets import WebSocketDisconnect
+
+from app import crud
+from app.api.api_v1.endpoints import moderation
+from app.core.config import settings
+from app.schemas.answer import AnswerCreate
+from app.tests.utils.poll import (
+    add_participants,
+    create_random_answer_option,
+    create_random_poll,
+)
+from app.tests.utils.user import create_random_users
+
+
+def test_moderation_requires_token(client: TestClient, db: Session) -> None:
+    poll = create_random_poll(db)
+    with pytest.raises(WebSocketDisconnect):
+        with client.websocket_connect(
+            f"{settings.API_V1_STR}/events/{poll.event_id}/ws"
+        ) as websocket:
+            websocket.receive_json()
+
+
+def test_moderation_snapshot_and_commands(
+    client: TestClient, superuser_token_headers: Dict[str, str], db: Session
+) -> None:
+    poll = create_random_poll(db)
+    option = create_random_answer_option(db, poll_id=poll.id)
+    with client.websocket_connect(
+        f"{settings.API_V1_STR}/events/{poll.event_id}/ws",
+        headers=superuser_token_headers,
+    ) as websocket:
+        snapshot = websocket.receive_json()
+        assert snapshot["type"] == "snapshot"
+        assert snapshot["event_id"] == poll.event_id
+        assert snapshot["polls"][0]["id"] == poll.id
+        assert snapshot["polls"][0]["results"] == {str(option.id): 0}
+        assert snapshot["polls"][0]["voters"] == 0
+
+        websocket.send_json({"action": "stop_poll", "poll_id": poll.id})
+        ack = websocket.receive_json()
+        assert ack["type"] == "ack"
+        assert ack["poll_id"] == poll.id
+        assert ack["is_running"] is False
+
+        websocket.send_json({"action": "stop_poll", "poll_id": -1})
+        error = websocket.receive_json()
+        assert error == {"type": "error", "detail": "Poll not found"}
+
+
+def test_moderation_counts_votes_once(
+    client: TestClient, superuser_token_headers: Dict[str, str], db: Session
+) -> None:
+    poll = create_random_poll(db)
+    option = create_random_answer_option(db, poll_id=poll.id)
+    first, second = create_random_users(db, count=2)
+    add_participants(db, event_id=poll.event_id, user_ids=[first, second])
+    answer_in = AnswerCreate(poll_id=poll.id, answer_option_id=option.id)
+
+    # The first vote is still on its way to the subscribers when the socket
+    # reads the snapshot that counts it
+    crud.answer.create_with_owner(db, obj_in=answer_in, owner_id=first)
+    with client.websocket_connect(
+        f"{settings.API_V1_STR}/events/{poll.event_id}/ws",
+        headers=superuser_token_headers,
+    ) as websocket:
+        snapshot = websocket.receive_json()
+        assert snapshot["polls"][0]["results"] == {str(option.id): 1}
+        assert snapshot["polls"][0]["voters"] == 1
+
+        crud.answer.create_with_owner(db, obj_in=answer_in, owner_id=second)
+        tally = websocket.receive_json()
+        assert tally == {
+            "type": "tally",
+            "poll_id": poll.id,
+            "deltas": {str(option.id): 1},
+            "voters": 2,
+        }
+
+
+def test_moderation_closes_without_updates(
+    client: TestClient,
+    superuser_token_headers: Dict[str, str],
+    db: Session,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    async def broken(*args: object) -> None:
+        raise RuntimeError("listener gone")
+
+    monkeypatch.setattr(moderation, "forward_updates", broken)
+    poll = create_random_poll(db)
+    with client.websocket_connect(
+        f"{settings.API_V1_STR}/events/{poll.event_id}/ws",
+        headers=superuser_token_headers,
+    ) as websocket:
+        assert websocket.receive_json()["type"] == "snapshot"
+        with pytest.raises(WebSocketDisconnect) as closed:
+            websocket.receive_json()
+    assert closed.value.code == 1011
@@ -0,0 +1,232 @@
+import asyncio
+import json
+from contextlib import suppress
+from typing import Any, Callable, Dict, List, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.core.config import settings
+from app.main import app
+from app.schemas.answer import AnswerCreate
+from app.tests.utils.poll import (
+    add_participants,
+    create_random_answer_option,
+    create_random_event,
+    create_random_poll,
+)
+from app.tests.utils.queries import count_queries
+from app.tests.utils.user import create_random_users
+
+
+def test_read_polls_by_event_query_count(
+    client: TestClient, superuser_token_headers: Dict[str, str], db: Session
+) -> None:
+    event = create_random_event(db)
+    create_random_poll(db, event_id=event.id)
+    url = f"{settings.API_V1_STR}/polls/{event.id}"
+    client.get(url, headers=superuser_token_headers)
+
+    with count_queries() as one_poll:
+        r = client.get(url, headers=superuser_token_headers)
+    assert len(r.json()) == 1
+    for _ in range(4):
+        create_random_poll(db, event_id=event.id)
+    with count_queries() as five_polls:
+        r = client.get(url, headers=superuser_token_headers)
+    assert len(r.json()) == 5
+    assert r.json()[0]["owner"]["id"] == event.owner_id
+    assert len(five_polls) == len(one_poll)
+
+
+def test_read_polls_fields_skip_owner(
+    client: TestClient, superuser_token_headers: Dict[str, str], db: Session
+) -> None:
+    poll = create_random_poll(db)
+    url = f"{settings.API_V1_STR}/polls/{poll.event_id}"
+    with count_queries() as statements:
+        r = client.get(
+            url, headers=superuser_token_headers, params={"fields": "id,question"}
+        )
+    assert r.json() == [{"id": poll.id, "question": poll.question}]
+    poll_queries = [statement for statement in statements if "FROM poll" in statement]
+    assert poll_queries
+    assert not any('"user"' in statement for statement in poll_queries)
+
+
+def test_read_polls_by_event_follows_cursor(
+    client: TestClient, superuser_token_headers: Dict[str, str], db: Session
+) -> None:
+    event = create_random_event(db)
+    polls = [create_random_poll(db, event_id=event.id) for _ in range(5)]
+    url = f"{settings.API_V1_STR}/polls/{event.id}"
+
+    ids = []
+    params = {"limit": 2}
+    while True:
+        r = client.get(url, headers=superuser_token_headers, params=params)
+        assert r.status_code == 200
+        ids += [poll["id"] for poll in r.json()]
+        if "X-Next-Cursor" not in r.headers:
+            break
+        params = {"limit": 2, "after": r.headers["X-Next-Cursor"]}
+    assert ids == [poll.id for poll in polls]
+
+    r = client.get(url, headers=superuser_token_headers, params={"after": "?"})
+    assert r.status_code == 400
+
+
+async def _read_events(
+    path: str,
+    headers: Dict[str, str],
+    *,
+    until: Callable[[List[Tuple[str, Any]]], bool],
+    after_snapshot: Callable[[], None],
+) -> List[Tuple[str, Any]]:
+    # The test client waits for the whole body, an endless stream is read
+    # from the application directly on the event loop of the client
+    scope = {
+        "type": "http",
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [
+            (name.lower().encode(), value.encode()) for name, value in headers.items()
+        ],
+        "client": ("testclient", 50000),
+        "server": ("testserver", 80),
+    }
+    requested = asyncio.Event()
+    chunks: "asyncio.Queue[bytes]" = asyncio.Queue()
+
+    async def receive() -> Dict[str, Any]:
+        if not requested.is_set():
+            requested.set()
+            return {"type": "http.request", "body": b""}
+        await asyncio.Event().wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: Dict[str, Any]) -> None:
+        if message["type"] == "http.response.start":
+            assert message["status"] == 200
+        elif message["type"] == "http.response.body":
+            await chunks.put(message.get("body", b""))
+
+    task = asyncio.create_task(app(scope, receive, send))
+    events: List[Tuple[str, Any]] = []
+    buffer = ""
+    try:
+        while not until(events):
+            buffer += (await asyncio.wait_for(chunks.get(), timeout=5)).decode()
+            while "\n\n" in buffer:
+                block, buffer = buffer.split("\n\n", 1)
+                if block.startswith(":"):
+                    continue
+                fields = dict(line.split(": ", 1) for line in block.split("\n"))
+                events.append((fields["event"], json.loads(fields["data"])))
+                if len(events) == 1:
+                    await run_in_threadpool(after_snapshot)
+    finally:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    return events
+
+
+def test_read_poll_results(
+    client: TestClient, superuser_token_headers: Dict[str, str], db: Session
+) -> None:
+    poll = create_random_poll(db)
+    chosen = create_random_answer_option(db, poll_id=poll.id)
+    other = create_random_answer_option(db, poll_id=poll.id)
+    users = create_random_users(db, count=2)
+    add_participants(db, event_id=poll.event_id, user_ids=users)
+    answer_in = AnswerCreate(poll_id=poll.id, answer_option_id=chosen.id)
+    for owner_id in users:
+        assert crud.answer.create_with_owner(db, obj_in=answer_in, owner_id=owner_id)
+    r = client.get(
+        f"{settings.API_V1_STR}/polls/{poll.id}/results",
+        headers=superuser_token_headers,
+    )
+    assert r.status_code == 200
+    assert r.json() == {
+        "poll_id": poll.id,
+        "is_running": True,
+        "total": 2,
+        "options": [
+            {"answer_option_id": chosen.id, "text": chosen.text, "votes": 2},
+            {"answer_option_id": other.id, "text": other.text, "votes": 0},
+        ],
+    }
+
+
+def test_read_poll_results_requires_access(
+    client: TestClient, normal_user_token_headers: Dict[str, str], db: Session
+) -> None:
+    poll = create_random_poll(db)
+    r = client.get(
+        f"{settings.API_V1_STR}/polls/{poll.id}/results",
+        headers=normal_user_token_headers,
+    )
+    assert r.status_code == 400
+    r = client.get(
+        f"{settings.API_V1_STR}/polls/-1/results",
+        headers=normal_user_token_headers,
+    )
+    assert r.status_code == 404
+
+
+def test_poll_results_stream_counts_votes_once(
+    client: TestClient, superuser_token_headers: Dict[str, str], db: Session
+) -> None:
+    poll = create_random_poll(db)
+    option = create_random_answer_option(db, poll_id=poll.id)
+    first, second = create_random_users(db, count=2)
+    add_participants(db, event_id=poll.event_id, user_ids=[first, second])
+    answer_in = AnswerCreate(poll_id=poll.id, answer_option_id=option.id)
+
+    def vote(owner_id: int) -> None:
+        assert crud.answer.create_with_owner(db, obj_in=answer_in, owner_id=owner_id)
+
+    # The first vote is still on its way to the subscribers when the stream
+    # reads the snapshot that counts it
+    vote(first)
+    events = client.portal.call(
+        lambda: _read_events(
+            f"{settings.API_V1_STR}/polls/{poll.id}/results/stream",
+            superuser_token_headers,
+            until=lambda events: any(event == "delta" for event, _ in events),
+            after_snapshot=lambda: vote(second),
+        )
+    )
+    (name, snapshot), *updates = events
+    assert name == "snapshot"
+    assert snapshot["total"] == 1
+    assert snapshot["options"] == [
+        {"answer_option_id": option.id, "text": option.text, "votes": 1}
+    ]
+    assert [data for event, data in updates if event == "delta"] == [
+        {str(option.id): 1}
+    ]
+
+
+def test_poll_results_stream_requires_access(
+    client: TestClient, normal_user_token_headers: Dict[str, str], db: Session
+) -> None:
+    poll = create_random_poll(db)
+    r = client.get(
+        f"{settings.API_V1_STR}/polls/{poll.id}/results/stream",
+        headers=normal_user_token_headers,
+    )
+    assert r.status_code == 400
+    r = client.get(
+        f"{settings.API_V1_STR}/polls/-1/results/stream",
+        headers=normal_user_token_headers,
+    )
+    assert r.status_code == 404
@@ -6,6 +6,7 @@ from sqlalchemy.orm import Session
 from app import crud
 from app.core.config import settings
 from app.schemas.user import UserCreate
+from app.tests.utils.student_api import WRONG_PASSWORD, StudentApi
 from app.tests.utils.utils import random_email, random_lower_string
 
 
@@ -113,3 +114,89 @@ def test_retrieve_users(
     assert len(all_users) > 1
     for item in all_users:
         assert "email" in item
+
+
+def test_register_student(
+    client: TestClient, db: Session, student_api: StudentApi
+) -> None:
+    email = f"{random_lower_string()}@mirea.ru"
+    data = {"email": email, "password": random_lower_string(), "is_student": True}
+    r = client.post(f"{settings.API_V1_STR}/users/register", json=data)
+    assert r.status_code == 200
+    user = crud.user.get_by_email(db, email=email)
+    assert user
+    assert user.is_student
+    assert user.academic_group == email.split("@")[0]
+    assert user.full_name == "Ivan Ivanovich Ivanov"
+
+    data = {"email": random_email(), "password": WRONG_PASSWORD, "is_student": True}
+    r = client.post(f"{settings.API_V1_STR}/users/register", json=data)
+    assert r.status_code == 400
+
+
+def test_import_users(
+    client: TestClient, superuser_token_headers: Dict[str, str], db: Session
+) -> None:
+    email = random_email()
+    content = f"email,password\n{email},{random_lower_string()}\nbroken,\n"
+    r = client.post(
+        f"{settings.API_V1_STR}/users/import",
+        headers=superuser_token_headers,
+        files={"file": ("students.csv", content, "text/csv")},
+    )
+    assert r.status_code == 200
+    report = r.json()
+    assert (report["created"], report["invalid"]) == (1, 1)
+    assert crud.user.get_by_email(db, email=email).id == report["rows"][0]["id"]
+
+
+def test_import_users_unsupported_format(
+    client: TestClient, superuser_token_headers: Dict[str, str]
+) -> None:
+    r = client.post(
+        f"{settings.API_V1_STR}/users/import",
+        headers=superuser_token_headers,
+        files={"file": ("students.xlsx", b"", "application/octet-stream")},
+    )
+    assert r.status_code == 400
+
+
+def test_import_users_normal_user(
+    client: TestClient, normal_user_token_headers: Dict[str, str]
+) -> None:
+    r = client.post(
+        f"{settings.API_V1_STR}/users/import",
+        headers=normal_user_token_headers,
+        files={"file": ("students.csv", "email,password\n", "text/csv")},
+    )
+    assert r.status_code == 400
+
+
+def test_read_users_fields(
+    client: TestClient, superuser_token_headers: Dict[str, str]
+) -> None:
+    r = client.get(
+        f"{settings.API_V1_STR}/users/",
+        headers=superuser_token_headers,
+        params={"fields": "id,email"},
+    )
+    assert r.status_code == 200
+    assert all(set(user) == {"id", "email"} for user in r.json())
+
+    r = client.get(
+        f"{settings.API_V1_STR}/users/me",
+        headers=superuser_token_headers,
+        params={"fields": "email"},
+    )
+    assert r.json() == {"email": settings.FIRST_SUPERUSER}
+
+
+def test_read_users_unknown_field(
+    client: TestClient, superuser_token_headers: Dict[str, str]
+) -> None:
+    r = client.get(
+        f"{settings.API_V1_STR}/users/",
+        headers=superuser_token_headers,
+        params={"fields": "id,hashed_password"},
+    )
+    assert r.status_code == 400
@@ -0,0 +1,46 @@
+import datetime
+import json
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app import schemas
+from app.api.fields import FieldSelector, select_fields
+
+
+def test_field_selector() -> None:
+    selector = FieldSelector(schemas.Poll)
+    assert selector(None) is None
+    assert selector("id, question,id") == ["id", "question"]
+    with pytest.raises(HTTPException) as exc_info:
+        selector("id,hashed_password")
+    assert exc_info.value.detail == "Unknown fields: hashed_password"
+    with pytest.raises(HTTPException):
+        selector(",")
+
+
+def test_select_fields() -> None:
+    owner = SimpleNamespace(
+        id=1,
+        email="owner@example.com",
+        full_name=None,
+        academic_group=None,
+        is_active=True,
+        is_student=False,
+        is_superuser=False,
+    )
+    poll = SimpleNamespace(
+        id=2, question="?", is_running=True, owner=owner, created_at=None
+    )
+    assert select_fields([poll], schemas.Poll, None) == [poll]
+
+    response = select_fields([poll], schemas.Poll, ["id", "is_running"])
+    assert json.loads(response.body) == [{"id": 2, "is_running": True}]
+
+    response = select_fields(poll, schemas.Poll, ["owner"])
+    assert json.loads(response.body)["owner"]["email"] == "owner@example.com"
+
+    poll.created_at = datetime.datetime(2026, 1, 1)
+    response = select_fields(poll, schemas.Poll, ["created_at"])
+    assert json.loads(response.body) == {"created_at": "2026-01-01T00:00:00"}
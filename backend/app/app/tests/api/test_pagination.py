@@ -0,0 +1,48 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException, Response
+from fastapi.responses import JSONResponse
+
+from app.api.pagination import (
+    NEXT_CURSOR_HEADER,
+    add_next_cursor,
+    encode_cursor,
+    get_after,
+)
+
+
+def test_cursor_round_trip() -> None:
+    assert get_after(None) is None
+    for id in (1, 99, 2**40):
+        assert get_after(encode_cursor(id)) == id
+
+
+@pytest.mark.parametrize(
+    "cursor", ["not a cursor", "", encode_cursor("1"), "eyJpZCI6IHRydWV9", "W10"]
+)
+def test_invalid_cursor(cursor: str) -> None:
+    with pytest.raises(HTTPException) as exc_info:
+        get_after(cursor)
+    assert exc_info.value.detail == "Invalid cursor"
+
+
+def test_add_next_cursor() -> None:
+    items = [SimpleNamespace(id=3), SimpleNamespace(id=7)]
+
+    response = Response()
+    assert add_next_cursor(items, response, items=items, limit=2) is items
+    assert get_after(response.headers[NEXT_CURSOR_HEADER]) == 7
+
+    for limit in (3, None):
+        response = Response()
+        add_next_cursor(items, response, items=items, limit=limit)
+        assert NEXT_CURSOR_HEADER not in response.headers
+
+    content = JSONResponse([{"id": 3}, {"id": 7}])
+    response = Response()
+    assert add_next_cursor(content, response, items=items, limit=2) is content
+    assert get_after(content.headers[NEXT_CURSOR_HEADER]) == 7
+    assert NEXT_CURSOR_HEADER not in response.headers
+    assert json.loads(content.body) == [{"id": 3}, {"id": 7}]
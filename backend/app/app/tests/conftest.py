@@ -5,8 +5,10 @@ from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
+from app.core.student_profiles import student_profiles
 from app.db.session import SessionLocal
 from app.main import app
+from app.tests.utils.student_api import StudentApi, run_student_api
 from app.tests.utils.user import authentication_token_from_email
 from app.tests.utils.utils import get_superuser_token_headers
 
@@ -32,3 +34,14 @@ def normal_user_token_headers(client: TestClient, db: Session) -> Dict[str, str]
     return authentication_token_from_email(
         client=client, email=settings.EMAIL_TEST_USER, db=db
     )
+
+
+@pytest.fixture
+def student_api() -> Generator:
+    api = StudentApi()
+    with run_student_api(api) as url:
+        original_url, student_profiles.url = student_profiles.url, url
+        try:
+            yield api
+        finally:
+            student_profiles.url = original_url
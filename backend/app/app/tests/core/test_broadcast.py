@@ -0,0 +1,135 @@
+import asyncio
+import threading
+from collections import Counter, namedtuple
+from typing import Any, List
+
+from app.core.broadcast import (
+    ALL_TOPICS,
+    Broadcaster,
+    Frame,
+    ShardCounts,
+    _notify,
+    poll_topic,
+)
+from app.db.pubsub import MAX_PAYLOAD_BYTES, pubsub
+
+Row = namedtuple("Row", "answer_option_id shard version count")
+
+
+def test_broadcaster_coalesces_bursts() -> None:
+    async def run() -> None:
+        broadcaster = Broadcaster(interval=0.05)
+        broadcaster.bind(asyncio.get_running_loop())
+        subscription = broadcaster.subscribe(poll_topic(1))
+
+        def vote_storm() -> None:
+            for number in range(1000):
+                shard = (number % 2, 0)
+                broadcaster.publish(
+                    poll_topic(1), shards={shard: (number + 1, number // 2 + 1)}
+                )
+            broadcaster.publish(poll_topic(1), state={"is_running": False})
+
+        thread = threading.Thread(target=vote_storm)
+        thread.start()
+        thread.join()
+
+        shards = ShardCounts()
+        votes: Counter = Counter()
+        frames = []
+        while sum(votes.values()) < 1000:
+            frames.append((await asyncio.wait_for(subscription.get(), timeout=1))[1])
+            votes.update(shards.apply(frames[-1]))
+        assert len(frames) <= 2
+        assert votes == {0: 500, 1: 500}
+        assert frames[-1].state == {"is_running": False}
+        subscription.close()
+
+    asyncio.run(run())
+
+
+def test_broadcaster_skips_topics_without_subscribers() -> None:
+    async def run() -> None:
+        broadcaster = Broadcaster(interval=0.01)
+        broadcaster.bind(asyncio.get_running_loop())
+        subscription = broadcaster.subscribe(poll_topic(1))
+        broadcaster.publish(poll_topic(2), shards={(1, 0): (1, 1)})
+        broadcaster.publish(poll_topic(1), shards={(1, 0): (1, 1)})
+        topic, frame = await asyncio.wait_for(subscription.get(), timeout=1)
+        assert topic == poll_topic(1)
+        assert frame.shards == {(1, 0): (1, 1)}
+        assert subscription.queue.empty()
+
+    asyncio.run(run())
+
+
+def test_slow_subscriber_gets_one_resync() -> None:
+    async def run() -> None:
+        broadcaster = Broadcaster(interval=0, queue_size=1)
+        broadcaster.bind(asyncio.get_running_loop())
+        slow = broadcaster.subscribe(poll_topic(1))
+        for number in range(2, 6):
+            slow.add_topic(poll_topic(number))
+        other = broadcaster.subscribe(poll_topic(1))
+        for number in range(5):
+            broadcaster._fan_out(
+                poll_topic(1), Frame(shards={(1, 0): (number, number)})
+            )
+        topic, frame = slow.queue.get_nowait()
+        assert topic == ALL_TOPICS
+        assert frame.resync
+        assert slow.queue.empty()
+        assert other.queue.qsize() == 1
+
+    asyncio.run(run())
+
+
+def test_frame_survives_notification_payload() -> None:
+    frame = Frame(shards={(3, 1): (7, 2)}, state={"is_running": True})
+    topic, received = Frame.loads(frame.dumps(poll_topic(5)))
+    assert topic == poll_topic(5)
+    assert received.shards == {(3, 1): (7, 2)}
+    assert received.state == {"is_running": True}
+    assert not received.resync
+
+
+def test_long_frames_are_split_into_notifications(monkeypatch: Any) -> None:
+    sent: List[str] = []
+    monkeypatch.setattr(pubsub, "notify", lambda channel, payload: sent.append(payload))
+    shards = {
+        (option, shard): (10**9, 10**6) for option in range(400) for shard in (0, 1)
+    }
+    _notify(poll_topic(5), Frame(shards=shards, state={"is_running": False}))
+    assert len(sent) > 1
+    received = [Frame.loads(payload)[1] for payload in sent]
+    assert all(len(payload.encode()) < MAX_PAYLOAD_BYTES for payload in sent)
+    assert {
+        key: value for frame in received for key, value in frame.shards.items()
+    } == (shards)
+    assert [frame.state for frame in received if frame.state] == [{"is_running": False}]
+
+
+def test_frames_keep_the_newest_shard() -> None:
+    frame = Frame(shards={(1, 0): (5, 3), (1, 1): (2, 1)})
+    frame.merge(Frame(shards={(1, 0): (4, 2), (1, 1): (6, 2), (2, 0): (1, 1)}))
+    assert frame.shards == {(1, 0): (5, 3), (1, 1): (6, 2), (2, 0): (1, 1)}
+
+
+def test_shard_counts_skip_frames_the_snapshot_counted() -> None:
+    snapshot = [
+        Row(answer_option_id=1, shard=0, version=5, count=3),
+        Row(answer_option_id=2, shard=None, version=None, count=None),
+    ]
+    shards = ShardCounts(snapshot)
+    # Committed before the snapshot was read, delivered after it
+    assert shards.apply(Frame(shards={(1, 0): (4, 2)})) == {}
+    assert shards.apply(Frame(shards={(1, 0): (5, 3)})) == {}
+    assert shards.apply(Frame(shards={(1, 0): (8, 5), (2, 0): (7, 1)})) == {
+        1: 2,
+        2: 1,
+    }
+    # A vote moved between options leaves the shard counts balanced
+    assert shards.apply(Frame(shards={(1, 0): (9, 4), (2, 0): (9, 2)})) == {
+        1: -1,
+        2: 1,
+    }
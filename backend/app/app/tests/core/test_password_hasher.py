@@ -0,0 +1,81 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.core.password_hasher import PasswordHasher, PasswordHasherBusy
+
+
+def test_hashes_in_worker_processes() -> None:
+    hasher = PasswordHasher(workers=1, max_queue=1)
+    try:
+        hashed_password = hasher.hash("secret")
+        assert hasher.verify("secret", hashed_password)
+        assert not asyncio.run(hasher.verify_async("wrong", hashed_password))
+    finally:
+        hasher.shutdown()
+    # Done callbacks of the pool have all run once it is shut down
+    stats = hasher.stats()
+    assert (stats["completed"], stats["pending"]) == (3, 0)
+    assert stats["hash_time_avg_ms"] > 0
+
+
+def test_full_queue_is_rejected_right_away() -> None:
+    hasher = PasswordHasher(workers=1, max_queue=0)
+    try:
+        busy = hasher._submit(time.sleep, 1)
+        started = time.perf_counter()
+        with pytest.raises(PasswordHasherBusy):
+            hasher.hash("secret")
+        assert time.perf_counter() - started < 0.1
+        busy.result()
+        assert hasher.verify("secret", hasher.hash("secret"))
+        assert hasher.stats()["rejected"] == 1
+    finally:
+        hasher.shutdown()
+
+
+def test_without_workers_hashes_inline() -> None:
+    hasher = PasswordHasher(workers=0, max_queue=0)
+    assert hasher.verify("secret", hasher.hash("secret"))
+    assert hasher.stats()["submitted"] == 0
+
+
+def test_hash_many_keeps_order() -> None:
+    hasher = PasswordHasher(workers=2, max_queue=0)
+    passwords = [f"secret {number}" for number in range(5)]
+    try:
+        hashed_passwords = hasher.hash_many(passwords, chunk_size=2)
+        assert len(hashed_passwords) == len(passwords)
+        for password, hashed_password in zip(passwords, hashed_passwords):
+            assert hasher.verify(password, hashed_password)
+    finally:
+        hasher.shutdown()
+    assert hasher.stats()["pending"] == 0
+
+
+def test_hash_many_is_not_rejected_without_a_queue() -> None:
+    hasher = PasswordHasher(workers=1, max_queue=0)
+    passwords = [f"secret {number}" for number in range(4)]
+    try:
+        assert len(hasher.hash_many(passwords, chunk_size=1)) == len(passwords)
+        assert hasher.stats()["rejected"] == 0
+    finally:
+        hasher.shutdown()
+
+
+def test_concurrent_hash_many_take_turns() -> None:
+    hasher = PasswordHasher(workers=1, max_queue=0)
+    passwords = [f"secret {number}" for number in range(3)]
+    try:
+        with ThreadPoolExecutor(2) as imports:
+            results = list(
+                imports.map(
+                    lambda _: hasher.hash_many(passwords, chunk_size=1), range(2)
+                )
+            )
+        assert [len(hashed_passwords) for hashed_passwords in results] == [3, 3]
+        assert hasher.stats()["rejected"] == 0
+    finally:
+        hasher.shutdown()
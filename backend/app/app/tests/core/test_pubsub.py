@@ -0,0 +1,112 @@
+import asyncio
+from typing import List
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.role_cache import EventMembers, EventRoleCache
+from app.db.pubsub import MAX_PAYLOAD_BYTES, PostgresPubSub
+from app.tests.utils.utils import random_lower_string
+
+
+def _pubsub() -> PostgresPubSub:
+    return PostgresPubSub(str(settings.SQLALCHEMY_DATABASE_URI))
+
+
+async def _wait_for(received: List[str], count: int) -> None:
+    for _ in range(100):
+        if len(received) >= count:
+            return
+        await asyncio.sleep(0.05)
+
+
+def test_notify_refuses_long_payloads() -> None:
+    with pytest.raises(ValueError):
+        _pubsub().notify("test", "x" * MAX_PAYLOAD_BYTES)
+
+
+def test_notifications_reach_other_workers() -> None:
+    channel = f"test_{random_lower_string()}"
+
+    async def run() -> List[str]:
+        listener, sender = _pubsub(), _pubsub()
+        received: List[str] = []
+        listener.subscribe(channel, received.append)
+        await listener.start()
+        try:
+            # The listener connects in the background
+            await asyncio.sleep(0.5)
+            sender.notify(channel, "first")
+            sender.notify(channel, "second")
+            await _wait_for(received, 2)
+        finally:
+            await sender.stop()
+            await listener.stop()
+        return received
+
+    assert asyncio.run(run()) == ["first", "second"]
+
+
+def test_refused_notification_drops_only_itself() -> None:
+    channel = f"test_{random_lower_string()}"
+
+    async def run() -> List[str]:
+        listener, sender = _pubsub(), _pubsub()
+        received: List[str] = []
+        listener.subscribe(channel, received.append)
+        await listener.start()
+        try:
+            await asyncio.sleep(0.5)
+            # PostgreSQL refuses an empty channel name
+            conn = sender._send(
+                None, [(channel, "first"), ("", "x"), (channel, "last")]
+            )
+            assert conn is not None and not conn.closed
+            conn.close()
+            await _wait_for(received, 2)
+        finally:
+            await listener.stop()
+        return received
+
+    assert asyncio.run(run()) == ["first", "last"]
+
+
+def test_reconnect_clears_caches(db: Session) -> None:
+    channel = f"test_{random_lower_string()}"
+    cache = EventRoleCache(max_events=10, ttl=60)
+
+    async def run() -> List[str]:
+        listener, sender = _pubsub(), _pubsub()
+        received: List[str] = []
+        reconnected = asyncio.Event()
+        listener.subscribe(channel, received.append)
+        listener.on_reconnect(cache.clear)
+        listener.on_reconnect(reconnected.set)
+        await listener.start()
+        try:
+            await asyncio.sleep(0.5)
+            members = EventMembers(
+                owner_id=1, participants=[], voting_moderators=[], access_moderators=[]
+            )
+            cache.put(1, members, cache.generation(1))
+            db.execute(
+                text(
+                    "SELECT pg_terminate_backend(pid) FROM pg_stat_activity "
+                    "WHERE query = :query"
+                ),
+                {"query": f'LISTEN "{channel}"'},
+            )
+            db.commit()
+            await asyncio.wait_for(reconnected.wait(), timeout=10)
+            assert cache.get(1) is None
+            # Listening again
+            sender.notify(channel, "after")
+            await _wait_for(received, 1)
+        finally:
+            await sender.stop()
+            await listener.stop()
+        return received
+
+    assert asyncio.run(run()) == ["after"]
@@ -0,0 +1,67 @@
+import json
+import time
+
+from app.core.role_cache import EventMembers, EventRoleCache
+from app.core.security import EventRole
+
+
+def _members(*participants: int) -> EventMembers:
+    return EventMembers(
+        owner_id=1,
+        participants=participants,
+        voting_moderators=[2],
+        access_moderators=[3, 2],
+    )
+
+
+def test_event_members_roles() -> None:
+    members = _members(7, 5, 2)
+    assert members.roles(1) == EventRole.OWNER
+    assert members.roles(2) == (
+        EventRole.PARTICIPANT | EventRole.VOTING_MODERATOR | EventRole.ACCESS_MODERATOR
+    )
+    assert members.roles(5) == EventRole.PARTICIPANT
+    assert members.roles(6) == EventRole.NONE
+    assert members.roles(8) == EventRole.NONE
+
+
+def test_cache_evicts_least_recently_used() -> None:
+    cache = EventRoleCache(max_events=2, ttl=60)
+    for event_id in (1, 2):
+        cache.put(event_id, _members(), cache.generation(event_id))
+    assert cache.get(1) is not None
+    cache.put(3, _members(), cache.generation(3))
+    assert cache.get(2) is None
+    assert cache.get(1) is not None
+    assert cache.get(3) is not None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (3, 1, 2)
+    assert stats["hit_rate"] == 0.75
+
+
+def test_cache_expires_entries() -> None:
+    cache = EventRoleCache(max_events=2, ttl=0)
+    cache.put(1, _members(), cache.generation(1))
+    assert cache.get(1) is None
+
+
+def test_load_racing_an_invalidation_is_not_kept() -> None:
+    cache = EventRoleCache(max_events=2, ttl=60)
+    generation = cache.generation(1)
+    # A participant was added and committed while the members were loaded
+    cache.discard(1)
+    cache.put(1, _members(), generation)
+    assert cache.get(1) is None
+    cache.put(1, _members(4), cache.generation(1))
+    members = cache.get(1)
+    assert members is not None and members.roles(4) == EventRole.PARTICIPANT
+
+
+def test_notifications_invalidate_and_record_lag() -> None:
+    cache = EventRoleCache(max_events=2, ttl=60)
+    cache.put(1, _members(), cache.generation(1))
+    cache.receive(json.dumps({"key": 1, "changed_at": time.time() - 0.05}))
+    assert cache.get(1) is None
+    stats = cache.stats()
+    assert stats["invalidations"] == 1
+    assert stats["invalidation_lag_max_ms"] >= 50
@@ -0,0 +1,77 @@
+from typing import Generator
+
+import pytest
+from jose import jwt
+from passlib.hash import bcrypt
+
+from app.core.config import settings
+from app.core.security import (
+    ALGORITHM,
+    EventRole,
+    calibrate_password_rounds,
+    can_user_manage_voting,
+    can_user_send_answer,
+    can_user_view_poll_info,
+    configure_password_hashing,
+    create_event_token,
+    get_password_hash,
+    pwd_context,
+    verify_and_update_password,
+)
+
+
+def test_event_role_checks() -> None:
+    assert can_user_send_answer(EventRole.PARTICIPANT)
+    assert not can_user_send_answer(EventRole.OWNER | EventRole.VOTING_MODERATOR)
+
+    assert can_user_manage_voting(EventRole.OWNER)
+    assert can_user_manage_voting(EventRole.VOTING_MODERATOR | EventRole.PARTICIPANT)
+    assert not can_user_manage_voting(
+        EventRole.PARTICIPANT | EventRole.ACCESS_MODERATOR
+    )
+
+    assert can_user_view_poll_info(EventRole.PARTICIPANT)
+    assert can_user_view_poll_info(EventRole.VOTING_MODERATOR)
+    assert not can_user_view_poll_info(EventRole.ACCESS_MODERATOR)
+
+    for check in (
+        can_user_send_answer,
+        can_user_manage_voting,
+        can_user_view_poll_info,
+    ):
+        assert check(EventRole.NONE) is False
+        assert check(None) is False
+
+
+def test_event_token_claims() -> None:
+    token = create_event_token(
+        42, event_id=7, roles=EventRole.PARTICIPANT | EventRole.OWNER, version=3
+    )
+    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
+    assert payload["sub"] == "42"
+    assert (payload["event"], payload["ver"]) == (7, 3)
+    assert EventRole(payload["roles"]) == EventRole.PARTICIPANT | EventRole.OWNER
+
+
+@pytest.fixture
+def restore_password_policy() -> Generator:
+    policy = pwd_context.to_dict()
+    yield
+    pwd_context.load(policy)
+
+
+def test_policy_change_updates_weaker_hashes(restore_password_policy: None) -> None:
+    configure_password_hashing("bcrypt", 5)
+    weak = get_password_hash("secret")
+    assert verify_and_update_password("secret", weak) == (True, None)
+
+    configure_password_hashing("bcrypt", 6)
+    verified, new_hash = verify_and_update_password("secret", weak)
+    assert verified and new_hash
+    assert bcrypt.from_string(new_hash).rounds == 6
+    assert verify_and_update_password("wrong", weak) == (False, None)
+
+
+def test_calibrated_bcrypt_rounds() -> None:
+    assert calibrate_password_rounds("bcrypt", 0.001) == 12
+    assert 12 <= calibrate_password_rounds("bcrypt", 0.25) <= 20
@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from app.core.student_profiles import (
+    StudentProfile,
+    StudentProfileClient,
+    StudentVerificationError,
+)
+from app.tests.utils.student_api import WRONG_PASSWORD, StudentApi, run_student_api
+
+
+def _client(url: str, *, timeout: float = 1) -> StudentProfileClient:
+    return StudentProfileClient(
+        url=url,
+        timeout=timeout,
+        max_connections=4,
+        failure_threshold=2,
+        cooldown=60,
+        cache_ttl=60,
+    )
+
+
+def test_profiles_are_fetched_and_cached() -> None:
+    api = StudentApi()
+
+    async def register() -> None:
+        client = _client(url)
+        try:
+            for _ in range(3):
+                profile = await client.get_profile(
+                    email="ikbo-01-21@mirea.ru", password="secret"
+                )
+                assert profile == StudentProfile(
+                    full_name="Ivan Ivanovich Ivanov", academic_group="ikbo-01-21"
+                )
+            with pytest.raises(StudentVerificationError) as exc_info:
+                await client.get_profile(
+                    email="ikbo-01-21@mirea.ru", password=WRONG_PASSWORD
+                )
+            assert exc_info.value.status_code == 400
+        finally:
+            await client.close()
+
+    with run_student_api(api) as url:
+        asyncio.run(register())
+    # A login for every call, the profile once, then a refused login
+    assert api.requests == 5
+
+
+def test_circuit_opens_after_failures() -> None:
+    api = StudentApi()
+    api.status_code = 502
+
+    async def register() -> None:
+        client = _client(url)
+        try:
+            for status_code in (502, 502, 503, 503):
+                with pytest.raises(StudentVerificationError) as exc_info:
+                    await client.get_profile(email="a@mirea.ru", password="secret")
+                assert exc_info.value.status_code == status_code
+            assert client.breaker.is_open
+        finally:
+            await client.close()
+
+    with run_student_api(api) as url:
+        asyncio.run(register())
+    assert api.requests == 2
+
+
+def test_slow_api_times_out() -> None:
+    api = StudentApi(latency=0.5)
+
+    async def register() -> None:
+        client = _client(url, timeout=0.1)
+        try:
+            with pytest.raises(StudentVerificationError) as exc_info:
+                await client.get_profile(email="a@mirea.ru", password="secret")
+            assert exc_info.value.status_code == 504
+        finally:
+            await client.close()
+
+    with run_student_api(api) as url:
+        asyncio.run(register())
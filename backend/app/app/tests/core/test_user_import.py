@@ -0,0 +1,58 @@
+import json
+
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.core.user_import import import_users
+from app.schemas.user import UserCreate
+from app.tests.utils.utils import random_email, random_lower_string
+
+
+def test_import_csv(db: Session) -> None:
+    taken = crud.user.create(
+        db, obj_in=UserCreate(email=random_email(), password=random_lower_string())
+    )
+    new_email = random_email()
+    content = (
+        "email,password,full_name,academic_group,is_student\n"
+        f"{new_email},secret,Ivan Ivanov,IKBO-01-21,true\n"
+        f"{taken.email},secret,,,\n"
+        f"{new_email},other,,,\n"
+        "not an email,secret,,,\n"
+    )
+    report = import_users(db, content, file_format="csv")
+    assert (report.created, report.duplicates, report.invalid) == (1, 2, 1)
+    assert [row.status for row in report.rows] == [
+        "created",
+        "duplicate",
+        "duplicate",
+        "invalid",
+    ]
+    assert [row.row for row in report.rows] == [2, 3, 4, 5]
+    user = crud.user.authenticate(db, email=new_email, password="secret")
+    assert user
+    assert user.id == report.rows[0].id
+    assert (user.full_name, user.academic_group) == ("Ivan Ivanov", "IKBO-01-21")
+    assert not user.is_superuser
+
+
+def test_import_jsonl(db: Session) -> None:
+    email = random_email()
+    content = "\n".join(
+        [
+            json.dumps({"email": email, "password": "secret", "is_superuser": True}),
+            "",
+            "not json",
+            json.dumps({"email": random_email()}),
+        ]
+    )
+    report = import_users(db, content, file_format="jsonl")
+    assert [(row.row, row.status) for row in report.rows] == [
+        (1, "created"),
+        (3, "invalid"),
+        (4, "invalid"),
+    ]
+    assert report.rows[2].detail == "password: field required"
+    user = crud.user.get_by_email(db, email=email)
+    assert user
+    assert not user.is_superuser
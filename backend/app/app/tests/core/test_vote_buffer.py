@@ -0,0 +1,87 @@
+import threading
+import time
+from typing import List
+
+import pytest
+
+from app.core.vote_buffer import Vote, VoteBuffer, VoteBufferFull
+
+
+def test_vote_buffer_writes_batches() -> None:
+    batches: List[List[Vote]] = []
+    buffer = VoteBuffer(batches.append, max_size=1000, batch_size=100, max_latency=1)
+    buffer.start()
+    for owner_id in range(250):
+        assert buffer.put({"poll_id": 1, "answer_option_id": 1, "owner_id": owner_id})
+    buffer.stop()
+
+    assert [len(batch) for batch in batches] == [100, 100, 50]
+    assert [vote["owner_id"] for batch in batches for vote in batch] == list(range(250))
+
+
+def test_vote_buffer_respects_max_latency() -> None:
+    written = threading.Event()
+    buffer = VoteBuffer(
+        lambda batch: written.set(), max_size=10, batch_size=10, max_latency=0.02
+    )
+    buffer.start()
+    started = time.monotonic()
+    buffer.put({"poll_id": 1, "answer_option_id": 1, "owner_id": 1})
+    assert written.wait(1)
+    assert time.monotonic() - started < 0.5
+    buffer.stop()
+
+
+def test_vote_buffer_rejects_queued_duplicates() -> None:
+    release = threading.Event()
+    batches: List[List[Vote]] = []
+
+    def write(batch: List[Vote]) -> None:
+        release.wait(1)
+        batches.append(batch)
+
+    buffer = VoteBuffer(write, max_size=10, batch_size=10, max_latency=0)
+    buffer.start()
+    assert buffer.put({"poll_id": 1, "answer_option_id": 1, "owner_id": 1})
+    assert not buffer.put({"poll_id": 1, "answer_option_id": 2, "owner_id": 1})
+    assert buffer.put({"poll_id": 2, "answer_option_id": 3, "owner_id": 1})
+    release.set()
+    buffer.stop()
+
+    votes = [vote for batch in batches for vote in batch]
+    assert [vote["answer_option_id"] for vote in votes] == [1, 3]
+    # Written votes no longer block the owner, the database rejects repeats
+    buffer.start()
+    assert buffer.put({"poll_id": 1, "answer_option_id": 2, "owner_id": 1})
+    buffer.stop()
+
+
+def test_vote_buffer_full_or_stopped() -> None:
+    release = threading.Event()
+    buffer = VoteBuffer(
+        lambda batch: release.wait(1), max_size=1, batch_size=1, max_latency=0
+    )
+    with pytest.raises(VoteBufferFull):
+        buffer.put({"poll_id": 1, "answer_option_id": 1, "owner_id": 1})
+
+    buffer.start()
+    with pytest.raises(VoteBufferFull):
+        for owner_id in range(10):
+            buffer.put({"poll_id": 1, "answer_option_id": 1, "owner_id": owner_id})
+    release.set()
+    buffer.stop()
+
+
+def test_vote_buffer_retries_failed_batches() -> None:
+    attempts: List[int] = []
+
+    def write(batch: List[Vote]) -> None:
+        attempts.append(len(batch))
+        if len(attempts) < 2:
+            raise RuntimeError("database is away")
+
+    buffer = VoteBuffer(write, max_size=10, batch_size=10, max_latency=0.01)
+    buffer.start()
+    buffer.put({"poll_id": 1, "answer_option_id": 1, "owner_id": 1})
+    buffer.stop()
+    assert attempts == [1, 1]
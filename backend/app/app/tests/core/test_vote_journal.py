@@ -0,0 +1,139 @@
+import multiprocessing
+import os
+from multiprocessing.connection import Connection
+from pathlib import Path
+from typing import List
+
+from sqlalchemy.orm import Session
+
+from app import crud, models
+from app.core.vote_buffer import VoteBuffer, write_votes
+from app.core.vote_journal import (
+    RECORD,
+    Vote,
+    VoteJournal,
+    pack_vote,
+    read_votes,
+    replay_orphaned,
+)
+from app.tests.utils.poll import (
+    add_participants,
+    create_random_answer_option,
+    create_random_poll,
+)
+from app.tests.utils.user import create_random_users
+
+VOTERS = 2000
+
+
+def _vote(owner_id: int) -> Vote:
+    return {"poll_id": 1, "answer_option_id": 2, "owner_id": owner_id}
+
+
+def test_read_votes_stops_at_torn_record(tmp_path: Path) -> None:
+    path = tmp_path / "votes-1-1.log"
+    path.write_bytes(
+        pack_vote(_vote(1)) + pack_vote(_vote(2)) + pack_vote(_vote(3))[:-5]
+    )
+    assert list(read_votes(str(path))) == [_vote(1), _vote(2)]
+
+    garbled = bytearray(pack_vote(_vote(4)))
+    garbled[0] ^= 0xFF
+    path.write_bytes(pack_vote(_vote(1)) + bytes(garbled) + pack_vote(_vote(5)))
+    assert list(read_votes(str(path))) == [_vote(1)]
+
+
+def test_journal_keeps_votes_until_done(tmp_path: Path) -> None:
+    journal = VoteJournal(
+        str(tmp_path), fsync_interval=0, segment_size=RECORD.size * 10
+    )
+    journal.open()
+    segments = [journal.append(_vote(owner_id)) for owner_id in range(25)]
+    assert len(set(segments)) == 3
+
+    # Segments of a live journal are not replayed by others
+    replayed: List[Vote] = []
+    assert replay_orphaned(str(tmp_path), replayed.extend, batch_size=10) == 0
+
+    for segment in segments[:10]:
+        journal.done(segment)
+    assert len(os.listdir(tmp_path)) == 2
+    journal.close()
+
+    assert replay_orphaned(str(tmp_path), replayed.extend, batch_size=10) == 15
+    assert replayed == [_vote(owner_id) for owner_id in range(10, 25)]
+    assert os.listdir(tmp_path) == []
+
+
+def test_replay_sets_failing_votes_aside(tmp_path: Path) -> None:
+    path = tmp_path / "votes-1-1.log"
+    path.write_bytes(b"".join(pack_vote(_vote(owner_id)) for owner_id in range(5)))
+
+    replayed: List[Vote] = []
+
+    def write(votes: List[Vote]) -> None:
+        if any(vote["owner_id"] == 3 for vote in votes):
+            raise ValueError("answer option was deleted")
+        replayed.extend(votes)
+
+    assert replay_orphaned(str(tmp_path), write, batch_size=2) == 4
+    assert replayed == [_vote(owner_id) for owner_id in (0, 1, 2, 4)]
+    assert os.listdir(tmp_path) == ["votes-1-1.log.failed"]
+    assert list(read_votes(f"{path}.failed")) == [_vote(3)]
+
+
+def _burst(
+    directory: str, poll_id: int, option_id: int, voters: List[int], acks: Connection
+) -> None:
+    journal = VoteJournal(directory, fsync_interval=0.002, segment_size=4096)
+    # Slow batches leave plenty of journaled votes unwritten when killed
+    buffer = VoteBuffer(
+        write_votes,
+        max_size=len(voters),
+        batch_size=100,
+        max_latency=0.05,
+        journal=journal,
+    )
+    buffer.start()
+    for voter in voters:
+        vote = {"poll_id": poll_id, "answer_option_id": option_id, "owner_id": voter}
+        if buffer.put(vote):
+            acks.send(voter)
+
+
+def test_killed_burst_loses_and_duplicates_nothing(db: Session, tmp_path: Path) -> None:
+    poll = create_random_poll(db)
+    option = create_random_answer_option(db, poll_id=poll.id)
+    voters = create_random_users(db, count=VOTERS)
+    add_participants(db, event_id=poll.event_id, user_ids=voters)
+
+    context = multiprocessing.get_context("spawn")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(
+        target=_burst, args=(str(tmp_path), poll.id, option.id, voters, sender)
+    )
+    process.start()
+    sender.close()
+    acknowledged = set()
+    while len(acknowledged) < VOTERS // 2:
+        acknowledged.add(receiver.recv())
+    process.kill()
+    process.join()
+    while receiver.poll():
+        acknowledged.add(receiver.recv())
+
+    # What the restarted worker does before it accepts votes again
+    replay_orphaned(str(tmp_path), write_votes, batch_size=100)
+
+    stored = [
+        row.owner_id
+        for row in db.query(models.Answer.owner_id).filter(
+            models.Answer.poll_id == poll.id
+        )
+    ]
+    assert len(stored) == len(set(stored))
+    assert acknowledged <= set(stored)
+    assert set(stored) <= set(voters)
+    tally = crud.answer_tally.get_multi_by_poll(db, poll_id=poll.id)
+    assert sum(row.votes for row in tally) == len(stored)
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.crud.base import Range
+from app.schemas.access_log import AccessLogCreate
+from app.tests.utils.poll import create_random_event
+from app.tests.utils.user import create_random_user
+
+
+def test_get_multi_filters(db: Session) -> None:
+    event = create_random_event(db)
+    users = [create_random_user(db) for _ in range(2)]
+    start = datetime(2026, 1, 1)
+    logs = []
+    for number in range(4):
+        log = crud.access_log.create(
+            db,
+            obj_in=AccessLogCreate(
+                event_id=event.id,
+                given_by_id=event.owner_id,
+                received_id=users[number % 2].id,
+            ),
+        )
+        logs.append(
+            crud.access_log.update(
+                db,
+                db_obj=log,
+                obj_in={"received_at": start + timedelta(hours=number)},
+            )
+        )
+
+    def ids(**filters: object) -> list:
+        return [
+            log.id
+            for log in crud.access_log.get_multi(db, event_id=event.id, **filters)
+        ]
+
+    assert ids() == [log.id for log in logs]
+    assert ids(received_id=users[1].id) == [logs[1].id, logs[3].id]
+    assert ids(
+        received_at=Range(start + timedelta(hours=1), start + timedelta(hours=3))
+    ) == [logs[1].id, logs[2].id]
+    assert ids(
+        given_by_id=event.owner_id,
+        received_id=users[0].id,
+        received_at=Range(start + timedelta(hours=1)),
+    ) == [logs[2].id]
+    assert ids(limit=2, after=logs[1].id) == [logs[2].id, logs[3].id]
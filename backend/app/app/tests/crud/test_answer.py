@@ -0,0 +1,226 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app import crud, models
+from app.db.session import AsyncSessionLocal, SessionLocal, async_engine
+from app.schemas.answer import AnswerCreate
+from app.tests.utils.poll import (
+    add_participants,
+    create_random_answer_option,
+    create_random_poll,
+    vote_check_then_insert,
+)
+from app.tests.utils.queries import count_queries
+from app.tests.utils.user import create_random_user, create_random_users
+
+VOTERS = 1000
+WORKERS = 10
+
+
+def _storm(*, obj_in: AnswerCreate, owner_ids: List[int]) -> None:
+    def cast(owner_id: int) -> None:
+        db = SessionLocal()
+        try:
+            crud.answer.create_with_owner(db, obj_in=obj_in, owner_id=owner_id)
+        finally:
+            db.close()
+
+    with ThreadPoolExecutor(max_workers=WORKERS) as executor:
+        list(executor.map(cast, owner_ids))
+
+
+def _count_answers(db: Session, *, poll_id: int) -> int:
+    return (
+        db.query(func.count(models.Answer.id))
+        .filter(models.Answer.poll_id == poll_id)
+        .scalar()
+    )
+
+
+def test_create_answer(db: Session) -> None:
+    poll = create_random_poll(db)
+    option = create_random_answer_option(db, poll_id=poll.id)
+    user = create_random_user(db)
+    add_participants(db, event_id=poll.event_id, user_ids=[user.id])
+    answer_in = AnswerCreate(poll_id=poll.id, answer_option_id=option.id)
+    answer = crud.answer.create_with_owner(db, obj_in=answer_in, owner_id=user.id)
+    assert answer
+    assert answer.poll_id == poll.id
+    assert answer.answer_option_id == option.id
+    assert answer.owner_id == user.id
+
+
+def test_create_answer_async(db: Session) -> None:
+    poll = create_random_poll(db)
+    option = create_random_answer_option(db, poll_id=poll.id)
+    user = create_random_user(db)
+    add_participants(db, event_id=poll.event_id, user_ids=[user.id])
+    answer_in = AnswerCreate(poll_id=poll.id, answer_option_id=option.id)
+
+    async def vote_twice() -> Tuple[Optional[models.Answer], Optional[models.Answer]]:
+        try:
+            async with AsyncSessionLocal() as async_db:
+                first = await crud.async_answer.create_with_owner(
+                    async_db, obj_in=answer_in, owner_id=user.id
+                )
+                second = await crud.async_answer.create_with_owner(
+                    async_db, obj_in=answer_in, owner_id=user.id
+                )
+                return first, second
+        finally:
+            # Pooled connections belong to the event loop of this test
+            await async_engine.dispose()
+
+    first, second = asyncio.run(vote_twice())
+    assert first
+    assert first.owner_id == user.id
+    assert second is None
+    results = crud.answer_tally.get_multi_by_poll(db, poll_id=poll.id)
+    assert [row.votes for row in results] == [1]
+
+
+def test_create_answer_twice(db: Session) -> None:
+    poll = create_random_poll(db)
+    option = create_random_answer_option(db, poll_id=poll.id)
+    user = create_random_user(db)
+    add_participants(db, event_id=poll.event_id, user_ids=[user.id])
+    answer_in = AnswerCreate(poll_id=poll.id, answer_option_id=option.id)
+    assert crud.answer.create_with_owner(db, obj_in=answer_in, owner_id=user.id)
+    assert crud.answer.create_with_owner(db, obj_in=answer_in, owner_id=user.id) is None
+    assert _count_answers(db, poll_id=poll.id) == 1
+
+
+def test_create_answer_not_eligible(db: Session) -> None:
+    poll = create_random_poll(db, is_running=False)
+    option = create_random_answer_option(db, poll_id=poll.id)
+    other_option = create_random_answer_option(db, poll_id=create_random_poll(db).id)
+    participant = create_random_user(db)
+    outsider = create_random_user(db)
+    add_participants(db, event_id=poll.event_id, user_ids=[participant.id])
+
+    answer_in = AnswerCreate(poll_id=poll.id, answer_option_id=option.id)
+    assert (
+        crud.answer.create_with_owner(db, obj_in=answer_in, owner_id=participant.id)
+        is None
+    )
+
+    crud.poll.update(
+        db, db_obj=crud.poll.get(db, id=poll.id), obj_in={"is_running": True}
+    )
+    assert (
+        crud.answer.create_with_owner(db, obj_in=answer_in, owner_id=outsider.id)
+        is None
+    )
+
+    foreign_in = AnswerCreate(poll_id=poll.id, answer_option_id=other_option.id)
+    assert (
+        crud.answer.create_with_owner(db, obj_in=foreign_in, owner_id=participant.id)
+        is None
+    )
+    assert _count_answers(db, poll_id=poll.id) == 0
+
+
+def test_concurrent_votes_are_unique(db: Session) -> None:
+    poll = create_random_poll(db)
+    option = create_random_answer_option(db, poll_id=poll.id)
+    voters = create_random_users(db, count=VOTERS)
+    add_participants(db, event_id=poll.event_id, user_ids=voters)
+
+    # Every voter sends two votes at the same time, 2000 votes in total
+    storm = [voter for voter in voters for _ in range(2)]
+    _storm(
+        obj_in=AnswerCreate(poll_id=poll.id, answer_option_id=option.id),
+        owner_ids=storm,
+    )
+
+    assert _count_answers(db, poll_id=poll.id) == VOTERS
+    duplicates = (
+        db.query(models.Answer.owner_id)
+        .filter(models.Answer.poll_id == poll.id)
+        .group_by(models.Answer.owner_id)
+        .having(func.count(models.Answer.id) > 1)
+        .count()
+    )
+    assert duplicates == 0
+
+
+def test_vote_takes_fewer_statements_than_check_then_insert(db: Session) -> None:
+    poll = create_random_poll(db)
+    option = create_random_answer_option(db, poll_id=poll.id)
+    voters = create_random_users(db, count=2)
+    add_participants(db, event_id=poll.event_id, user_ids=voters)
+    answer_in = AnswerCreate(poll_id=poll.id, answer_option_id=option.id)
+
+    statements = []
+    for vote, owner_id in [
+        (vote_check_then_insert, voters[0]),
+        (crud.answer.create_with_owner, voters[1]),
+    ]:
+        session = SessionLocal()
+        try:
+            with count_queries() as executed:
+                assert vote(session, obj_in=answer_in, owner_id=owner_id)
+        finally:
+            session.close()
+        statements.append(len(executed))
+    check_then_insert, atomic = statements
+    # The vote itself and its tally, every round trip of the old path is gone
+    assert atomic == 2
+    assert atomic < check_then_insert
+
+
+def test_create_multi_answers_first_vote_wins(db: Session) -> None:
+    poll = create_random_poll(db)
+    option = create_random_answer_option(db, poll_id=poll.id)
+    other_option = create_random_answer_option(db, poll_id=poll.id)
+    voters = create_random_users(db, count=3)
+    add_participants(db, event_id=poll.event_id, user_ids=voters)
+    answer_in = AnswerCreate(poll_id=poll.id, answer_option_id=option.id)
+    assert crud.answer.create_with_owner(db, obj_in=answer_in, owner_id=voters[0])
+
+    votes = [
+        {"poll_id": poll.id, "answer_option_id": option_id, "owner_id": owner_id}
+        for owner_id, option_id in [
+            (voters[0], other_option.id),
+            (voters[1], other_option.id),
+            (voters[1], option.id),
+            (voters[2], option.id),
+        ]
+    ]
+    answers = crud.answer.create_multi_with_owners(db, votes=votes)
+    assert sorted((a.owner_id, a.answer_option_id) for a in answers) == [
+        (voters[1], other_option.id),
+        (voters[2], option.id),
+    ]
+    results = crud.answer_tally.get_multi_by_poll(db, poll_id=poll.id)
+    assert {row.answer_option_id: row.votes for row in results} == {
+        option.id: 2,
+        other_option.id: 1,
+    }
+
+
+def test_create_multi_answers_skips_deleted_rows(db: Session) -> None:
+    poll = create_random_poll(db)
+    option = create_random_answer_option(db, poll_id=poll.id)
+    removed_option = create_random_answer_option(db, poll_id=poll.id)
+    voters = create_random_users(db, count=3)
+    add_participants(db, event_id=poll.event_id, user_ids=voters)
+    crud.answer_option.remove(db, id=removed_option.id)
+    crud.poll.update(db, db_obj=poll, obj_in={"is_running": False})
+
+    votes = [
+        {"poll_id": poll.id, "answer_option_id": option_id, "owner_id": owner_id}
+        for owner_id, option_id in [
+            (voters[0], option.id),
+            (voters[1], removed_option.id),
+            (-1, option.id),
+            (voters[2], option.id),
+        ]
+    ]
+    answers = crud.answer.create_multi_with_owners(db, votes=votes)
+    assert sorted(answer.owner_id for answer in answers) == [voters[0], voters[2]]
+    assert _count_answers(db, poll_id=poll.id) == 2
@@ -0,0 +1,105 @@
+from sqlalchemy.orm import Session
+
+from app import crud, models
+from app.schemas.answer import AnswerCreate, AnswerUpdate
+from app.tests.utils.poll import (
+    add_participants,
+    create_random_answer_option,
+    create_random_poll,
+)
+from app.tests.utils.user import create_random_users
+
+
+def _votes(db: Session, *, poll_id: int) -> dict:
+    results = crud.answer_tally.get_multi_by_poll(db, poll_id=poll_id)
+    return {row.answer_option_id: row.votes for row in results}
+
+
+def test_tally_follows_votes(db: Session) -> None:
+    poll = create_random_poll(db)
+    first = create_random_answer_option(db, poll_id=poll.id)
+    second = create_random_answer_option(db, poll_id=poll.id)
+    voters = create_random_users(db, count=3)
+    add_participants(db, event_id=poll.event_id, user_ids=voters)
+    for voter in voters:
+        answer_in = AnswerCreate(poll_id=poll.id, answer_option_id=first.id)
+        crud.answer.create_with_owner(db, obj_in=answer_in, owner_id=voter)
+    assert _votes(db, poll_id=poll.id) == {first.id: 3, second.id: 0}
+
+    answer_in = AnswerUpdate(poll_id=poll.id, answer_option_id=second.id)
+    crud.answer.update_with_owner(db, obj_in=answer_in, owner_id=voters[0])
+    assert _votes(db, poll_id=poll.id) == {first.id: 2, second.id: 1}
+
+
+def test_reconcile_fixes_drift(db: Session) -> None:
+    poll = create_random_poll(db)
+    option = create_random_answer_option(db, poll_id=poll.id)
+    voters = create_random_users(db, count=2)
+    add_participants(db, event_id=poll.event_id, user_ids=voters)
+    for voter in voters:
+        answer_in = AnswerCreate(poll_id=poll.id, answer_option_id=option.id)
+        crud.answer.create_with_owner(db, obj_in=answer_in, owner_id=voter)
+    db.query(models.AnswerTally).filter(
+        models.AnswerTally.answer_option_id == option.id
+    ).delete()
+    db.add(models.AnswerTally(answer_option_id=option.id, poll_id=poll.id, count=5))
+    db.commit()
+
+    drift = crud.answer_tally.reconcile(db, poll_id=poll.id, fix=False)
+    assert [(row.answer_option_id, row.stored, row.counted) for row in drift] == [
+        (option.id, 5, 2)
+    ]
+    assert _votes(db, poll_id=poll.id) == {option.id: 5}
+
+    crud.answer_tally.reconcile(db, poll_id=poll.id)
+    assert _votes(db, poll_id=poll.id) == {option.id: 2}
+    assert crud.answer_tally.reconcile(db, poll_id=poll.id) == []
+
+
+def test_tally_shards_are_summed(db: Session) -> None:
+    poll = create_random_poll(db)
+    option = create_random_answer_option(db, poll_id=poll.id)
+    voters = create_random_users(db, count=crud.answer_tally.shards * 2)
+    add_participants(db, event_id=poll.event_id, user_ids=voters)
+    for voter in voters:
+        answer_in = AnswerCreate(poll_id=poll.id, answer_option_id=option.id)
+        crud.answer.create_with_owner(db, obj_in=answer_in, owner_id=voter)
+    shards = (
+        db.query(models.AnswerTally)
+        .filter(models.AnswerTally.answer_option_id == option.id)
+        .count()
+    )
+    assert shards == crud.answer_tally.shards
+    assert _votes(db, poll_id=poll.id) == {option.id: len(voters)}
+
+
+def test_tally_shards_are_versioned(db: Session) -> None:
+    poll = create_random_poll(db)
+    first = create_random_answer_option(db, poll_id=poll.id)
+    second = create_random_answer_option(db, poll_id=poll.id)
+    voters = create_random_users(db, count=3)
+    add_participants(db, event_id=poll.event_id, user_ids=voters)
+    for voter in voters:
+        answer_in = AnswerCreate(poll_id=poll.id, answer_option_id=first.id)
+        crud.answer.create_with_owner(db, obj_in=answer_in, owner_id=voter)
+
+    shards = crud.answer_tally.get_shards(db, poll_ids=[poll.id])
+    options = crud.answer_tally.sum_shards(shards)
+    assert {row["answer_option_id"]: row["votes"] for row in options} == _votes(
+        db, poll_id=poll.id
+    )
+    versions = {
+        (row.answer_option_id, row.shard): row.version
+        for row in shards
+        if row.shard is not None
+    }
+
+    answer_in = AnswerUpdate(poll_id=poll.id, answer_option_id=second.id)
+    crud.answer.update_with_owner(db, obj_in=answer_in, owner_id=voters[0])
+    shard = crud.answer_tally.shard_for(voters[0])
+    moved = {
+        (row.answer_option_id, row.shard): row.version
+        for row in crud.answer_tally.get_shards(db, poll_ids=[poll.id])
+    }
+    assert moved[first.id, shard] > versions[first.id, shard]
+    assert moved[second.id, shard] > moved[first.id, shard]
@@ -0,0 +1,145 @@
+from datetime import datetime
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.core.security import EventRole
+from app.models.user import voting_moderator_events_association_table
+from app.schemas.event import EventCreate
+from app.tests.utils.poll import (
+    add_participants,
+    create_random_event,
+    create_random_poll,
+)
+from app.tests.utils.queries import assert_max_queries
+from app.tests.utils.user import create_random_user
+from app.tests.utils.utils import random_lower_string
+from app.utils import ModeratorType
+
+
+def test_get_roles(db: Session) -> None:
+    event = create_random_event(db)
+    participant = create_random_user(db)
+    moderator = create_random_user(db)
+    outsider = create_random_user(db)
+    add_participants(db, event_id=event.id, user_ids=[participant.id, moderator.id])
+    db.execute(
+        insert(voting_moderator_events_association_table).values(
+            event_id=event.id, user_id=moderator.id
+        )
+    )
+    db.commit()
+
+    assert (
+        crud.event.get_roles(db, event_id=event.id, user_id=event.owner_id)
+        == EventRole.OWNER
+    )
+    assert (
+        crud.event.get_roles(db, event_id=event.id, user_id=participant.id)
+        == EventRole.PARTICIPANT
+    )
+    assert (
+        crud.event.get_roles(db, event_id=event.id, user_id=moderator.id)
+        == EventRole.PARTICIPANT | EventRole.VOTING_MODERATOR
+    )
+    assert (
+        crud.event.get_roles(db, event_id=event.id, user_id=outsider.id)
+        == EventRole.NONE
+    )
+    assert crud.event.get_roles(db, event_id=-1, user_id=outsider.id) is None
+
+
+def test_add_participant_invalidates_cached_roles(db: Session) -> None:
+    event = create_random_event(db)
+    user = create_random_user(db)
+    assert (
+        crud.event.get_roles(db, event_id=event.id, user_id=user.id) == EventRole.NONE
+    )
+    crud.event.add_participant_to_event(db, event_id=event.id, user=user)
+    assert (
+        crud.event.get_roles(db, event_id=event.id, user_id=user.id)
+        == EventRole.PARTICIPANT
+    )
+
+
+def test_add_participants_by_academic_group(db: Session) -> None:
+    event = create_random_event(db)
+    academic_group = random_lower_string()
+    users = [create_random_user(db) for _ in range(3)]
+    for user in users:
+        crud.user.update(db, db_obj=user, obj_in={"academic_group": academic_group})
+    add_participants(db, event_id=event.id, user_ids=[users[0].id])
+    version = crud.event.get_roles_version(db, event_id=event.id)
+
+    found, added = crud.event.add_participants(
+        db, event_id=event.id, given_by_id=event.owner_id, academic_group=academic_group
+    )
+    assert (found, added) == (3, 2)
+    assert crud.event.count_participants(db, event_id=event.id) == 3
+    assert crud.event.get_roles_version(db, event_id=event.id) == version + 1
+    assert (
+        crud.event.get_roles(db, event_id=event.id, user_id=users[2].id)
+        == EventRole.PARTICIPANT
+    )
+    logs = crud.access_log.get_multi(db, event_id=event.id)
+    assert {log.received_id for log in logs} == {users[1].id, users[2].id}
+    assert {log.given_by_id for log in logs} == {event.owner_id}
+
+
+def test_add_participants_by_ids(db: Session) -> None:
+    event = create_random_event(db)
+    user = create_random_user(db)
+    found, added = crud.event.add_participants(
+        db, event_id=event.id, given_by_id=event.owner_id, user_ids=[user.id, -1]
+    )
+    assert (found, added) == (1, 1)
+    found, added = crud.event.add_participants(
+        db, event_id=event.id, given_by_id=event.owner_id, user_ids=[user.id]
+    )
+    assert (found, added) == (1, 0)
+
+
+def test_get_summary(db: Session) -> None:
+    event = create_random_event(db)
+    users = [create_random_user(db) for _ in range(3)]
+    add_participants(db, event_id=event.id, user_ids=[user.id for user in users])
+    crud.event.add_moderator_to_event(
+        db, event_id=event.id, user=users[0], moderator_type=ModeratorType.VOTING
+    )
+    create_random_poll(db, event_id=event.id)
+    summary = crud.event.get_summary(db, id=event.id)
+    assert (summary.id, summary.name, summary.owner_id) == (
+        event.id,
+        event.name,
+        event.owner_id,
+    )
+    assert summary.participants_count == 3
+    assert summary.access_moderators_count == 0
+    assert summary.voting_moderators_count == 1
+    assert summary.polls_count == 1
+    assert crud.event.get_summary(db, id=-1) is None
+
+
+def test_get_participants_pages(db: Session) -> None:
+    event = create_random_event(db)
+    user_ids = sorted(create_random_user(db).id for _ in range(3))
+    add_participants(db, event_id=event.id, user_ids=user_ids)
+    pages = [
+        crud.event.get_participants(db, event_id=event.id, skip=skip, limit=2)
+        for skip in (0, 2)
+    ]
+    assert [[user.id for user in page] for page in pages] == [
+        user_ids[:2],
+        user_ids[2:],
+    ]
+
+
+def test_create_with_owner_returns_server_defaults(db: Session) -> None:
+    owner = create_random_user(db)
+    event_in = EventCreate(name=random_lower_string(), start_at=datetime.utcnow())
+    with assert_max_queries(1):
+        event = crud.event.create_with_owner(db, obj_in=event_in, owner_id=owner.id)
+        assert event.created_at is not None
+        assert event.roles_version == 0
+        assert event.owner_id == owner.id
@@ -0,0 +1,40 @@
+from datetime import datetime
+from typing import Any, List, Tuple
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.crud.base import Range, build_filters
+from app.models.access_log import AccessLog
+
+
+def compile_filters(**filters: Any) -> List[Tuple[str, List[Any]]]:
+    compiled = []
+    for condition in build_filters(AccessLog, filters):
+        statement = condition.compile(dialect=postgresql.dialect())
+        compiled.append((str(statement), list(statement.params.values())))
+    return compiled
+
+
+def test_build_filters() -> None:
+    start, end = datetime(2026, 1, 1), datetime(2026, 2, 1)
+    assert compile_filters(
+        event_id=1,
+        given_by_id=None,
+        received_id=[2, 3],
+        received_at=Range(start, end),
+    ) == [
+        ("accesslog.event_id = %(event_id_1)s", [1]),
+        ("accesslog.received_id IN (__[POSTCOMPILE_received_id_1])", [[2, 3]]),
+        ("accesslog.received_at >= %(received_at_1)s", [start]),
+        ("accesslog.received_at < %(received_at_1)s", [end]),
+    ]
+    assert compile_filters(received_at=Range(end=end)) == [
+        ("accesslog.received_at < %(received_at_1)s", [end])
+    ]
+    assert compile_filters(given_by_id=None, received_at=Range()) == []
+
+
+def test_build_filters_unknown_column() -> None:
+    with pytest.raises(KeyError):
+        build_filters(AccessLog, {"password": "secret"})
@@ -2,6 +2,7 @@ from sqlalchemy.orm import Session
 
 from app import crud
 from app.schemas.item import ItemCreate, ItemUpdate
+from app.tests.utils.queries import assert_max_queries
 from app.tests.utils.user import create_random_user
 from app.tests.utils.utils import random_lower_string
 
@@ -59,3 +60,63 @@ def test_delete_item(db: Session) -> None:
     assert item2.title == title
     assert item2.description == description
     assert item2.owner_id == user.id
+
+
+def test_get_multi_by_owner_after(db: Session) -> None:
+    user = create_random_user(db)
+    items = [
+        crud.item.create_with_owner(
+            db=db, obj_in=ItemCreate(title=random_lower_string()), owner_id=user.id
+        )
+        for _ in range(3)
+    ]
+    first_page = crud.item.get_multi_by_owner(db=db, owner_id=user.id, limit=2)
+    assert [item.id for item in first_page] == [item.id for item in items[:2]]
+    second_page = crud.item.get_multi_by_owner(
+        db=db, owner_id=user.id, limit=2, after=first_page[-1].id
+    )
+    assert [item.id for item in second_page] == [items[2].id]
+
+
+def test_create_and_update_item_single_statement(db: Session) -> None:
+    user = create_random_user(db)
+    item_in = ItemCreate(title=random_lower_string())
+    with assert_max_queries(1):
+        item = crud.item.create_with_owner(db=db, obj_in=item_in, owner_id=user.id)
+        assert (item.title, item.owner_id) == (item_in.title, user.id)
+    description = random_lower_string()
+    with assert_max_queries(1):
+        item = crud.item.update(db=db, db_obj=item, obj_in={"description": description})
+        assert (item.title, item.description) == (item_in.title, description)
+
+
+def test_write_items_without_commit(db: Session) -> None:
+    user = create_random_user(db)
+    items = [
+        crud.item.create_with_owner(
+            db=db,
+            obj_in=ItemCreate(title=random_lower_string()),
+            owner_id=user.id,
+            commit=False,
+        )
+        for _ in range(2)
+    ]
+    crud.item.update(db=db, db_obj=items[0], obj_in={"title": "first"}, commit=False)
+    ids = [item.id for item in items]
+    db.rollback()
+    assert [crud.item.get(db=db, id=id) for id in ids] == [None, None]
+
+    items = [
+        crud.item.create_with_owner(
+            db=db,
+            obj_in=ItemCreate(title=random_lower_string()),
+            owner_id=user.id,
+            commit=False,
+        )
+        for _ in range(2)
+    ]
+    crud.item.commit(db, *items)
+    with assert_max_queries(0):
+        ids = [item.id for item in items]
+    db.expire_all()
+    assert all(crud.item.get(db=db, id=id) for id in ids)
@@ -1,7 +1,10 @@
+import pytest
 from fastapi.encoders import jsonable_encoder
+from passlib.hash import bcrypt
 from sqlalchemy.orm import Session
 
 from app import crud
+from app.core.password_hasher import password_hasher
 from app.core.security import verify_password
 from app.schemas.user import UserCreate, UserUpdate
 from app.tests.utils.utils import random_email, random_lower_string
@@ -92,3 +95,53 @@ def test_update_user(db: Session) -> None:
     assert user_2
     assert user.email == user_2.email
     assert verify_password(new_password, user_2.hashed_password)
+
+
+def test_update_user_invalidates_snapshot(db: Session) -> None:
+    user_in = UserCreate(email=random_email(), password=random_lower_string())
+    user = crud.user.create(db, obj_in=user_in)
+    snapshot = crud.user.get_snapshot(db, id=user.id)
+    assert snapshot
+    assert snapshot.is_active is True
+    with pytest.raises(TypeError):
+        snapshot.is_superuser = True
+
+    crud.user.update(db, db_obj=user, obj_in={"is_active": False, "password": None})
+    snapshot = crud.user.get_snapshot(db, id=user.id)
+    assert snapshot
+    assert snapshot.is_active is False
+
+
+def test_authenticate_rehashes_after_policy_change(db: Session) -> None:
+    password = random_lower_string()
+    user = crud.user.create(
+        db, obj_in=UserCreate(email=random_email(), password=password)
+    )
+    user.hashed_password = bcrypt.using(rounds=4).hash(password)
+    db.commit()
+    password_hasher.configure(scheme="bcrypt", rounds=5)
+    try:
+        authenticated_user = crud.user.authenticate(
+            db, email=user.email, password=password
+        )
+        assert authenticated_user
+        assert bcrypt.from_string(authenticated_user.hashed_password).rounds == 5
+        assert verify_password(password, authenticated_user.hashed_password)
+    finally:
+        password_hasher.configure(scheme="bcrypt", rounds=12)
+
+
+def test_create_multi_skips_taken_emails(db: Session) -> None:
+    taken = crud.user.create(
+        db, obj_in=UserCreate(email=random_email(), password=random_lower_string())
+    )
+    rows = [
+        {"email": email, "hashed_password": "hash"}
+        for email in (random_email(), taken.email, random_email())
+    ]
+    ids = crud.user.create_multi(db, rows=rows, chunk_size=2)
+    assert set(ids) == {rows[0]["email"], rows[2]["email"]}
+    assert crud.user.get_existing_emails(db, emails=[row["email"] for row in rows]) == {
+        row["email"] for row in rows
+    }
+    assert crud.user.get(db, id=ids[rows[2]["email"]]).email == rows[2]["email"]
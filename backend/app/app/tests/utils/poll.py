@@ -0,0 +1,77 @@
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app import crud, models
+from app.core.role_cache import role_cache
+from app.models.user import user_events_association_table
+from app.schemas.answer import AnswerCreate
+from app.schemas.answer_option import AnswerOptionCreate
+from app.schemas.event import EventCreate
+from app.schemas.poll import PollCreate
+from app.tests.utils.user import create_random_user
+from app.tests.utils.utils import random_lower_string
+
+
+def create_random_event(db: Session, *, owner_id: Optional[int] = None) -> models.Event:
+    if owner_id is None:
+        user = create_random_user(db)
+        owner_id = user.id
+    event_in = EventCreate(name=random_lower_string(), start_at=datetime.utcnow())
+    return crud.event.create_with_owner(db=db, obj_in=event_in, owner_id=owner_id)
+
+
+def create_random_poll(
+    db: Session, *, event_id: Optional[int] = None, is_running: bool = True
+) -> models.Poll:
+    if event_id is None:
+        event = create_random_event(db)
+        event_id = event.id
+    poll_in = PollCreate(question=random_lower_string(), event_id=event_id)
+    event = crud.event.get(db=db, id=event_id)
+    poll = crud.poll.create_with_owner(db=db, obj_in=poll_in, owner_id=event.owner_id)
+    if is_running:
+        poll = crud.poll.update(db=db, db_obj=poll, obj_in={"is_running": True})
+    return poll
+
+
+def create_random_answer_option(db: Session, *, poll_id: int) -> models.AnswerOption:
+    option_in = AnswerOptionCreate(text=random_lower_string(), poll_id=poll_id)
+    return crud.answer_option.create(db=db, obj_in=option_in)
+
+
+def add_participants(db: Session, *, event_id: int, user_ids: List[int]) -> None:
+    db.execute(
+        insert(user_events_association_table).values(
+            [{"event_id": event_id, "user_id": user_id} for user_id in user_ids]
+        )
+    )
+    db.commit()
+    role_cache.invalidate(event_id)
+
+
+def vote_check_then_insert(db: Session, *, obj_in: AnswerCreate, owner_id: int) -> bool:
+    """
+    The check-then-insert sequence `send_answer` used before a vote became a
+    single statement, kept as the baseline of `crud.answer.create_with_owner`.
+    """
+    poll = crud.poll.get(db, id=obj_in.poll_id)
+    event = crud.event.get(db, id=poll.event_id)
+    is_participant = any(user.id == owner_id for user in event.participants)
+    if not is_participant or not poll.is_running:
+        return False
+    if crud.answer.get_multi_by_owner(db, owner_id=owner_id, poll_id=poll.id):
+        return False
+    db_obj = models.Answer(**obj_in.dict(), owner_id=owner_id)
+    db.add(db_obj)
+    try:
+        db.commit()
+    except IntegrityError:
+        # Lost the race, only the unique constraint keeps this path correct now
+        db.rollback()
+        return False
+    db.refresh(db_obj)
+    return True
@@ -0,0 +1,33 @@
+from contextlib import contextmanager
+from typing import Any, Iterator, List
+
+from sqlalchemy import event
+
+from app.db.session import engine
+
+
+@contextmanager
+def count_queries() -> Iterator[List[str]]:
+    """
+    Collect the statements run on the app's engine inside the block.
+    """
+    statements: List[str] = []
+
+    def collect(conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", collect)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", collect)
+
+
+@contextmanager
+def assert_max_queries(count: int) -> Iterator[List[str]]:
+    """
+    Fail if the block runs more than `count` statements.
+    """
+    with count_queries() as statements:
+        yield statements
+    assert len(statements) <= count, "\n\n".join(statements)
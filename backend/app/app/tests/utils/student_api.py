@@ -0,0 +1,79 @@
+import asyncio
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+# Logins with this password are refused the way lk.mirea.ru refuses them
+WRONG_PASSWORD = "wrong"
+
+
+class StudentApi:
+    def __init__(self, *, latency: float = 0.0):
+        """
+        Stand-in for the lk.mirea.ru API behind `STUDENT_API_URL`, so student
+        registration can be tested and load-tested offline. Every request takes
+        `latency` seconds; `status_code` makes it fail. The academic group of
+        a student is the part of their email before the "@".
+        """
+        self.latency = latency
+        self.status_code = 200
+        self.requests = 0
+        self.app = Starlette(routes=[Route("/mrest.php", self.mrest)])
+
+    async def mrest(self, request: Request) -> JSONResponse:
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+        if self.status_code != 200:
+            return JSONResponse({}, status_code=self.status_code)
+        action = request.query_params["action"]
+        if action == "login":
+            if request.query_params["password"] == WRONG_PASSWORD:
+                return JSONResponse({"errors": ["Wrong login or password"]})
+            return JSONResponse({"token": request.query_params["login"]})
+        email = request.headers["Authorization"]
+        return JSONResponse(
+            {
+                "arUser": {
+                    "NAME": "Ivan",
+                    "LAST_NAME": "Ivanov",
+                    "SECOND_NAME": "Ivanovich",
+                },
+                "STUDENTS": {
+                    "1": {
+                        "PROPERTIES": {
+                            "ACADEMIC_GROUP": {"VALUE_TEXT": email.split("@")[0]}
+                        }
+                    }
+                },
+            }
+        )
+
+
+@contextmanager
+def run_student_api(api: StudentApi) -> Iterator[str]:
+    """
+    Serve `api` from a background thread, yields its URL.
+    """
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(
+        uvicorn.Config(api.app, host="127.0.0.1", port=port, log_level="warning")
+    )
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    try:
+        yield f"http://127.0.0.1:{port}/mrest.php"
+    finally:
+        server.should_exit = True
+        thread.join()
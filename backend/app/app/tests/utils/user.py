@@ -1,10 +1,12 @@
-from typing import Dict
+from typing import Dict, List
 
 from fastapi.testclient import TestClient
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
 from app import crud
 from app.core.config import settings
+from app.core.security import get_password_hash
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
 from app.tests.utils.utils import random_email, random_lower_string
@@ -48,3 +50,21 @@ def authentication_token_from_email(
         user = crud.user.update(db, db_obj=user, obj_in=user_in_update)
 
     return user_authentication_headers(client=client, email=email, password=password)
+
+
+def create_random_users(db: Session, *, count: int) -> List[int]:
+    """
+    Insert `count` users with a single statement and return their ids.
+
+    All of them share one password hash, so it is cheap enough to create
+    thousands of voters for load tests.
+    """
+    hashed_password = get_password_hash(random_lower_string())
+    rows = [
+        {"email": random_email(), "hashed_password": hashed_password}
+        for _ in range(count)
+    ]
+    result = db.execute(insert(User).values(rows).returning(User.id))
+    user_ids = [row.id for row in result]
+    db.commit()
+    return user_ids
@@ -1,7 +1,14 @@
+import logging
+from typing import Any, Dict, List, Optional
+
 from raven import Client
 
+from app import crud
 from app.core.celery_app import celery_app
 from app.core.config import settings
+from app.db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
 
 client_sentry = Client(settings.SENTRY_DSN)
 
@@ -9,3 +16,23 @@ client_sentry = Client(settings.SENTRY_DSN)
 @celery_app.task(acks_late=True)
 def test_celery(word: str) -> str:
     return f"test task return {word}"
+
+
+@celery_app.task(acks_late=True)
+def reconcile_answer_tallies(
+    poll_id: Optional[int] = None, fix: bool = True
+) -> List[Dict[str, Any]]:
+    db = SessionLocal()
+    try:
+        drift = crud.answer_tally.reconcile(db, poll_id=poll_id, fix=fix)
+    finally:
+        db.close()
+    for row in drift:
+        logger.warning(
+            "answer tally drift: poll %s, option %s, stored %s, counted %s",
+            row.poll_id,
+            row.answer_option_id,
+            row.stored,
+            row.counted,
+        )
+    return [dict(row._mapping) for row in drift]